@@ -0,0 +1,331 @@
+"""
+Benchmark ponta a ponta do gateway.
+
+Sobe upstreams locais (benchmarks/mock_upstream.py: HTTP simples e mTLS com
+uma PKI temporária no mesmo layout de certs/), sobe a aplicação real
+(src.app.main:app, pelo launcher src.app.server) apontando para eles via
+APP_CONFIG_FILE e dispara carga concorrente em cada cenário. Para cada
+cenário reporta RPS, latências (p50/p90/p99/p999), erros, RSS e CPU do
+gateway por requisição, e grava tudo em JSON para comparar entre commits.
+
+Cenários: plain, mtls, slow, large, stream, post, upload (8 MiB por
+requisição: acima de body.memory_threshold, o corpo vai para arquivo).
+
+Uso:
+    python benchmarks/bench_e2e.py --duration 10 --concurrency 64 --output results.json
+    python benchmarks/bench_e2e.py --scenarios plain,mtls --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import yaml  # noqa: E402
+
+from bench_mtls_handshake import generate_pki  # noqa: E402
+from src.app.core.config.settings import Settings  # noqa: E402
+
+API_PREFIX = "/api/v1"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# nome -> (método, path no gateway, tamanho do corpo enviado)
+SCENARIOS = {
+    "plain": ("GET", "bench/items/fast", 0),
+    "mtls": ("GET", "bench_mtls/items/fast", 0),
+    "slow": ("GET", "bench/items/slow?ms=50", 0),
+    "large": ("GET", "bench/items/large?kb=512", 0),
+    "stream": ("GET", "bench_stream/items/stream?chunks=64&kb=64", 0),
+    "post": ("POST", "bench/items/echo", 16 * 1024),
+    "upload": ("POST", "bench/items/echo", 8 * 1024 * 1024),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"port {port} did not open within {timeout}s")
+
+
+def process_tree(pid: int) -> List[int]:
+    """PID e descendentes (workers do launcher), via /proc"""
+    children: Dict[int, List[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(children.get(current, []))
+    return pids
+
+
+def resource_usage(pid: int) -> Dict[str, float]:
+    """CPU (s) e RSS (MB) somados do processo e dos filhos"""
+    cpu = rss = 0.0
+    for current in process_tree(pid):
+        try:
+            fields = Path(f"/proc/{current}/stat").read_text().rsplit(")", 1)[1].split()
+            rss_pages = int(Path(f"/proc/{current}/statm").read_text().split()[1])
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        rss += rss_pages * PAGE_SIZE / 2**20
+    return {"cpu_s": cpu, "rss_mb": rss}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def write_gateway_config(path: Path, pki: Path, plain_port: int, mtls_port: int, pool: int) -> None:
+    # Desliga os serviços do YAML do ambiente para que só os upstreams locais sejam usados
+    existing = Settings.load_config().get("services", {})
+    services: Dict[str, Any] = {name: {"enabled": False} for name in existing}
+    pool_config = {"max_connections": pool, "max_keepalive_connections": pool}
+    services.update({
+        "bench": {"url": f"http://127.0.0.1:{plain_port}", "api_key": "bench", "pool": pool_config},
+        "bench_mtls": {"url": f"https://localhost:{mtls_port}", "require_mtls": True, "pool": pool_config},
+        "bench_stream": {"url": f"http://127.0.0.1:{plain_port}", "streaming": True, "pool": pool_config},
+    })
+    config = {
+        "logging": {"level": "WARNING"},
+        "server": {"access_log": False},
+        "performance": {"log_slow_requests": False},
+        "mtls": {
+            "enabled": True,
+            "cert_path": str(pki / "client.crt"),
+            "key_path": str(pki / "client.key"),
+            "ca_path": str(pki / "ca.crt"),
+        },
+        "services": services,
+    }
+    path.write_text(yaml.safe_dump(config))
+
+
+async def run_scenario(
+    base_url: str,
+    name: str,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    gateway_pid: int,
+) -> Dict[str, Any]:
+    method, path, body_size = SCENARIOS[name]
+    url = f"{base_url}{API_PREFIX}/{path}"
+    body = b"x" * body_size if body_size else None
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        async def worker(end: float, record: bool) -> None:
+            while time.perf_counter() < end:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, content=body)
+                except httpx.HTTPError as e:
+                    if record:
+                        errors[type(e).__name__] += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] += 1
+
+        if warmup > 0:
+            end = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(end, False) for _ in range(concurrency)))
+
+        peak_rss = 0.0
+
+        async def sample_rss(end: float) -> None:
+            nonlocal peak_rss
+            while time.perf_counter() < end:
+                peak_rss = max(peak_rss, resource_usage(gateway_pid)["rss_mb"])
+                await asyncio.sleep(0.5)
+
+        before = resource_usage(gateway_pid)
+        started = time.perf_counter()
+        end = started + duration
+        await asyncio.gather(sample_rss(end), *(worker(end, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        after = resource_usage(gateway_pid)
+
+    ordered = sorted(latencies)
+    requests = len(latencies)
+    cpu = after["cpu_s"] - before["cpu_s"]
+    ok = sum(count for status, count in statuses.items() if status < 400)
+    return {
+        "method": method,
+        "path": path,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": requests,
+        "ok": ok,
+        "status": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+        "rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(ordered) / requests * 1000, 3) if requests else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p90": round(percentile(ordered, 0.90) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "p999": round(percentile(ordered, 0.999) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+        "gateway": {
+            "rss_mb": round(after["rss_mb"], 1),
+            "rss_peak_mb": round(max(peak_rss, after["rss_mb"]), 1),
+            "cpu_s": round(cpu, 3),
+            "cpu_ms_per_request": round(cpu / requests * 1000, 4) if requests else None,
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"{'scenario':<8} {'rps':>9} {'p50':>8} {'p99':>8} {'p999':>8} {'errors':>7} {'cpu/req':>9} {'rss':>7}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        failed = result["requests"] - result["ok"] + sum(result["errors"].values())
+        cpu = result["gateway"]["cpu_ms_per_request"]
+        print(
+            f"{name:<8} {result['rps']:>9.1f} {latency['p50']:>7.2f}ms {latency['p99']:>7.2f}ms "
+            f"{latency['p999']:>7.2f}ms {failed:>7} {cpu if cpu is not None else 0:>7.3f}ms "
+            f"{result['gateway']['rss_peak_mb']:>5.0f}MB"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            def delta(new: float, old: float) -> str:
+                return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(
+                f"{'':<8} vs {baseline.get('revision') or 'baseline'}: "
+                f"rps {delta(result['rps'], previous['rps'])}, "
+                f"p50 {delta(latency['p50'], previous['latency_ms']['p50'])}, "
+                f"p99 {delta(latency['p99'], previous['latency_ms']['p99'])}, "
+                f"cpu/req {delta(cpu or 0, previous['gateway']['cpu_ms_per_request'] or 0)}"
+            )
+
+
+def start(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="lista separada por vírgulas")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos por cenário")
+    parser.add_argument("--warmup", type=float, default=2.0, help="segundos de aquecimento por cenário")
+    parser.add_argument("--workers", type=int, default=1, help="workers do gateway")
+    parser.add_argument("--output", help="arquivo JSON com os resultados")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {unknown}")
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+
+    processes: List[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pki = Path(tmp)
+        generate_pki(pki)
+        plain_port, mtls_port, gateway_port = free_port(), free_port(), free_port()
+        config_file = pki / "gateway.yaml"
+        write_gateway_config(config_file, pki, plain_port, mtls_port, args.concurrency)
+
+        mock = [sys.executable, str(ROOT / "benchmarks" / "mock_upstream.py")]
+        env = {**os.environ, "APP_CONFIG_FILE": str(config_file)}
+        env.pop("GATEWAY_METRICS_DIR", None)
+        try:
+            processes.append(start(mock + ["--port", str(plain_port)]))
+            processes.append(start(mock + ["--port", str(mtls_port), "--tls-dir", str(pki)]))
+            gateway = start(
+                [sys.executable, "-m", "src.app.server", "--workers", str(args.workers),
+                 "--host", "127.0.0.1", "--port", str(gateway_port)],
+                env=env,
+            )
+            processes.append(gateway)
+            for port in (plain_port, mtls_port, gateway_port):
+                wait_port(port)
+
+            results: Dict[str, Any] = {
+                "revision": git_revision(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "settings": {
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "warmup_s": args.warmup,
+                    "workers": args.workers,
+                },
+                "scenarios": {},
+            }
+            base_url = f"http://127.0.0.1:{gateway_port}"
+            for name in scenarios:
+                results["scenarios"][name] = asyncio.run(
+                    run_scenario(base_url, name, args.concurrency, args.duration, args.warmup, gateway.pid)
+                )
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    print_results(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Microbenchmark do tratamento de headers no caminho do proxy.
+
+Compara o caminho antigo de forward_request (dict(request.headers) + pops,
+logs em f-string montados mesmo com o nível desligado, dict dos headers da
+resposta + Response com media_type) com o HeaderPipeline compilado por
+serviço e o RequestLog com nível verificado antes. Mostra o tempo por
+requisição e o pico de memória alocada por requisição (tracemalloc).
+
+Uso:
+    python benchmarks/bench_headers.py --requests 50000
+"""
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from fastapi import Request, Response  # noqa: E402
+
+from src.app.core.config.settings import ServiceConfig  # noqa: E402
+from src.app.core.logs import RequestLog  # noqa: E402
+from src.app.services.proxy.headers import HeaderPipeline, RawResponse  # noqa: E402
+
+logger = logging.getLogger("bench.headers")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+SERVICE_CONFIG = ServiceConfig(url="http://products:8001", api_key="service-key")
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+REQUEST_HEADERS = [
+    (b"host", b"gateway.example.com"),
+    (b"connection", b"keep-alive"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0"),
+    (b"accept", b"application/json, text/plain, */*"),
+    (b"accept-encoding", b"gzip, deflate, br"),
+    (b"accept-language", b"pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"),
+    (b"x-api-key", b"client-key-0123456789"),
+    (b"x-request-id", b"5f1c1a3e-8a55-4ad2-9a8d-7a3d2c0b9f11"),
+    (b"referer", b"https://shop.example.com/products/42"),
+    (b"origin", b"https://shop.example.com"),
+    (b"sec-fetch-mode", b"cors"),
+    (b"sec-fetch-site", b"same-site"),
+    (b"cookie", b"session=abc123; theme=dark"),
+    (b"x-forwarded-for", b"203.0.113.7"),
+]
+RESPONSE_HEADERS = [
+    (b"Date", b"Mon, 01 Jan 2024 00:00:00 GMT"),
+    (b"Server", b"uvicorn"),
+    (b"Content-Type", b"application/json"),
+    (b"Content-Length", b"512"),
+    (b"Cache-Control", b"max-age=60"),
+    (b"ETag", b'"abc123"'),
+    (b"Vary", b"Accept-Language"),
+    (b"Connection", b"keep-alive"),
+]
+BODY = b"x" * 512
+
+
+def make_scope():
+    return {
+        "type": "http", "method": "GET", "scheme": "http", "path": "/api/v1/products/items/42",
+        "raw_path": b"/api/v1/products/items/42", "query_string": b"page=2", "root_path": "",
+        "headers": REQUEST_HEADERS, "client": ("203.0.113.7", 50000), "server": ("gateway", 8000),
+    }
+
+
+UPSTREAM = httpx.Response(
+    200, headers=RESPONSE_HEADERS, content=BODY,
+    request=httpx.Request("GET", "http://products:8001/api/v1/products/items/42"),
+)
+
+
+def legacy(scope) -> Response:
+    request = Request(scope)
+    # Router
+    logger.info(f"Received request - Method: {request.method}, Service: products, Path: items/42")
+    logger.debug(f"Full URL: {request.url}")
+    # forward_request
+    logger.debug("Processing request for service: products")
+    logger.debug(f"Service config: {SERVICE_CONFIG}")
+    headers = dict(request.headers)
+    headers.pop("host", None)
+    headers.pop(DEADLINE_HEADER, None)
+    headers.pop("content-length", None)
+    headers["x-api-key"] = SERVICE_CONFIG.api_key
+    logger.debug(f"Final headers: {headers}")
+    logger.info(f"Response from products: {UPSTREAM.status_code}")
+    response_headers = dict(list(UPSTREAM.headers.items()))
+    return Response(
+        content=UPSTREAM.content,
+        status_code=UPSTREAM.status_code,
+        headers=response_headers,
+        media_type=UPSTREAM.headers.get("content-type"),
+    )
+
+
+PIPELINE = HeaderPipeline(SERVICE_CONFIG.headers)
+REQUEST_LOG = RequestLog(logger, 0.01)
+
+
+def pipeline(scope) -> Response:
+    if REQUEST_LOG.enabled(logging.DEBUG):
+        REQUEST_LOG.emit(logging.DEBUG, "proxy_request", service="products", path="items/42")
+    headers, _ = PIPELINE.request(scope, False)
+    headers.pop(DEADLINE_HEADER, None)
+    headers["x-api-key"] = SERVICE_CONFIG.api_key
+    if REQUEST_LOG.enabled(logging.INFO):
+        REQUEST_LOG.emit(logging.INFO, "upstream_response", service="products", status=UPSTREAM.status_code)
+    return RawResponse(UPSTREAM.content, UPSTREAM.status_code, PIPELINE.response(UPSTREAM))
+
+
+def bench(name: str, func, requests: int) -> None:
+    scopes = [make_scope() for _ in range(1024)]
+    for scope in scopes[:100]:
+        func(scope)
+
+    started = time.perf_counter()
+    for i in range(requests):
+        func(scopes[i & 1023])
+    elapsed = time.perf_counter() - started
+
+    # Pico de memória alocada durante uma requisição (média de várias)
+    samples = min(requests, 2000)
+    tracemalloc.start()
+    peak_total = 0
+    for i in range(samples):
+        scope = scopes[i & 1023]
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(scope)
+        peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    print(f"{name:<10} {elapsed / requests * 1e9:8.0f} ns/req  {peak_total / samples:8.0f} bytes/req (peak)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+    bench("legacy", legacy, args.requests)
+    bench("pipeline", pipeline, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de handshakes mTLS por segundo.
+
+Compara o comportamento antigo (um SSLContext novo, lido do disco, por conexão)
+com o SSLContext compartilhado do MTLSConfig (cache + retomada de sessão TLS).
+
+Gera uma PKI temporária com `openssl` (CA, servidor e cliente) e sobe um
+servidor TLS local que exige certificado de cliente.
+
+Uso:
+    python benchmarks/bench_mtls_handshake.py --connections 500
+"""
+import argparse
+import asyncio
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.app.core.security.mtls import MTLSConfig  # noqa: E402
+
+
+def _openssl(*args: str, cwd: Path) -> None:
+    subprocess.run(["openssl", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def generate_pki(directory: Path) -> None:
+    _openssl("req", "-x509", "-newkey", "rsa:2048", "-days", "1", "-nodes",
+             "-keyout", "ca.key", "-out", "ca.crt", "-subj", "/CN=Bench CA", cwd=directory)
+    for name in ("server", "client"):
+        _openssl("req", "-newkey", "rsa:2048", "-nodes", "-keyout", f"{name}.key",
+                 "-out", f"{name}.csr", "-subj", "/CN=localhost", cwd=directory)
+        (directory / f"{name}.ext").write_text("subjectAltName=DNS:localhost,IP:127.0.0.1\n")
+        _openssl("x509", "-req", "-in", f"{name}.csr", "-CA", "ca.crt", "-CAkey", "ca.key",
+                 "-CAcreateserial", "-out", f"{name}.crt", "-days", "1",
+                 "-extfile", f"{name}.ext", cwd=directory)
+
+
+async def start_server(directory: Path) -> asyncio.AbstractServer:
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH, cafile=str(directory / "ca.crt"))
+    context.load_cert_chain(str(directory / "server.crt"), str(directory / "server.key"))
+    context.verify_mode = ssl.CERT_REQUIRED
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(b"ok")
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0, ssl=context)
+
+
+async def run(label: str, port: int, connections: int, get_context) -> None:
+    resumed = 0
+    started = time.perf_counter()
+    for _ in range(connections):
+        reader, writer = await asyncio.open_connection(
+            "127.0.0.1", port, ssl=get_context(), server_hostname="localhost"
+        )
+        # Ler a resposta garante que os tickets de sessão TLS 1.3 foram processados
+        await reader.read(2)
+        if writer.get_extra_info("ssl_object").session_reused:
+            resumed += 1
+        writer.close()
+        await writer.wait_closed()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {connections / elapsed:10.1f} handshakes/s  resumed={resumed}/{connections}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        generate_pki(directory)
+        server = await start_server(directory)
+        port = server.sockets[0].getsockname()[1]
+        mtls_config = MTLSConfig(
+            cert_path=directory / "client.crt",
+            key_path=directory / "client.key",
+            ca_path=directory / "ca.crt",
+        )
+        async with server:
+            await run("before: context per connection", port, args.connections, mtls_config.create_ssl_context)
+            await run("after: cached shared context", port, args.connections, mtls_config.get_ssl_context)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+"""
+Benchmark do tempo de inicialização do gateway.
+
+Em processos novos (cache de bytecode já aquecido pela primeira execução),
+mede:
+    import    tempo de import de cada etapa: settings (pydantic + YAML),
+              gateway (FastAPI, httpx e o proxy) e app (src.app.main)
+    lifespan  startup da aplicação: serviços, pools, contexto mTLS e chaves
+    ready     do início do processo até o primeiro 200 em /health, pelo
+              launcher de produção (python -m src.app.server)
+
+Com --services, um YAML (APP_CONFIG_FILE) acrescenta serviços sintéticos
+com --endpoints instâncias cada (com --mtls, exigindo mTLS com uma PKI
+temporária), para ver como o startup cresce com a configuração.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --services 200 --endpoints 2 --mtls --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import yaml  # noqa: E402
+
+from bench_e2e import free_port, git_revision  # noqa: E402
+from bench_mtls_handshake import generate_pki  # noqa: E402
+
+# Executado em um interpretador novo; imprime os tempos em JSON
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import src.app.core.config.settings
+settings_done = time.perf_counter()
+import src.app.api.v1.gateway
+gateway_done = time.perf_counter()
+from src.app.main import app
+app_done = time.perf_counter()
+
+async def startup():
+    begin = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready - begin
+
+lifespan = asyncio.run(startup())
+print(json.dumps({
+    "settings": settings_done - started,
+    "gateway": gateway_done - settings_done,
+    "app": app_done - gateway_done,
+    "import": app_done - started,
+    "lifespan": lifespan,
+}))
+"""
+
+
+def write_config(path: Path, services: int, endpoints: int, pki: Optional[Path]) -> None:
+    # Upstreams inexistentes: o startup não conecta (health checks desligados)
+    config: Dict[str, Any] = {
+        "logging": {"level": "WARNING"},
+        "server": {"access_log": False},
+        "services": {
+            f"synthetic_{index}": {
+                "endpoints": [
+                    {"url": f"{'https://localhost' if pki else 'http://127.0.0.1'}:{20000 + index * endpoints + n}"}
+                    for n in range(endpoints)
+                ],
+                "require_mtls": pki is not None,
+                "routes": [{"path": "items/{id}", "rewrite": "v2/items/{id}"}],
+            }
+            for index in range(services)
+        },
+    }
+    if pki is not None:
+        config["mtls"] = {
+            "enabled": True,
+            "cert_path": str(pki / "client.crt"),
+            "key_path": str(pki / "client.key"),
+            "ca_path": str(pki / "ca.crt"),
+        }
+    path.write_text(yaml.safe_dump(config))
+
+
+def probe(env: Dict[str, str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+
+def ready(env: Dict[str, str], workers: int, timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.app.server", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"gateway exited with status {process.returncode}")
+            time.sleep(0.01)
+        raise RuntimeError(f"gateway not ready within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--services", type=int, default=0, help="serviços sintéticos acrescentados")
+    parser.add_argument("--endpoints", type=int, default=1, help="instâncias por serviço sintético")
+    parser.add_argument("--mtls", action="store_true", help="serviços sintéticos exigem mTLS")
+    parser.add_argument("--workers", type=int, default=1, help="workers do launcher na medição de ready")
+    parser.add_argument("--output", help="arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ}
+        env.pop("GATEWAY_METRICS_DIR", None)
+        if args.services:
+            pki = None
+            if args.mtls:
+                pki = Path(tmp)
+                generate_pki(pki)
+            config_file = Path(tmp) / "startup.yaml"
+            write_config(config_file, args.services, args.endpoints, pki)
+            env["APP_CONFIG_FILE"] = str(config_file)
+
+        # Primeira execução só aquece o cache de bytecode
+        probe(env)
+        probes = [probe(env) for _ in range(args.runs)]
+        readiness = [ready(env, args.workers) for _ in range(args.runs)]
+
+    results: Dict[str, Any] = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": vars(args),
+        "stages": {stage: summarize([p[stage] for p in probes]) for stage in probes[0]},
+        "ready": summarize(readiness),
+    }
+    print(f"{'stage':<10} {'median':>10} {'min':>10}")
+    for stage, summary in [*results["stages"].items(), ("ready", results["ready"])]:
+        print(f"{stage:<10} {summary['median_ms']:>8.1f}ms {summary['min_ms']:>8.1f}ms")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
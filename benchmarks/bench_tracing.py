@@ -0,0 +1,90 @@
+"""
+Microbenchmark do custo do tracing por requisição.
+
+Chama um app ASGI mínimo diretamente (sem servidor) com o TracingMiddleware
+em quatro configurações: sem middleware, só Server-Timing, tracing ativo
+fora da amostra (só propagação e request ID) e tracing com todas as
+requisições amostradas (spans do middleware, de um estágio interno e do
+envio da resposta, exportados para memória).
+
+Uso:
+    python benchmarks/bench_tracing.py --requests 50000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.app.core.config.settings import TracingConfig  # noqa: E402
+from src.app.core.tracing import MemoryExporter, TRACE_SCOPE_KEY, Tracer, TracingMiddleware, stage  # noqa: E402
+
+HEADERS = [
+    (b"host", b"gateway.example.com"),
+    (b"user-agent", b"bench"),
+    (b"accept", b"application/json"),
+    (b"traceparent", b"00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00"),
+]
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send) -> None:
+    with stage(scope.get(TRACE_SCOPE_KEY), "handler"):
+        await send(START)
+        await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message) -> None:
+    pass
+
+
+def make_scope():
+    return {
+        "type": "http", "method": "GET", "path": "/api/v1/products/1", "query_string": b"",
+        "headers": list(HEADERS), "client": ("127.0.0.1", 5000),
+    }
+
+
+def tracer(sample_rate: float, parent_based: bool = True) -> Tracer:
+    config = TracingConfig(enabled=True, sample_rate=sample_rate, parent_based=parent_based, exporter="memory")
+    return Tracer(config, MemoryExporter(max_spans=1000))
+
+
+async def bench(name: str, app, requests: int, tracer_: Tracer = None) -> None:
+    for _ in range(100):
+        await app(make_scope(), receive, send)
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(make_scope(), receive, send)
+        if tracer_ is not None and i % 512 == 0:
+            await tracer_.flush()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<16} {elapsed / requests * 1e6:8.2f} µs/req")
+
+
+async def run(requests: int) -> None:
+    await bench("baseline", endpoint, requests)
+    await bench("server-timing", TracingMiddleware(endpoint, None, server_timing=True), requests)
+    unsampled = tracer(0.0)
+    await bench("unsampled", TracingMiddleware(endpoint, unsampled), requests, unsampled)
+    # parent_based=False ignora o flag do traceparent e amostra tudo
+    sampled = tracer(1.0, parent_based=False)
+    await bench("sampled", TracingMiddleware(endpoint, sampled), requests, sampled)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Upstream local para os benchmarks (ASGI puro, sem framework, para que o custo
+medido seja o do gateway).
+
+O comportamento depende do último segmento do path:
+    .../fast                   JSON pequeno
+    .../slow?ms=50             JSON pequeno após `ms` milissegundos
+    .../large?kb=512           corpo de `kb` KiB
+    .../stream?chunks=64&kb=64 `chunks` blocos de `kb` KiB (chunked)
+    .../echo                   tamanho do corpo recebido (JSON)
+
+Uso:
+    python benchmarks/mock_upstream.py --port 9001 [--tls-dir <pasta com ca.crt, server.crt, server.key>]
+"""
+import argparse
+import asyncio
+import json
+import ssl
+from urllib.parse import parse_qs
+
+import uvicorn
+
+_SMALL = json.dumps({"id": 42, "name": "Produto de teste", "price": 99.9, "tags": ["a", "b", "c"]}).encode()
+
+
+def _param(query: dict, name: str, default: int) -> int:
+    values = query.get(name)
+    return int(values[0]) if values else default
+
+
+async def _read_body(receive) -> int:
+    size = 0
+    while True:
+        message = await receive()
+        size += len(message.get("body", b""))
+        if not message.get("more_body"):
+            return size
+
+
+async def _respond(send, body: bytes, content_type: bytes = b"application/json") -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    query = parse_qs(scope["query_string"].decode())
+    action = scope["path"].rstrip("/").rsplit("/", 1)[-1]
+    received = await _read_body(receive)
+
+    if action == "slow":
+        await asyncio.sleep(_param(query, "ms", 50) / 1000)
+        await _respond(send, _SMALL)
+    elif action == "large":
+        await _respond(send, b"x" * (_param(query, "kb", 512) * 1024), b"application/octet-stream")
+    elif action == "stream":
+        chunk = b"x" * (_param(query, "kb", 64) * 1024)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/octet-stream")],
+        })
+        for _ in range(_param(query, "chunks", 64)):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    elif action == "echo":
+        await _respond(send, json.dumps({"received": received}).encode())
+    else:
+        await _respond(send, _SMALL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--tls-dir", help="exige certificado de cliente assinado pela CA da pasta")
+    args = parser.parse_args()
+
+    options = {}
+    if args.tls_dir:
+        options = {
+            "ssl_certfile": f"{args.tls_dir}/server.crt",
+            "ssl_keyfile": f"{args.tls_dir}/server.key",
+            "ssl_ca_certs": f"{args.tls_dir}/ca.crt",
+            "ssl_cert_reqs": ssl.CERT_REQUIRED,
+        }
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False, **options)
+
+
+if __name__ == "__main__":
+    main()
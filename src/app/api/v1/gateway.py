@@ -1,24 +1,33 @@
 from fastapi import APIRouter, Request, HTTPException
-from src.app.core.config.settings import settings
-from src.app.services.proxy.service import ProxyService
+from fastapi.responses import JSONResponse
+from src.app.services.proxy.reload import ReloadableProxyService
+from src.app.services.proxy.aggregate import BatchExecutor, BatchRequest
+from src.app.core.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Configurando os serviços disponíveis
-services_config = {
-    name: {
-        "url": service.url,
-        "timeout": service.timeout
-    } 
-    for name, service in settings.services.items()
-    if service.enabled
-}
+# Snapshot dos serviços, montado no startup da aplicação e trocado sem
+# restart quando config_reload está ativo
+proxy_service = ReloadableProxyService()
+metrics.register_collector(proxy_service.collect_metrics)
+batch_executor = BatchExecutor(proxy_service)
 
-logger.info(f"Gateway router initialized with services: {services_config}")
-proxy_service = ProxyService(services_config)
+# Rotas de batch antes da rota genérica (o "_" evita conflito com nomes de serviço)
+@router.post("/_batch")
+async def batch(payload: BatchRequest, request: Request):
+    """
+    Executa várias sub-requisições em paralelo e retorna as respostas juntas,
+    cada uma com seu status (falhas parciais não afetam os demais itens)
+    """
+    return await batch_executor.execute(request, payload.requests, payload.timeout)
+
+@router.get("/_batch/{composition}")
+async def compose(composition: str, request: Request):
+    """Executa uma composição definida em `batch.compositions`; a query string preenche os parâmetros"""
+    return await batch_executor.compose(request, composition)
 
 @router.api_route("/{service}/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
 async def forward_to_service(
@@ -32,36 +41,30 @@ async def forward_to_service(
     - path: the remaining path after the service name
     - request: the original request object
     """
-    logger.info(f"Received request - Method: {request.method}, Service: {service}, Path: {path}")
-    logger.debug(f"Full URL: {request.url}")
-    
-    # Reconstruct complete path including query params
-    full_path = path
-    if request.query_params:
-        full_path = f"{path}?{request.query_params}"
-    
+    # A query string é repassada por forward_request a partir do scope; o log
+    # da requisição (amostrado) também fica em forward_request
     try:
         return await proxy_service.forward_request(
             service=service,
-            path=full_path,
+            path=path,
             request=request
         )
         
     except HTTPException as e:
-        logger.error(f"HTTP Exception in gateway: {e.detail}")
+        # Falhas do upstream e recusas (429/503) já foram registradas em
+        # forward_request; aqui só em DEBUG, dentro da amostragem da requisição
+        request_log = proxy_service.request_log
+        if request_log.enabled(logging.DEBUG, request.scope):
+            request_log.emit(logging.DEBUG, "http_exception", service=service, status=e.status_code, detail=e.detail)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in gateway: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in gateway: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Gateway Error")
 
 @router.get("/health")
 async def health_check():
-    services_status = {
-        name: {"url": service.url, "enabled": service.enabled}
-        for name, service in settings.services.items()
-    }
-    logger.debug(f"Health check - services status: {services_status}")
-    return {
-        "status": "healthy",
-        "services": services_status
-    }
\ No newline at end of file
+    # Estado mantido em memória pelas verificações ativas/passivas, sem I/O por chamada;
+    # 503 também enquanto os pools com pré-aquecimento não estão prontos (readiness)
+    health = proxy_service.health()
+    status_code = 503 if health["status"] == "unhealthy" or not health["warm"]["ready"] else 200
+    return JSONResponse(status_code=status_code, content=health)
\ No newline at end of file
@@ -1,17 +1,23 @@
 from functools import lru_cache
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Literal, Optional
+import json
 import yaml
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
+# Parser do libyaml (C) quando instalado: bem mais rápido que o em Python puro
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class MTLSSettings(BaseModel):
     enabled: bool = False
     cert_path: str = "certs/client.crt"
     key_path: str = "certs/client.key"
     ca_path: str = "certs/ca.crt"
+    # Intervalo (s) para verificar mudanças nos certificados; 0 desativa
+    reload_interval: float = 30.0
 
 class PerformanceConfig(BaseModel):
     debug_mode: bool = False
@@ -19,12 +25,269 @@ class PerformanceConfig(BaseModel):
     log_slow_requests: bool = True
     slow_request_threshold: float = 1.0  
 
-class ServiceConfig(BaseModel):
+class PoolConfig(BaseModel):
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    http2: bool = False
+
+    @field_validator('max_connections', 'max_keepalive_connections')
+    def limits_must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError('pool limits must be positive')
+        return v
+
+class RouteConfig(BaseModel):
+    # Padrão relativo ao serviço, ex.: "items/{id}" (casa também sub-paths)
+    path: str
+    # Path no upstream, ex.: "/v2/catalog/{id}"; o restante do path é anexado
+    rewrite: str
+    # Métodos aos quais a regra se aplica; vazio = todos
+    methods: List[str] = []
+    # Sobrescreve `streaming` do serviço para esta rota
+    streaming: bool | None = None
+
+class CacheConfig(BaseModel):
+    enabled: bool = False
+    # TTL de respostas `public` sem max-age/s-maxage/Expires (sem validade explícita não há TTL)
+    default_ttl: float = 60.0
+    stale_while_revalidate: float = 0.0
+    max_bytes: int = 64 * 1024 * 1024
+    max_entries: int = 10000
+    max_entry_bytes: int = 1024 * 1024
+    # Headers da requisição que fazem parte da chave do cache
+    key_headers: List[str] = ["accept", "accept-encoding"]
+    cacheable_status: List[int] = [200, 203, 301, 404, 410]
+
+class CoalescingConfig(BaseModel):
+    enabled: bool = False
+    # Tempo máximo (s) que uma requisição espera pela chamada compartilhada
+    max_wait: float = 5.0
+    # Ordena a query string antes de montar a chave
+    normalize_query: bool = True
+    # Headers da requisição que diferenciam chamadas (credenciais sempre devem entrar)
+    key_headers: List[str] = [
+        "authorization", "cookie", "x-api-key", "accept", "accept-encoding",
+        "accept-language", "if-none-match", "if-modified-since", "range",
+    ]
+
+class EndpointConfig(BaseModel):
     url: str
+    weight: int = 1
+
+    @field_validator('weight')
+    def weight_must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError('weight must be positive')
+        return v
+
+class LoadBalancingConfig(BaseModel):
+    strategy: Literal["round_robin", "least_outstanding", "p2c_ewma"] = "round_robin"
+    # Falhas consecutivas (erro de conexão/timeout ou status em failure_status) para ejetar
+    failure_threshold: int = 5
+    ejection_time: float = 30.0
+    max_ejection_time: float = 300.0
+    failure_status: List[int] = [502, 503, 504]
+    # Peso da última amostra na média móvel de latência (p2c_ewma)
+    ewma_alpha: float = 0.3
+
+class HealthCheckConfig(BaseModel):
+    enabled: bool = False
+    path: str = "/health"
+    interval: float = 10.0
+    timeout: float = 2.0
+    # Variação aleatória do intervalo (fração), para não sincronizar as verificações
+    jitter: float = 0.1
+    healthy_threshold: int = 2
+    unhealthy_threshold: int = 3
+    expected_status: List[int] = [200]
+
+class PrewarmConfig(BaseModel):
+    # Conexões mantidas abertas por instância: abertas no startup e renovadas
+    # antes de o keep-alive expirar; 0 = desligado
+    min_connections: int = 0
+    # Requisição leve usada para abrir e renovar as conexões
+    method: str = "HEAD"
+    path: str = "/health"
+    timeout: float = 5.0
+    # Keep-alive do upstream (s), quando menor que pool.keepalive_expiry
+    upstream_keepalive: float | None = None
+    # Conexões ociosas há mais que esta fração do keep-alive são renovadas
+    refresh_ratio: float = 0.5
+
+    @field_validator('min_connections')
+    def min_connections_not_negative(cls, v):
+        if v < 0:
+            raise ValueError('min_connections must be >= 0')
+        return v
+
+    @field_validator('refresh_ratio')
+    def refresh_ratio_in_range(cls, v):
+        if not 0 < v < 1:
+            raise ValueError('refresh_ratio must be between 0 and 1')
+        return v
+
+class BodyConfig(BaseModel):
+    # Tamanho máximo (bytes) dos corpos; acima disso 413 (requisição) ou 502 (resposta); None = sem limite
+    max_request_bytes: int | None = None
+    max_response_bytes: int | None = None
+    # Corpos bufferizados maiores que isto vão para um arquivo temporário (relido via mmap)
+    memory_threshold: int = 1024 * 1024
+
+    @field_validator('max_request_bytes', 'max_response_bytes', 'memory_threshold')
+    def sizes_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('body sizes must be positive')
+        return v
+
+class CircuitBreakerConfig(BaseModel):
+    enabled: bool = True
+    # Janela deslizante (s) e quantidade de buckets
+    window: float = 10.0
+    buckets: int = 10
+    minimum_calls: int = 20
+    failure_rate_threshold: float = 0.5
+    slow_call_threshold: float = 5.0
+    slow_call_rate_threshold: float = 0.8
+    open_duration: float = 15.0
+    half_open_max_calls: int = 3
+    failure_status: List[int] = [502, 503, 504]
+
+class RetryConfig(BaseModel):
+    # Total de tentativas (1 = sem retry)
+    max_attempts: int = 2
+    methods: List[str] = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+    retry_on_status: List[int] = [502, 503, 504]
+    backoff_base: float = 0.05
+    backoff_max: float = 1.0
+
+    @field_validator('max_attempts')
+    def attempts_must_be_positive(cls, v):
+        if v < 1:
+            raise ValueError('max_attempts must be at least 1')
+        return v
+
+class TimeoutConfig(BaseModel):
+    # Limites (s) por fase; None = usa `timeout` do serviço
+    connect: float | None = None
+    read: float | None = None
+    write: float | None = None
+    pool: float | None = None
+    # Prazo total da requisição, somando todas as tentativas; None = sem limite
+    total: float | None = None
+
+    @field_validator('connect', 'read', 'write', 'pool', 'total')
+    def timeouts_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('timeouts must be positive')
+        return v
+
+class RateLimitRule(BaseModel):
+    # Requisições por segundo e rajada máxima aceita acima dessa taxa
+    rate: float
+    burst: int = 1
+
+    @field_validator('rate', 'burst')
+    def rule_must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError('rate and burst must be positive')
+        return v
+
+class ServiceLimitsConfig(BaseModel):
+    # Limite do serviço como um todo
+    rate: RateLimitRule | None = None
+    # Limites por API key / IP do cliente neste serviço
+    per_api_key: RateLimitRule | None = None
+    per_client_ip: RateLimitRule | None = None
+    # Máximo de requisições em andamento; acima disso responde 503
+    max_concurrent: int | None = None
+
+    @field_validator('max_concurrent')
+    def concurrency_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('max_concurrent must be positive')
+        return v
+
+class CompressionConfig(BaseModel):
+    enabled: bool = False
+    # Codificações em ordem de preferência; br/zstd exigem os extras "compression"
+    encodings: List[str] = ["br", "zstd", "gzip"]
+    # Respostas menores que isso não são comprimidas
+    min_size: int = 1024
+    # Prefixos de content-type elegíveis
+    content_types: List[str] = [
+        "application/json", "application/javascript", "application/xml", "image/svg+xml", "text/",
+    ]
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    zstd_level: int = 3
+    # Corpos (ou blocos de streaming) a partir deste tamanho são comprimidos numa thread
+    thread_threshold: int = 256 * 1024
+    # Guarda no cache de respostas a versão já comprimida de cada entrada
+    cache_variants: bool = True
+
+class HeaderRulesConfig(BaseModel):
+    # Headers definidos/substituídos na requisição ao upstream
+    request_set: Dict[str, str] = {}
+    # Headers do cliente que não são repassados ao upstream
+    request_remove: List[str] = []
+    # Headers definidos/substituídos/removidos na resposta ao cliente
+    response_set: Dict[str, str] = {}
+    response_remove: List[str] = []
+    # Adiciona X-Forwarded-For/-Proto/-Host na requisição ao upstream
+    forwarded: bool = False
+
+class ServiceConfig(BaseModel):
+    # `url` para um único upstream ou `endpoints` para vários (com pesos)
+    url: str | None = None
     timeout: int = 30
+    timeouts: TimeoutConfig = TimeoutConfig()
     enabled: bool = True
     api_key: str | None = None
     require_mtls: bool = False
+    pool: PoolConfig = PoolConfig()
+    # Streaming de request/response; buffered_paths força corpo em memória
+    # para os prefixos de path informados (relativos ao serviço)
+    streaming: bool = False
+    buffered_paths: List[str] = []
+    # Prefixo do path no upstream; padrão "<api_prefix>/<serviço>"
+    upstream_prefix: str | None = None
+    routes: List[RouteConfig] = []
+    cache: CacheConfig = CacheConfig()
+    coalescing: CoalescingConfig = CoalescingConfig()
+    endpoints: List[EndpointConfig] = []
+    load_balancing: LoadBalancingConfig = LoadBalancingConfig()
+    health_check: HealthCheckConfig = HealthCheckConfig()
+    prewarm: PrewarmConfig = PrewarmConfig()
+    circuit_breaker: CircuitBreakerConfig = CircuitBreakerConfig()
+    retry: RetryConfig = RetryConfig()
+    limits: ServiceLimitsConfig = ServiceLimitsConfig()
+    compression: CompressionConfig = CompressionConfig()
+    body: BodyConfig = BodyConfig()
+    # Exige X-API-Key válida (ver api_key_store) dos clientes deste serviço
+    require_api_key: bool = False
+    headers: HeaderRulesConfig = HeaderRulesConfig()
+
+    @model_validator(mode='after')
+    def resolve_endpoints(self):
+        if not self.endpoints:
+            if not self.url:
+                raise ValueError('either url or endpoints must be configured')
+            self.endpoints = [EndpointConfig(url=self.url)]
+        elif not self.url:
+            self.url = self.endpoints[0].url
+        return self
+
+    @model_validator(mode='after')
+    def prewarm_within_keepalive_limit(self):
+        # Acima de max_keepalive_connections o pool fecharia as conexões aquecidas
+        if self.prewarm.min_connections > self.pool.max_keepalive_connections:
+            raise ValueError('prewarm.min_connections must not exceed pool.max_keepalive_connections')
+        return self
+
+    @field_validator('buffered_paths')
+    def normalize_buffered_paths(cls, v):
+        return [prefix.strip('/') for prefix in v if prefix.strip('/')]
 
     @field_validator('timeout')
     def timeout_must_be_positive(cls, v):
@@ -43,6 +306,27 @@ class AppConfig(BaseModel):
 class ServerConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    # Launcher de produção (python -m src.app.server); 0 = um worker por CPU
+    workers: int = 1
+    # Um socket por worker com SO_REUSEPORT (o kernel distribui as conexões);
+    # se False, os workers compartilham o socket aberto antes do fork
+    reuse_port: bool = False
+    backlog: int = 2048
+    # Tempo (s) para os workers terminarem as requisições em andamento no SIGTERM
+    graceful_timeout: float = 30.0
+    # Implementações do uvicorn; "auto" usa uvloop/httptools quando instalados
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto"
+    http: Literal["auto", "h11", "httptools"] = "auto"
+    # Intervalo (s) com que cada worker publica suas métricas para o /metrics combinado
+    metrics_interval: float = 5.0
+    # Log de acesso do uvicorn (uma linha por requisição)
+    access_log: bool = True
+
+    @field_validator('workers')
+    def workers_not_negative(cls, v):
+        if v < 0:
+            raise ValueError('workers must be >= 0')
+        return v
 
 class CorsConfig(BaseModel):
     allow_origins: List[str]
@@ -52,8 +336,148 @@ class CorsConfig(BaseModel):
 class LoggingConfig(BaseModel):
     level: str = "INFO"
     format: str = "%(asctime)s - %(levelname)s - %(message)s"
+    # Uma linha JSON por log (com os campos dos eventos por requisição)
+    json_format: bool = False
+    # Fração das requisições cujos logs (abaixo de ERROR) são registrados
+    sample_rate: float = 1.0
+
+    @field_validator('sample_rate')
+    def sample_rate_in_range(cls, v):
+        if not 0 <= v <= 1:
+            raise ValueError('sample_rate must be between 0 and 1')
+        return v
+class HealthCheckSettings(BaseModel):
+    # Máximo de verificações ativas simultâneas (todos os serviços)
+    max_concurrency: int = 10
+
+class PrewarmSettings(BaseModel):
+    # Espera os pools aquecerem no startup (até startup_timeout) antes de aceitar tráfego
+    wait_on_startup: bool = True
+    startup_timeout: float = 10.0
+    # Máximo de aquecimentos simultâneos (todos os serviços)
+    max_concurrency: int = 10
+
+class BodyBufferSettings(BaseModel):
+    # Diretório dos arquivos temporários dos corpos grandes; None = padrão do sistema
+    spool_dir: str | None = None
+
+class RetryBudgetConfig(BaseModel):
+    # Tokens depositados por requisição e por segundo; cada retry consome 1
+    ratio: float = 0.2
+    min_per_second: float = 5.0
+    max_tokens: float = 100.0
+
+class DeadlineConfig(BaseModel):
+    # Header com o tempo (ms) que o cliente ainda aceita esperar
+    header: str = "x-request-timeout-ms"
+    # Repassa o tempo restante ao upstream no mesmo header
+    propagate: bool = True
+    # Maior prazo aceito do cliente (s)
+    max_timeout: float = 300.0
+
+    @field_validator('header')
+    def header_to_lower(cls, v):
+        return v.lower()
+
+class RateLimitConfig(BaseModel):
+    # "local" (memória do processo) ou "redis" (compartilhado entre réplicas)
+    backend: Literal["local", "redis"] = "local"
+    redis_url: str = "redis://localhost:6379/0"
+    # Máximo de chaves mantidas pelo backend local (LRU)
+    max_keys: int = 100000
+    # Limites globais (todos os serviços)
+    per_api_key: RateLimitRule | None = None
+    per_client_ip: RateLimitRule | None = None
+
+class APIKeyStoreConfig(BaseModel):
+    # Arquivo com uma chave por linha: "<sha256 hex da chave> <metadados JSON opcionais>"
+    path: str | None = None
+    # Intervalo (s) para recarregar o arquivo quando ele muda; 0 desativa
+    reload_interval: float = 30.0
+
+class ConfigReloadConfig(BaseModel):
+    # Recarrega `services` dos YAMLs quando os arquivos mudam, sem restart
+    enabled: bool = False
+    interval: float = 5.0
+
+class TracingConfig(BaseModel):
+    # Trace context W3C (traceparent) e spans das etapas do gateway
+    enabled: bool = False
+    # Fração das requisições novas que geram spans (amostragem na entrada)
+    sample_rate: float = 0.01
+    # Com traceparent do cliente, segue a decisão de amostragem dele
+    parent_based: bool = True
+    # Header do request ID: repassado ao upstream e devolvido na resposta (gerado se ausente)
+    request_id_header: str = "x-request-id"
+    # Header Server-Timing na resposta (gateway x upstream); independe de `enabled`
+    server_timing: bool = False
+    # "otlp" (coletor OpenTelemetry via HTTP/JSON), "file" (JSON por linha) ou "memory"
+    exporter: Literal["otlp", "file", "memory"] = "otlp"
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    otlp_headers: Dict[str, str] = {}
+    file_path: str = "traces.jsonl"
+    service_name: str = "api-gateway"
+    # Spans por lote, máximo na fila (o excedente é descartado) e intervalo (s) entre envios
+    batch_size: int = 512
+    max_queue_size: int = 8192
+    export_interval: float = 5.0
+    export_timeout: float = 10.0
+
+    @field_validator('sample_rate')
+    def tracing_sample_rate_in_range(cls, v):
+        if not 0 <= v <= 1:
+            raise ValueError('sample_rate must be between 0 and 1')
+        return v
+
+    @field_validator('request_id_header')
+    def request_id_header_to_lower(cls, v):
+        return v.lower()
+
+class BatchItemConfig(BaseModel):
+    """Sub-requisição de um batch ou de uma composição"""
+    # Identificador do item na resposta combinada (padrão: posição na lista)
+    id: str | None = None
+    service: str
+    path: str = ""
+    method: str = "GET"
+    query: Dict[str, str] = {}
+    headers: Dict[str, str] = {}
+    # Corpo enviado como JSON
+    body: Any = None
+    # Timeout (s) do item; sem valor usa o do batch/composição
+    timeout: float | None = None
+
+    @field_validator('method')
+    def method_to_upper(cls, v):
+        return v.upper()
+
+    @field_validator('timeout')
+    def item_timeout_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('timeout must be positive')
+        return v
+
+class CompositionConfig(BaseModel):
+    # Sub-requisições; path, query e headers aceitam {parâmetros} da query string
+    requests: List[BatchItemConfig]
+    timeout: float | None = None
+
+class BatchConfig(BaseModel):
+    # Máximo de sub-requisições por batch
+    max_items: int = 20
+    # Timeout (s) padrão de cada sub-requisição
+    timeout: float = 10.0
+    # Soma dos corpos das sub-respostas (bytes); os itens que não cabem viram erro 413
+    max_response_bytes: int = 10 * 1024 * 1024
+    # Composições nomeadas: GET {api_prefix}/_batch/<nome>
+    compositions: Dict[str, CompositionConfig] = {}
+
 class InternalNetworkConfig(BaseModel):
     ranges: List[str]
+    # Proxies cujo X-Forwarded-For é considerado para obter o IP do cliente
+    trusted_proxies: List[str] = []
+    # Tamanho do cache LRU de IPs já verificados
+    cache_size: int = 4096
 
 class Settings(BaseSettings):
     app: AppConfig
@@ -64,8 +488,18 @@ class Settings(BaseSettings):
     internal_network: InternalNetworkConfig   
     # Suas configurações existentes...
     api_keys: List[str] = []
+    api_key_store: APIKeyStoreConfig = APIKeyStoreConfig()
     mtls: MTLSSettings
     performance: PerformanceConfig = PerformanceConfig() 
+    health_checks: HealthCheckSettings = HealthCheckSettings()
+    prewarm: PrewarmSettings = PrewarmSettings()
+    body_buffer: BodyBufferSettings = BodyBufferSettings()
+    retry_budget: RetryBudgetConfig = RetryBudgetConfig()
+    deadline: DeadlineConfig = DeadlineConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    config_reload: ConfigReloadConfig = ConfigReloadConfig()
+    batch: BatchConfig = BatchConfig()
+    tracing: TracingConfig = TracingConfig()
     
     @property
     def PROJECT_NAME(self) -> str:
@@ -83,8 +517,14 @@ class Settings(BaseSettings):
         """Configure logging based on settings"""
         logging.basicConfig(
             level=getattr(logging, self.logging.level.upper()),
-            format=self.logging.format
+            format=self.logging.format,
+            # Substitui o handler padrão criado por algum log emitido antes
+            force=True
         )
+        if self.logging.json_format:
+            from src.app.core.logs import JsonFormatter
+            for handler in logging.getLogger().handlers:
+                handler.setFormatter(JsonFormatter())
 
     # @classmethod
     # def load_config(cls) -> Dict[str, Any]:
@@ -116,29 +556,70 @@ class Settings(BaseSettings):
 
 
 
-    @classmethod
-    def load_config(cls) -> Dict[str, Any]:
+    @staticmethod
+    def environment() -> str:
         # Forçar o ambiente como development se não estiver explicitamente definido como production
         env = os.environ.get("APP_ENV", "development")
-        if env != "production":
-            env = "development"
+        return env if env == "production" else "development"
+
+    @classmethod
+    def config_files(cls) -> List[Path]:
+        """
+        Arquivos YAML lidos por load_config (base + ambiente), mais o arquivo
+        opcional de APP_CONFIG_FILE, aplicado por último (ex.: benchmarks)
+        """
+        config_path = Path(__file__).parent / "environments"
+        files = [config_path / "base.yaml", config_path / f"{cls.environment()}.yaml"]
+        override = os.environ.get("APP_CONFIG_FILE")
+        if override:
+            files.append(Path(override))
+        return files
+
+    @classmethod
+    def config_fingerprint(cls) -> List[List[Any]]:
+        """Identifica o conteúdo dos YAMLs (caminho, mtime, tamanho, inode) sem lê-los"""
+        fingerprint: List[List[Any]] = []
+        for path in cls.config_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                fingerprint.append([str(path), None])
+                continue
+            fingerprint.append([str(path), stat.st_mtime_ns, stat.st_size, stat.st_ino])
+        return fingerprint
+
+    @classmethod
+    def load_config(cls) -> Dict[str, Any]:
+        env = cls.environment()
         
         logging.info(f"Loading configuration for environment: {env}")
-        config_path = Path(__file__).parent / "environments"
+        # Com APP_CONFIG_SNAPSHOT, a configuração já mesclada fica em um JSON
+        # reaproveitado enquanto os YAMLs não mudam
+        snapshot_path = os.environ.get("APP_CONFIG_SNAPSHOT")
+        fingerprint = None
+        if snapshot_path:
+            fingerprint = json.dumps(cls.config_fingerprint())
+            config = _read_snapshot(Path(snapshot_path), fingerprint)
+            if config is not None:
+                return config
+
+        base_file, *env_files = cls.config_files()
         
         # Carrega configurações base
-        with open(config_path / "base.yaml") as f:
-            config = yaml.safe_load(f)
+        with open(base_file) as f:
+            config = yaml.load(f, Loader=_YAML_LOADER)
             
-        # Carrega configurações do ambiente
-        env_file = config_path / f"{env}.yaml"
-        if env_file.exists():
-            with open(env_file) as f:
-                env_config = yaml.safe_load(f)
-                if env_config:
-                    config = deep_merge(config, env_config)
-                    logging.info(f"Loaded environment config: {env_config}")
-                
+        # Carrega configurações do ambiente (e o arquivo de APP_CONFIG_FILE)
+        for env_file in env_files:
+            if env_file.exists():
+                with open(env_file) as f:
+                    env_config = yaml.load(f, Loader=_YAML_LOADER)
+                    if env_config:
+                        config = deep_merge(config, env_config)
+                        logging.info(f"Loaded config file: {env_file}")
+
+        if snapshot_path:
+            _write_snapshot(Path(snapshot_path), fingerprint, config)
         return config
 
     
@@ -158,11 +639,32 @@ def deep_merge(base_dict: dict, update_dict: dict) -> dict:
             
     return merged
 
+def _read_snapshot(path: Path, fingerprint: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("fingerprint") != fingerprint:
+        return None
+    return snapshot["config"]
+
+def _write_snapshot(path: Path, fingerprint: str, config: Dict[str, Any]) -> None:
+    # Escrita atômica: vários processos podem iniciar ao mesmo tempo
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"fingerprint": fingerprint, "config": config}, f, default=str)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning(f"Could not write configuration snapshot {path}: {e}")
+        tmp.unlink(missing_ok=True)
+
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Configurações lidas e validadas uma única vez por processo"""
     config = Settings.load_config()
-    settings = Settings(**config)
-    logging.debug(f"Loaded services configuration: {settings.services}")
-    return settings
+    return Settings(**config)
 
 # Instância das configurações
 settings = get_settings()
\ No newline at end of file
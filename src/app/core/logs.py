@@ -0,0 +1,94 @@
+from typing import Any, Dict, Mapping
+import json
+import logging
+import random
+
+from starlette.types import Scope
+
+from src.app.core.tracing import TRACE_SCOPE_KEY
+
+# Decisão de amostragem dos logs da requisição, guardada no scope ASGI
+LOG_SAMPLED_SCOPE_KEY = "gateway.log_sampled"
+
+# Headers cujos valores nunca vão para os logs
+SENSITIVE_HEADERS = frozenset({"x-api-key", "authorization", "proxy-authorization", "cookie", "set-cookie"})
+
+
+def redact_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    return {
+        name: "***" if name.lower() in SENSITIVE_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+class _Fields:
+    """Campos de um evento, formatados como `chave=valor` só quando o handler emite o log"""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{name}={value}" for name, value in self.fields.items())
+
+
+class RequestLog:
+    """
+    Logs por requisição do caminho do proxy.
+
+    Quem chama verifica `enabled(level, scope)` antes de montar os campos, então
+    com o nível desligado (ou fora da amostra) o log não custa alocações. Abaixo
+    de ERROR, só uma fração `sample_rate` das requisições é registrada: a
+    decisão é tomada uma vez por requisição (todas as linhas dela entram ou
+    nenhuma) e vem do trace ID quando há trace, então é a mesma em todos os
+    serviços que compartilham o trace. Os campos vão em `extra` para
+    formatadores estruturados (ver JsonFormatter).
+    """
+
+    __slots__ = ("logger", "sample_rate")
+
+    def __init__(self, logger: logging.Logger, sample_rate: float = 1.0):
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    def enabled(self, level: int, scope: Scope) -> bool:
+        if not self.logger.isEnabledFor(level):
+            return False
+        return level >= logging.ERROR or self.sample_rate >= 1.0 or self.sampled(scope)
+
+    def sampled(self, scope: Scope) -> bool:
+        """Se a requisição está na amostra (decidido na primeira consulta)"""
+        decision = scope.get(LOG_SAMPLED_SCOPE_KEY)
+        if decision is None:
+            trace = scope.get(TRACE_SCOPE_KEY)
+            if trace is not None:
+                # 64 bits menos significativos do trace ID (aleatórios no W3C Trace Context)
+                position = int(trace.trace_id[16:], 16) / 2 ** 64
+            else:
+                position = random.random()
+            decision = scope[LOG_SAMPLED_SCOPE_KEY] = position < self.sample_rate
+        return decision
+
+    def emit(self, level: int, event: str, **fields: Any) -> None:
+        self.logger.log(level, "%s %s", event, _Fields(fields), extra={"event": event, "fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, incluindo os campos dos eventos de RequestLog"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        event = getattr(record, "event", None)
+        if event is not None:
+            data["event"] = event
+            data.update(record.fields)
+        else:
+            data["message"] = record.getMessage()
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
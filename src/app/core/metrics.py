@@ -0,0 +1,257 @@
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import asyncio
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+# Variável de ambiente com o diretório das métricas dos workers (ver src/app/server.py)
+METRICS_DIR_ENV = "GATEWAY_METRICS_DIR"
+
+# (nome, tipo, help, [(labels, valor)])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico por combinação de labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos. `observe` faz apenas um bisect e alguns
+    incrementos; as contagens acumuladas são calculadas só na exportação.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(series.sum)}"
+            yield f"{self.name}_count{label_text} {series.count}"
+
+
+class MetricsRegistry:
+    """Registro de métricas exportadas no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(name, Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(name, Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, name: str, metric):
+        existing = self._metrics.get(name)
+        if existing is not None:
+            return existing
+        self._metrics[name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Registra uma função chamada na exportação (para gauges calculados sob demanda)"""
+        self._collectors.append(collector)
+
+    def _collect(self) -> Iterable[Sample]:
+        for collector in self._collectors:
+            try:
+                yield from list(collector())
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {e}")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for name, metric_type, documentation, samples in self._collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def dump(self) -> Dict[str, Any]:
+        """Estado das métricas em formato JSON, para agregação entre processos"""
+        counters, histograms = [], []
+        for metric in self._metrics.values():
+            if isinstance(metric, Counter):
+                counters.append([metric.name, metric.documentation, metric.labelnames,
+                                 [[labels, value] for labels, value in metric._values.items()]])
+            elif isinstance(metric, Histogram):
+                histograms.append([metric.name, metric.documentation, metric.labelnames, metric.buckets,
+                                   [[labels, s.counts, s.sum, s.count] for labels, s in metric._series.items()]])
+        return {"counters": counters, "histograms": histograms, "samples": list(self._collect())}
+
+
+def merge_dumps(dumps: Dict[str, Dict[str, Any]]) -> MetricsRegistry:
+    """
+    Junta as métricas de vários workers ({id do worker: dump}): contadores e
+    histogramas são somados; gauges ganham o label `worker`.
+    """
+    merged = MetricsRegistry()
+    samples: Dict[str, Tuple[str, str, Dict[Tuple, Tuple[Dict[str, str], float]]]] = {}
+    for worker, dump in dumps.items():
+        for name, documentation, labelnames, values in dump["counters"]:
+            counter = merged.counter(name, documentation, labelnames)
+            for labels, value in values:
+                counter.inc(tuple(labels), value)
+        for name, documentation, labelnames, buckets, series in dump["histograms"]:
+            histogram = merged.histogram(name, documentation, labelnames, buckets)
+            for labels, counts, total, count in series:
+                target = histogram._series.get(tuple(labels))
+                if target is None:
+                    target = histogram._series[tuple(labels)] = _HistogramSeries(len(counts))
+                target.counts = [a + b for a, b in zip(target.counts, counts)]
+                target.sum += total
+                target.count += count
+        for name, metric_type, documentation, values in dump["samples"]:
+            _, _, merged_values = samples.setdefault(name, (metric_type, documentation, {}))
+            for labels, value in values:
+                if metric_type == "gauge":
+                    labels = {**labels, "worker": worker}
+                key = tuple(sorted(labels.items()))
+                previous = merged_values.get(key)
+                merged_values[key] = (labels, value + (previous[1] if previous else 0))
+    merged.register_collector(lambda: [
+        (name, metric_type, documentation, list(values.values()))
+        for name, (metric_type, documentation, values) in samples.items()
+    ])
+    return merged
+
+
+class SharedMetrics:
+    """
+    Visão combinada das métricas de vários workers (processos). Cada worker
+    grava periodicamente seu dump em `directory/<pid>.json`; o /metrics de
+    qualquer worker lê e soma todos os arquivos.
+    """
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+
+    def _path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def write(self, dump: Dict[str, Any]) -> None:
+        path = self._path(os.getpid())
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(dump))
+        os.replace(temporary, path)
+
+    async def run(self) -> None:
+        """Tarefa de background do worker que mantém seu arquivo atualizado"""
+        while True:
+            try:
+                # O dump é feito no event loop (sem concorrência com as atualizações); o I/O numa thread
+                await asyncio.to_thread(self.write, self.registry.dump())
+            except Exception as e:
+                logger.error(f"Error writing worker metrics: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _render(self, dump: Dict[str, Any]) -> str:
+        self.write(dump)
+        dumps: Dict[str, Dict[str, Any]] = {}
+        for path in self.directory.glob("*.json"):
+            try:
+                dumps[path.stem] = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+        return merge_dumps(dumps).render()
+
+    async def render(self) -> str:
+        """Métricas de todos os workers, com as deste atualizadas no momento"""
+        return await asyncio.to_thread(self._render, self.registry.dump())
+
+
+metrics = MetricsRegistry()
@@ -1,11 +1,154 @@
 from fastapi import Security, HTTPException, Depends
 from fastapi.security.api_key import APIKeyHeader
 from starlette.status import HTTP_403_FORBIDDEN
-from typing import Optional
-from src.app.core.config.settings import settings
+from typing import Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+from pydantic import BaseModel
+import asyncio
+import hashlib
+import sys
+import threading
+import logging
+from src.app.core.config.settings import settings, APIKeyStoreConfig, RateLimitRule
+
+logger = logging.getLogger(__name__)
 
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+
+def hash_api_key(api_key: str) -> str:
+    """SHA-256 (hex) da chave; as chaves nunca ficam em claro no store"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class APIKeyInfo(BaseModel):
+    tenant: str = "default"
+    # Serviços que a chave pode acessar; vazio = todos
+    services: List[str] = []
+    # Limite de taxa próprio da chave (substitui rate_limit.per_api_key)
+    rate_limit: RateLimitRule | None = None
+    enabled: bool = True
+
+    def allows(self, service: str) -> bool:
+        return self.enabled and (not self.services or service in self.services)
+
+
+_DEFAULT_INFO = APIKeyInfo()
+
+# hash -> metadados JSON; os metadados só são validados na primeira consulta
+_Keys = Dict[str, str]
+
+
+class APIKeyStore:
+    """
+    Chaves de API indexadas pelo hash SHA-256 (busca O(1) em dict).
+
+    A busca no dict não é em tempo constante, mas compara apenas hashes: o
+    tempo pode revelar algo sobre o hash da chave enviada, nunca sobre as
+    chaves guardadas, que não podem ser obtidas a partir do hash.
+
+    O arquivo só é quebrado em linhas na carga; o JSON de metadados de cada
+    chave é validado na primeira vez que ela é usada, então arquivos com
+    centenas de milhares de chaves carregam rápido. A recarga monta um novo
+    dict e o troca de uma vez, sem bloquear as consultas.
+    """
+
+    def __init__(self, config: APIKeyStoreConfig, plaintext_keys: Iterable[str] = ()):
+        self.config = config
+        self._plaintext_digests = [hash_api_key(key) for key in plaintext_keys]
+        self._state: Optional[Tuple[_Keys, Dict[str, APIKeyInfo]]] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def _file_fingerprint(self) -> Optional[Tuple]:
+        if not self.config.path:
+            return None
+        stat = Path(self.config.path).stat()
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _read(self) -> _Keys:
+        keys: _Keys = {digest: "" for digest in self._plaintext_digests}
+        if not self.config.path:
+            return keys
+        with open(self.config.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                digest, _, metadata = line.strip().partition(" ")
+                if not digest or digest.startswith("#"):
+                    continue
+                if len(digest) != 64:
+                    logger.warning(f"Ignoring invalid API key hash at {self.config.path}:{number}")
+                    continue
+                keys[digest.lower()] = metadata
+        return keys
+
+    def load(self) -> None:
+        """(Re)carrega as chaves do arquivo e de `api_keys`"""
+        with self._lock:
+            try:
+                fingerprint = self._file_fingerprint()
+                keys = self._read()
+            except OSError as e:
+                # Mantém as chaves atuais; sem carga anterior só valem as de `api_keys`
+                logger.error(f"Error loading API keys from {self.config.path}: {e}")
+                if self._state is None:
+                    self._state = ({digest: "" for digest in self._plaintext_digests}, {})
+                return
+            self._state, self._fingerprint = (keys, {}), fingerprint
+        logger.info(f"Loaded {len(keys)} API keys")
+
+    def reload_if_changed(self) -> bool:
+        """Recarrega se o arquivo mudou (mtime/tamanho/inode); retorna True se recarregou"""
+        if not self.config.path:
+            return False
+        try:
+            changed = self._file_fingerprint() != self._fingerprint
+        except OSError:
+            return False
+        if changed:
+            self.load()
+            return True
+        return False
+
+    async def watch(self) -> None:
+        """Tarefa de background que recarrega o arquivo quando ele muda"""
+        while True:
+            await asyncio.sleep(self.config.reload_interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                logger.error(f"Error reloading API keys: {e}")
+
+    def lookup(self, api_key: Optional[str]) -> Optional[APIKeyInfo]:
+        if not api_key:
+            return None
+        if self._state is None:
+            self.load()
+        keys, parsed = self._state
+        digest = hash_api_key(api_key)
+        metadata = keys.get(digest)
+        if metadata is None:
+            return None
+        info = parsed.get(digest)
+        if info is None:
+            try:
+                info = APIKeyInfo.model_validate_json(metadata) if metadata else _DEFAULT_INFO
+            except ValueError as e:
+                logger.error(f"Invalid metadata for API key of hash {digest[:12]}: {e}")
+                info = APIKeyInfo(enabled=False)
+            parsed[digest] = info
+        return info
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    def __len__(self) -> int:
+        return len(self._state[0]) if self._state is not None else 0
+
+
+api_key_store = APIKeyStore(settings.api_key_store, settings.api_keys)
+
+
 async def get_api_key(
     api_key_header: Optional[str] = Security(API_KEY_HEADER)
 ) -> str:
@@ -13,8 +156,14 @@ async def get_api_key(
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN, detail="No API key provided"
         )
-    if api_key_header not in settings.api_keys:
+    info = api_key_store.lookup(api_key_header)
+    if info is None or not info.enabled:
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN, detail="Invalid API key"
         )
-    return api_key_header
\ No newline at end of file
+    return api_key_header
+
+
+if __name__ == "__main__":
+    # Gera a linha do arquivo de chaves: python -m src.app.core.security.api_key <chave> [metadados JSON]
+    print(" ".join([hash_api_key(sys.argv[1]), *sys.argv[2:3]]))
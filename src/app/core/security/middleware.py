@@ -1,25 +1,85 @@
-from fastapi import Request
+from typing import Iterable, Optional
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from ipaddress import ip_address, ip_network
+from starlette.types import ASGIApp, Receive, Scope, Send
 import logging
 
+from src.app.core.security.networks import CIDRMatcher, VerdictCache
+
 logger = logging.getLogger(__name__)
 
-class InternalNetworkMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, internal_ranges):
-        super().__init__(app)
-        self.internal_ranges = [ip_network(cidr.strip()) for cidr in internal_ranges]
+# Chave do scope ASGI com o IP real do cliente (após X-Forwarded-For)
+CLIENT_IP_SCOPE_KEY = "gateway.client_ip"
+
+
+class InternalNetworkMiddleware:
+    """
+    Middleware ASGI que só permite requisições vindas das redes internas.
+
+    Quando o cliente direto é um proxy confiável (`trusted_proxies`), o IP
+    real é obtido do header X-Forwarded-For.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        internal_ranges: Iterable[str],
+        trusted_proxies: Iterable[str] = (),
+        cache_size: int = 4096,
+    ):
+        self.app = app
+        self.internal_ranges = CIDRMatcher(internal_ranges)
+        self.trusted_proxies = CIDRMatcher(trusted_proxies)
+        self._verdicts = VerdictCache(cache_size)
+
+    def _client_ip(self, scope: Scope) -> Optional[str]:
+        client = scope.get("client")
+        client_ip = client[0] if client else None
+        if client_ip is None or not self.trusted_proxies or not self.trusted_proxies.contains(client_ip):
+            return client_ip
 
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        logger.debug(f"Client IP: {client_ip}")
-        
-        if not any(ip_address(client_ip) in cidr for cidr in self.internal_ranges):
+        forwarded = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                forwarded = value if forwarded is None else forwarded + b"," + value
+        if forwarded is None:
+            return client_ip
+
+        # Percorre da direita para a esquerda ignorando os proxies confiáveis
+        for hop in reversed(forwarded.decode("latin-1").split(",")):
+            hop = hop.strip()
+            if hop and not self.trusted_proxies.contains(hop):
+                return hop
+        return client_ip
+
+    def is_allowed(self, client_ip: Optional[str]) -> bool:
+        if client_ip is None:
+            return False
+        verdict = self._verdicts.get(client_ip)
+        if verdict is None:
+            verdict = self.internal_ranges.contains(client_ip)
+            self._verdicts.set(client_ip, verdict)
+        return verdict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = self._client_ip(scope)
+        scope[CLIENT_IP_SCOPE_KEY] = client_ip
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Client IP: {client_ip}")
+
+        if not self.is_allowed(client_ip):
             logger.warning(f"Access denied for IP: {client_ip}")
-            return JSONResponse(
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1008})
+                return
+            response = JSONResponse(
                 status_code=403,
                 content={"detail": "Access denied"}
             )
-        
-        return await call_next(request)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -1,11 +1,45 @@
-from typing import Optional
+from typing import Optional, Dict, Tuple
 import ssl
+import threading
 from pathlib import Path
 import logging
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    SSLContext cliente que reaproveita sessões TLS por hostname.
+
+    O httpcore (via anyio) cria as conexões com ``wrap_bio`` sem informar
+    ``session``; aqui guardamos a última conexão de cada host e reutilizamos a
+    sessão negociada por ela, evitando o handshake completo nas próximas.
+    """
+
+    def __new__(cls, protocol: int = ssl.PROTOCOL_TLS_CLIENT, *args, **kwargs):
+        return super().__new__(cls, protocol, *args, **kwargs)
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT, *args, **kwargs):
+        self._sessions: Dict[Optional[str], ssl.SSLSession] = {}
+        self._last_objects: Dict[Optional[str], ssl.SSLObject] = {}
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if server_side:
+            return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+        sessions, last_objects = self._sessions, self._last_objects
+        previous = last_objects.get(server_hostname)
+        if previous is not None and previous.session is not None:
+            sessions[server_hostname] = previous.session
+        if session is None:
+            session = sessions.get(server_hostname)
+
+        ssl_object = super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+        last_objects[server_hostname] = ssl_object
+        return ssl_object
+
+
 class MTLSConfig:
     def __init__(
         self,
@@ -16,29 +50,70 @@ class MTLSConfig:
         self.cert_path = cert_path
         self.key_path = key_path
         self.ca_path = ca_path
-        
+        self._context: Optional[ssl.SSLContext] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def _files_fingerprint(self) -> Tuple:
+        return tuple(
+            (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            for stat in (Path(p).stat() for p in (self.cert_path, self.key_path, self.ca_path))
+        )
+
     def create_ssl_context(self) -> ssl.SSLContext:
+        """Cria um novo SSLContext a partir dos arquivos (sempre lê o disco)"""
         try:
-            context = ssl.create_default_context(
-                purpose=ssl.Purpose.SERVER_AUTH,
-                cafile=str(self.ca_path)
-            )
-            
+            context = ResumingSSLContext()
+            context.load_verify_locations(cafile=str(self.ca_path))
+
             # Configurar certificado e chave do cliente
             context.load_cert_chain(
                 certfile=str(self.cert_path),
                 keyfile=str(self.key_path)
             )
-            
+
             # Forçar verificação do certificado
             context.verify_mode = ssl.CERT_REQUIRED
             # Verificar hostname
             context.check_hostname = True
-            
+
             return context
         except Exception as e:
             logger.error(f"Error creating SSL context: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail="Failed to initialize mTLS configuration"
-            )
\ No newline at end of file
+            )
+
+    def get_ssl_context(self) -> ssl.SSLContext:
+        """Retorna o SSLContext compartilhado, criando-o na primeira chamada"""
+        context = self._context
+        if context is None:
+            with self._lock:
+                if self._context is None:
+                    self._fingerprint = self._files_fingerprint()
+                    self._context = self.create_ssl_context()
+                context = self._context
+        return context
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recria o SSLContext se algum dos arquivos de certificado mudou.
+        Retorna True quando um novo contexto foi criado.
+        """
+        if self._context is None:
+            return False
+        try:
+            fingerprint = self._files_fingerprint()
+        except OSError as e:
+            logger.warning(f"Could not stat mTLS certificate files: {e}")
+            return False
+        if fingerprint == self._fingerprint:
+            return False
+
+        with self._lock:
+            context = self.create_ssl_context()
+            self._context = context
+            self._fingerprint = fingerprint
+        logger.info("mTLS certificate files changed, SSL context reloaded")
+        return True
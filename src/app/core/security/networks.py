@@ -0,0 +1,76 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from ipaddress import ip_address, ip_network
+from typing import Iterable, List, Optional, Tuple
+
+
+class CIDRMatcher:
+    """
+    Verifica se um IP pertence a algum dos ranges CIDR configurados.
+
+    Os ranges são convertidos em intervalos inteiros, mesclados e ordenados
+    (um conjunto por família de endereço), e a busca é feita com bisect:
+    O(log n) por consulta, independentemente da quantidade de ranges.
+    """
+
+    def __init__(self, cidrs: Iterable[str]):
+        intervals = {4: [], 6: []}
+        for cidr in cidrs:
+            network = ip_network(cidr.strip(), strict=False)
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+        self._starts = {}
+        self._ends = {}
+        for version, ranges in intervals.items():
+            merged = self._merge(ranges)
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    @staticmethod
+    def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def __bool__(self) -> bool:
+        return bool(self._starts[4] or self._starts[6])
+
+    def contains(self, ip: str) -> bool:
+        try:
+            address = ip_address(ip)
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        starts = self._starts[address.version]
+        value = int(address)
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= self._ends[address.version][index]
+
+
+class VerdictCache:
+    """LRU limitado de IP -> resultado da verificação."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, bool]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bool]:
+        verdict = self._data.get(key)
+        if verdict is not None:
+            self._data.move_to_end(key)
+        return verdict
+
+    def set(self, key: str, verdict: bool) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = verdict
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import time
+import logging
+
+from src.app.core.config.settings import RateLimitConfig, RateLimitRule, ServiceLimitsConfig
+from src.app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = metrics.counter(
+    "gateway_rate_limited_total",
+    "Requests rejected by rate or concurrency limits",
+    ("service", "limit"),
+)
+
+
+class RateLimitExceeded(Exception):
+    """Requisição recusada por um limite de taxa."""
+
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded ({limit})")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class LocalRateLimitBackend:
+    """
+    GCRA (generic cell rate algorithm) em memória: guarda por chave apenas o
+    instante teórico da próxima chegada (TAT), com atualização O(1).
+
+    As chaves ficam num LRU limitado a `max_keys`; uma chave cujo TAT já
+    passou equivale a uma chave ausente, então descartar as menos usadas não
+    afrouxa o limite de quem está ativo.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def check(self, key: str, rate: float, burst: int, now: Optional[float] = None) -> float:
+        """Consome uma requisição; retorna 0 se permitida ou os segundos até a próxima"""
+        if now is None:
+            now = time.monotonic()
+        interval = 1.0 / rate
+        tats = self._tats
+        tat = tats.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + interval
+        allow_at = new_tat - burst * interval
+        if now < allow_at:
+            return allow_at - now
+        tats[key] = new_tat
+        tats.move_to_end(key)
+        if len(tats) > self.max_keys:
+            tats.popitem(last=False)
+        return 0.0
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        return self.check(key, rate, burst)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# GCRA atômico no Redis, usando o relógio do servidor para que todas as
+# réplicas do gateway vejam o mesmo tempo
+_GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if now < allow_at then return math.ceil(allow_at - now) end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return 0
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Backend compartilhado entre réplicas (requer o pacote `redis`).
+
+    Se o Redis estiver indisponível a requisição é permitida (fail open) para
+    que uma falha do Redis não derrube o gateway.
+    """
+
+    def __init__(self, url: str, prefix: str = "gateway:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("rate_limit.backend 'redis' requires the 'redis' package") from e
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_GCRA_SCRIPT)
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        try:
+            wait_ms = await self._script(keys=[self.prefix + key], args=[1000.0 / rate, burst])
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+        return float(wait_ms) / 1000
+
+    def __len__(self) -> int:
+        return 0
+
+
+def _digest(value: str) -> str:
+    # Evita manter (ou enviar ao Redis) API keys em claro
+    return hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+
+
+class RateLimiter:
+    """
+    Aplica os limites de taxa de uma requisição: por IP do cliente, por API
+    key e por serviço (nessa ordem, do mais específico para o mais geral,
+    para que um cliente já limitado não consuma a cota do serviço).
+    """
+
+    def __init__(self, config: RateLimitConfig, backend: Any = None):
+        self.config = config
+        if backend is None:
+            if config.backend == "redis":
+                backend = RedisRateLimitBackend(config.redis_url)
+            else:
+                backend = LocalRateLimitBackend(config.max_keys)
+        self.backend = backend
+
+    def _rules(
+        self,
+        service: str,
+        limits: ServiceLimitsConfig,
+        api_key: Optional[str],
+        client_ip: Optional[str],
+        key_rule: Optional[RateLimitRule] = None,
+    ) -> List[Tuple[str, str, RateLimitRule]]:
+        rules = []
+        if client_ip is not None:
+            if self.config.per_client_ip is not None:
+                rules.append(("client_ip", f"ip:{client_ip}", self.config.per_client_ip))
+            if limits.per_client_ip is not None:
+                rules.append(("client_ip", f"svc:{service}:ip:{client_ip}", limits.per_client_ip))
+        if api_key:
+            key = _digest(api_key)
+            key_rule = key_rule or self.config.per_api_key
+            if key_rule is not None:
+                rules.append(("api_key", f"key:{key}", key_rule))
+            if limits.per_api_key is not None:
+                rules.append(("api_key", f"svc:{service}:key:{key}", limits.per_api_key))
+        if limits.rate is not None:
+            rules.append(("service", f"svc:{service}", limits.rate))
+        return rules
+
+    async def check(
+        self,
+        service: str,
+        limits: ServiceLimitsConfig,
+        api_key: Optional[str],
+        client_ip: Optional[str],
+        key_rule: Optional[RateLimitRule] = None,
+    ) -> None:
+        """
+        Levanta RateLimitExceeded no primeiro limite estourado. `api_key` deve
+        ser uma chave já autenticada (qualquer outro valor criaria um bucket
+        novo a cada requisição); `key_rule` é o limite próprio dela, que
+        substitui o `per_api_key` global.
+        """
+        for limit, key, rule in self._rules(service, limits, api_key, client_ip, key_rule):
+            retry_after = await self.backend.acquire(key, rule.rate, rule.burst)
+            if retry_after > 0:
+                RATE_LIMITED.inc((service, limit))
+                raise RateLimitExceeded(limit, retry_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"backend": self.config.backend, "tracked_keys": len(self.backend)}
+
+
+class ConcurrencyPermit:
+    """Vaga de um ConcurrencyLimiter; `release` pode ser chamado mais de uma vez."""
+
+    __slots__ = ("_limiter",)
+
+    def __init__(self, limiter: "ConcurrencyLimiter"):
+        self._limiter = limiter
+
+    def release(self) -> None:
+        limiter, self._limiter = self._limiter, None
+        if limiter is not None:
+            limiter.in_flight -= 1
+
+
+class ConcurrencyLimiter:
+    """Limite de requisições em andamento de um serviço, sem fila: quem excede é recusado."""
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> Optional[ConcurrencyPermit]:
+        if self.in_flight >= self.max_concurrent:
+            self.rejected += 1
+            return None
+        self.in_flight += 1
+        return ConcurrencyPermit(self)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,137 @@
+from typing import Optional
+import time
+import logging
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Chave do scope ASGI onde a medição da requisição fica disponível para o proxy
+TIMING_SCOPE_KEY = "gateway.timing"
+
+REQUEST_DURATION = metrics.histogram(
+    "gateway_request_duration_seconds",
+    "Total time spent handling the request in the gateway",
+    ("service", "route", "status"),
+)
+POOL_WAIT = metrics.histogram(
+    "gateway_upstream_pool_wait_seconds",
+    "Time waiting for an upstream connection from the pool",
+    ("service",),
+)
+UPSTREAM_CONNECT = metrics.histogram(
+    "gateway_upstream_connect_seconds",
+    "Time to open a new upstream connection (TCP + TLS)",
+    ("service",),
+)
+UPSTREAM_TTFB = metrics.histogram(
+    "gateway_upstream_ttfb_seconds",
+    "Time from sending the upstream request to receiving the response headers",
+    ("service", "route", "status"),
+)
+UPSTREAM_BODY = metrics.histogram(
+    "gateway_upstream_body_seconds",
+    "Time spent receiving the upstream response body",
+    ("service", "route", "status"),
+)
+BYTES_IN = metrics.counter(
+    "gateway_request_bytes_total",
+    "Request body bytes received from clients",
+    ("service", "route"),
+)
+BYTES_OUT = metrics.counter(
+    "gateway_response_bytes_total",
+    "Response body bytes sent to clients",
+    ("service", "route"),
+)
+
+
+class RequestTiming:
+    """Medições de uma requisição, preenchidas pelo middleware e pelo proxy."""
+
+    __slots__ = (
+        "service", "bytes_in", "bytes_out", "status",
+        "pool_wait", "upstream_connect", "upstream_ttfb", "upstream_body", "trace",
+    )
+
+    def __init__(self):
+        self.service = "-"
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status = 500
+        self.pool_wait: Optional[float] = None
+        self.upstream_connect: Optional[float] = None
+        self.upstream_ttfb: Optional[float] = None
+        self.upstream_body: Optional[float] = None
+        # Contexto de trace (src/app/core/tracing.py), quando o tracing está ativo
+        self.trace = None
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+class TimingMiddleware:
+    """
+    Middleware ASGI que mede a duração total, bytes de entrada/saída e as fases
+    do upstream (espera no pool, conexão, TTFB e corpo) de cada requisição.
+    """
+
+    def __init__(self, app: ASGIApp, log_slow_requests: bool = True, slow_request_threshold: float = 1.0):
+        self.app = app
+        self.log_slow_requests = log_slow_requests
+        self.slow_request_threshold = slow_request_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        scope[TIMING_SCOPE_KEY] = timing
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                timing.bytes_in += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timing.status = message["status"]
+            elif message["type"] == "http.response.body":
+                timing.bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self._record(scope, timing, time.perf_counter() - started)
+
+    def _record(self, scope: Scope, timing: RequestTiming, total: float) -> None:
+        route = getattr(scope.get("route"), "path", "unmatched")
+        service = timing.service
+        status = str(timing.status)
+        labels = (service, route, status)
+
+        REQUEST_DURATION.observe(labels, total)
+        BYTES_IN.inc((service, route), timing.bytes_in)
+        BYTES_OUT.inc((service, route), timing.bytes_out)
+        if timing.pool_wait is not None:
+            POOL_WAIT.observe((service,), timing.pool_wait)
+        if timing.upstream_connect is not None:
+            UPSTREAM_CONNECT.observe((service,), timing.upstream_connect)
+        if timing.upstream_ttfb is not None:
+            UPSTREAM_TTFB.observe(labels, timing.upstream_ttfb)
+        if timing.upstream_body is not None:
+            UPSTREAM_BODY.observe(labels, timing.upstream_body)
+
+        if self.log_slow_requests and total >= self.slow_request_threshold:
+            logger.warning(
+                f"Slow request: {scope['method']} {scope['path']} status={status} service={service} "
+                f"total={_ms(total)} pool_wait={_ms(timing.pool_wait)} connect={_ms(timing.upstream_connect)} "
+                f"ttfb={_ms(timing.upstream_ttfb)} body={_ms(timing.upstream_body)} "
+                f"bytes_in={timing.bytes_in} bytes_out={timing.bytes_out}"
+            )
@@ -0,0 +1,531 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from contextlib import suppress
+import asyncio
+import json
+import logging
+import random
+import time
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.app.core.config.settings import TracingConfig
+from src.app.core.metrics import metrics
+from src.app.core.timing import RequestTiming, TIMING_SCOPE_KEY
+
+logger = logging.getLogger(__name__)
+
+# Chave do scope ASGI com o contexto de trace da requisição
+TRACE_SCOPE_KEY = "gateway.trace"
+
+SPANS = metrics.counter(
+    "gateway_trace_spans_total",
+    "Finished spans by export result",
+    ("result",),
+)
+
+KIND_INTERNAL = "internal"
+KIND_SERVER = "server"
+KIND_CLIENT = "client"
+
+
+def _new_id(bits: int) -> str:
+    value = 0
+    while not value:
+        value = random.getrandbits(bits)
+    return f"{value:0{bits // 4}x}"
+
+
+_HEX = "0123456789abcdef"
+
+
+def _is_id(value: str, length: int) -> bool:
+    # Ids só com hex minúsculo e diferentes de zero
+    return len(value) == length and not value.strip(_HEX) and value.strip("0") != ""
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """`traceparent` (W3C Trace Context) -> (trace_id, parent_id, sampled); None se inválido"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    # Versões futuras podem acrescentar campos; a 00 tem exatamente quatro
+    if len(version) != 2 or version.strip(_HEX) or version == "ff" or (version == "00" and len(parts) != 4):
+        return None
+    if not _is_id(trace_id, 32) or not _is_id(parent_id, 16) or len(flags) != 2 or flags.strip(_HEX):
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """Trecho medido de uma requisição; os tempos são de `time.perf_counter()`"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start", "end", "attributes", "error")
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str],
+        kind: str = KIND_INTERNAL,
+        start: Optional[float] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, end: Optional[float] = None, error: Optional[str] = None) -> None:
+        self.end = time.perf_counter() if end is None else end
+        if error is not None:
+            self.error = error
+        self.trace.tracer.record(self)
+
+    def child(self, name: str, start: float, end: float, kind: str = KIND_INTERNAL, **attributes: Any) -> None:
+        """Registra um filho já terminado (fases medidas por callbacks, sem bloco próprio)"""
+        Span(self.trace, name, self.span_id, kind, start, attributes).finish(end)
+
+    def as_dict(self, offset: float) -> Dict[str, Any]:
+        """Formato exportado; `offset` converte perf_counter em epoch"""
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": int((self.start + offset) * 1e9),
+            "end_ns": int((self.end + offset) * 1e9),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _Stage:
+    """Bloco `with` que torna o span o atual do trace enquanto executa"""
+
+    __slots__ = ("trace", "span", "parent")
+
+    def __init__(self, trace: "Trace", span: Span):
+        self.trace = trace
+        self.span = span
+        self.parent = trace.current
+        trace.current = span
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.trace.current = self.parent
+        self.span.finish(error=exc_type.__name__ if exc_type is not None else None)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+class Trace:
+    """
+    Contexto de trace de uma requisição: ids propagados no `traceparent`,
+    decisão de amostragem e o span atual. Requisições fora da amostra
+    mantêm os ids (para propagação), mas não criam spans.
+    """
+
+    __slots__ = ("tracer", "trace_id", "parent_id", "root_id", "request_id", "sampled", "current", "handoff")
+
+    def __init__(
+        self, tracer: "Tracer", trace_id: str, request_id: str, sampled: bool, parent_id: Optional[str] = None
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        # Span do cliente (traceparent recebido), parent do span raiz
+        self.parent_id = parent_id
+        # Id do span raiz do gateway (usado como parent-id quando não há span atual)
+        self.root_id = _new_id(64)
+        self.request_id = request_id
+        self.sampled = sampled
+        self.current: Optional[Span] = None
+        # Momento em que o último middleware repassou a requisição adiante
+        self.handoff: Optional[float] = None
+
+    def stage(self, name: str, kind: str = KIND_INTERNAL, **attributes: Any):
+        """`with trace.stage(...)`: span filho do atual durante o bloco"""
+        if not self.sampled:
+            return _NO_STAGE
+        parent_id = self.current.span_id if self.current is not None else self.root_id
+        return _Stage(self, Span(self, name, parent_id, kind, attributes=attributes))
+
+    def fork(self, name: str, **attributes: Any) -> "Trace":
+        """Contexto para um trecho concorrente da requisição (ex.: itens de um batch), com span próprio"""
+        if not self.sampled:
+            return self
+        parent_id = self.current.span_id if self.current is not None else self.root_id
+        forked = Trace(self.tracer, self.trace_id, self.request_id, True)
+        forked.root_id = self.root_id
+        forked.current = Span(forked, name, parent_id, attributes=attributes)
+        return forked
+
+    def traceparent(self) -> str:
+        span_id = self.current.span_id if self.current is not None else self.root_id
+        return f"00-{self.trace_id}-{span_id}-{'01' if self.sampled else '00'}"
+
+
+def stage(trace: Optional[Trace], name: str, kind: str = KIND_INTERNAL, **attributes: Any):
+    """Como `Trace.stage`, aceitando requisições sem trace"""
+    if trace is None:
+        return _NO_STAGE
+    return trace.stage(name, kind, **attributes)
+
+
+class SpanExporter:
+    """Destino dos spans terminados; recebe lotes no formato de `Span.as_dict`"""
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def shutdown(self) -> None:
+        pass
+
+
+class MemoryExporter(SpanExporter):
+    """Mantém os últimos spans em memória (testes e /debug/tracing)"""
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: deque = deque(maxlen=max_spans)
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        self.spans.extend(spans)
+
+
+class FileExporter(SpanExporter):
+    """Um span JSON por linha; a escrita roda em thread para não bloquear o event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, data: str) -> None:
+        # Um único write em modo append: workers podem compartilhar o arquivo
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(data)
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, data)
+
+
+_OTLP_KINDS = {KIND_INTERNAL: 1, KIND_SERVER: 2, KIND_CLIENT: 3}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OTLPExporter(SpanExporter):
+    """Envia os lotes para um coletor OpenTelemetry (OTLP/HTTP com JSON)"""
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0):
+        self.endpoint = endpoint
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self.headers = headers
+        self.timeout = timeout
+        # Criado no primeiro envio: montar o cliente (certificados do certifi) custa dezenas de ms
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def payload(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "name": span["name"],
+                "kind": _OTLP_KINDS[span["kind"]],
+                "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["end_ns"]),
+                "attributes": _otlp_attributes(span["attributes"]),
+            }
+            if span["parent_id"]:
+                otlp_span["parentSpanId"] = span["parent_id"]
+            if span["error"]:
+                otlp_span["status"] = {"code": 2, "message": span["error"]}
+            otlp_spans.append(otlp_span)
+        return {"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "api-gateway"}, "spans": otlp_spans}],
+        }]}
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        if self.client is None:
+            self.client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout)
+        response = await self.client.post(self.endpoint, json=self.payload(spans))
+        response.raise_for_status()
+
+    async def shutdown(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+
+def create_exporter(config: TracingConfig) -> SpanExporter:
+    if config.exporter == "otlp":
+        return OTLPExporter(config.otlp_endpoint, config.service_name, config.otlp_headers, config.export_timeout)
+    if config.exporter == "file":
+        return FileExporter(config.file_path)
+    return MemoryExporter()
+
+
+class Tracer:
+    """
+    Cria os contextos de trace e exporta os spans em lotes.
+
+    `record` só enfileira (sem I/O no caminho da requisição); a task `run`
+    envia um lote quando a fila atinge `batch_size` ou a cada
+    `export_interval`. Com a fila cheia os spans novos são descartados.
+    A amostragem é feita na entrada: com `traceparent` do cliente vale a
+    decisão dele (`parent_based`), senão uma fração `sample_rate`.
+    """
+
+    def __init__(self, config: TracingConfig, exporter: Optional[SpanExporter] = None):
+        self.config = config
+        self.exporter = exporter or create_exporter(config)
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        # Diferença entre o relógio de parede e o perf_counter (atualizada a cada lote)
+        self._offset = time.time() - time.perf_counter()
+        self._request_id_header = config.request_id_header.encode("latin-1")
+
+    def start_trace(self, scope: Scope) -> Tuple[Trace, bool]:
+        """Contexto da requisição e se o request ID foi gerado aqui"""
+        traceparent = request_id = None
+        request_id_header = self._request_id_header
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value
+            elif name == request_id_header:
+                request_id = value
+        parent = parse_traceparent(traceparent.decode("latin-1")) if traceparent is not None else None
+
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            if not self.config.parent_based:
+                sampled = random.random() < self.config.sample_rate
+        else:
+            trace_id, parent_id = _new_id(128), None
+            sampled = random.random() < self.config.sample_rate
+        if request_id is None:
+            return Trace(self, trace_id, trace_id, sampled, parent_id), True
+        return Trace(self, trace_id, request_id.decode("latin-1"), sampled, parent_id), False
+
+    def record(self, span: Span) -> None:
+        if len(self._queue) >= self.config.max_queue_size:
+            SPANS.inc(("dropped",))
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.config.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        self._offset = time.time() - time.perf_counter()
+        queue = self._queue
+        while queue:
+            batch = [queue.popleft().as_dict(self._offset) for _ in range(min(len(queue), self.config.batch_size))]
+            try:
+                async with asyncio.timeout(self.config.export_timeout):
+                    await self.exporter.export(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                SPANS.inc(("failed",), len(batch))
+                logger.warning(f"Failed to export {len(batch)} spans: {e!r}")
+            else:
+                SPANS.inc(("exported",), len(batch))
+
+    async def run(self) -> None:
+        while True:
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self.config.export_interval):
+                    await self._wakeup.wait()
+            self._wakeup.clear()
+            await self.flush()
+
+    async def shutdown(self) -> None:
+        await self.flush()
+        await self.exporter.shutdown()
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {
+            "exporter": self.config.exporter,
+            "sample_rate": self.config.sample_rate,
+            "queued": len(self._queue),
+            **{result: SPANS.value((result,)) for result in ("exported", "dropped", "failed")},
+        }
+        if isinstance(self.exporter, MemoryExporter):
+            snapshot["recent"] = list(self.exporter.spans)[-50:]
+        return snapshot
+
+
+def _duration(name: str, seconds: float) -> str:
+    return f"{name};dur={seconds * 1000:.1f}"
+
+
+def server_timing(timing: RequestTiming, total: float) -> str:
+    """
+    Header Server-Timing: `upstream` vai do pedido de conexão ao pool até o
+    fim do corpo da última tentativa (nas respostas em streaming, até os
+    headers); `gateway` é o restante do tempo total até o início da resposta.
+    """
+    upstream = timing.upstream_ttfb
+    if upstream is None:
+        return _duration("gateway", total)
+    if timing.upstream_body is not None:
+        upstream += timing.upstream_body
+    parts = [_duration("gateway", max(total - upstream, 0.0)), _duration("upstream", upstream)]
+    if timing.pool_wait is not None:
+        parts.append(_duration("pool", timing.pool_wait))
+    if timing.upstream_connect is not None:
+        parts.append(_duration("connect", timing.upstream_connect))
+    return ", ".join(parts)
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI do trace da requisição: lê o `traceparent` e o request ID
+    do cliente (ou gera novos), abre o span raiz e devolve o request ID na
+    resposta. Com `server_timing`, adiciona o header Server-Timing com a
+    divisão entre gateway e upstream (mesmo sem tracer).
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Optional[Tracer] = None, server_timing: bool = False):
+        self.app = app
+        self.tracer = tracer
+        self.server_timing = server_timing
+        self.request_id_header = tracer._request_id_header if tracer is not None else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timing = scope.get(TIMING_SCOPE_KEY)
+        if timing is None:
+            # Sem o TimingMiddleware, as fases do upstream são medidas só para o trace/Server-Timing
+            timing = scope[TIMING_SCOPE_KEY] = RequestTiming()
+
+        trace = root = response_span = None
+        request_id = None
+        status = 500
+        if self.tracer is not None:
+            trace, generated = self.tracer.start_trace(scope)
+            request_id = trace.request_id.encode("latin-1")
+            if generated:
+                # O upstream (e os itens de batch) recebem o request ID gerado
+                scope["headers"] = [*scope["headers"], (self.request_id_header, request_id)]
+            scope[TRACE_SCOPE_KEY] = trace
+            timing.trace = trace
+            if trace.sampled:
+                root = Span(trace, scope["method"], trace.parent_id, KIND_SERVER, started, {
+                    "http.request.method": scope["method"],
+                    "url.path": scope["path"],
+                    "gateway.request_id": trace.request_id,
+                })
+                root.span_id = trace.root_id
+                trace.current = root
+            trace.handoff = started
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_span, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                if request_id is not None:
+                    headers.append((self.request_id_header, request_id))
+                if self.server_timing:
+                    headers.append((b"server-timing", server_timing(timing, time.perf_counter() - started).encode()))
+                message = {**message, "headers": headers}
+                if root is not None:
+                    response_span = Span(trace, "response.send", root.span_id)
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                if response_span is not None:
+                    await send(message)
+                    response_span.finish()
+                    response_span = None
+                    return
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if root is not None:
+                route = getattr(scope.get("route"), "path", None)
+                root.name = f"{scope['method']} {route}" if route else scope["method"]
+                root.attributes.update({
+                    "http.route": route,
+                    "http.response.status_code": status,
+                    "gateway.service": timing.service,
+                })
+                if error is None and status >= 500:
+                    error = f"HTTP {status}"
+                root.finish(error=error)
+            if response_span is not None:
+                # Cliente desconectou antes do fim do corpo
+                response_span.finish(error=error or "incomplete")
+
+
+class TracedMiddleware:
+    """
+    Envolve um middleware com um span próprio (`middleware.<stage>`), para
+    separar o tempo de cada etapa antes do roteamento.
+    """
+
+    def __init__(self, app: ASGIApp, stage: str, middleware: type, **options: Any):
+        self.app = app
+        self.name = f"middleware.{stage}"
+        self.middleware = middleware(self._next, **options)
+
+    async def _next(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trace = scope.get(TRACE_SCOPE_KEY)
+        if trace is not None:
+            trace.handoff = time.perf_counter()
+        await self.app(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trace = scope.get(TRACE_SCOPE_KEY)
+        if trace is None or not trace.sampled:
+            await self.middleware(scope, receive, send)
+            return
+        with trace.stage(self.name):
+            await self.middleware(scope, receive, send)
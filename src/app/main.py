@@ -1,41 +1,108 @@
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request
 import uvicorn
 
 from fastapi.middleware.cors import CORSMiddleware
 from src.app.core.config.settings import settings
-from src.app.services.proxy.service import ProxyService
-from src.app.api.v1.gateway import router as gateway_router
+from src.app.api.v1.gateway import router as gateway_router, proxy_service
 from src.app.core.security.middleware import InternalNetworkMiddleware
+from src.app.core.timing import TimingMiddleware
+from src.app.core.metrics import METRICS_DIR_ENV, SharedMetrics, metrics
+from src.app.core.tracing import Tracer, TracedMiddleware, TracingMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
+import asyncio
+import os
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    redirect_slashes=True,
-    debug=settings.performance.debug_mode,   
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
+router = APIRouter()
 
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors.allow_origins,
-    allow_methods=settings.cors.allow_methods,
-    allow_headers=settings.cors.allow_headers,
-    allow_credentials=True,
-)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tudo que faz I/O fica aqui, não no import: serviços, pools, contextos
+    # TLS e chaves de API são criados no startup e fechados no shutdown
+    await proxy_service.startup()
+    tasks = [
+        asyncio.create_task(component.run())
+        for component in (app.state.shared_metrics, app.state.tracer) if component is not None
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if app.state.tracer is not None:
+        # Envia os spans que ainda estão na fila
+        await app.state.tracer.shutdown()
+    await proxy_service.shutdown()
 
-# Internal Network Middleware
-if settings.internal_network:
-    internal_ranges = settings.internal_network.ranges
-    app.add_middleware(InternalNetworkMiddleware, internal_ranges=internal_ranges)
 
+def create_app() -> FastAPI:
+    """
+    Monta a aplicação: middlewares e rotas a partir de `settings` (lidas uma
+    vez por processo). Com uvicorn: `--factory src.app.main:create_app`.
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        redirect_slashes=True,
+        debug=settings.performance.debug_mode,
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+    # Com vários workers (src/app/server.py), o /metrics soma as métricas de todos
+    app.state.shared_metrics = (
+        SharedMetrics(metrics, os.environ[METRICS_DIR_ENV], settings.server.metrics_interval)
+        if os.environ.get(METRICS_DIR_ENV) else None
+    )
+    tracer = app.state.tracer = Tracer(settings.tracing) if settings.tracing.enabled else None
 
-app.include_router(gateway_router, prefix=settings.API_V1_STR)
+    def add_traced_middleware(middleware_class, stage: str, **options):
+        """Com tracing ativo, o middleware ganha um span próprio (middleware.<stage>)"""
+        if tracer is not None:
+            app.add_middleware(TracedMiddleware, stage=stage, middleware=middleware_class, **options)
+        else:
+            app.add_middleware(middleware_class, **options)
 
-@app.get("/")
+    # CORS configuration
+    add_traced_middleware(
+        CORSMiddleware,
+        "cors",
+        allow_origins=settings.cors.allow_origins,
+        allow_methods=settings.cors.allow_methods,
+        allow_headers=settings.cors.allow_headers,
+        allow_credentials=True,
+    )
+
+    # Internal Network Middleware
+    if settings.internal_network:
+        add_traced_middleware(
+            InternalNetworkMiddleware,
+            "internal_network",
+            internal_ranges=settings.internal_network.ranges,
+            trusted_proxies=settings.internal_network.trusted_proxies,
+            cache_size=settings.internal_network.cache_size
+        )
+
+    # Trace context, request ID e Server-Timing
+    if tracer is not None or settings.tracing.server_timing:
+        app.add_middleware(TracingMiddleware, tracer=tracer, server_timing=settings.tracing.server_timing)
+
+    # Timing middleware (adicionado por último para envolver os demais)
+    if settings.performance.enable_timing_middleware:
+        app.add_middleware(
+            TimingMiddleware,
+            log_slow_requests=settings.performance.log_slow_requests,
+            slow_request_threshold=settings.performance.slow_request_threshold
+        )
+
+    app.include_router(gateway_router, prefix=settings.API_V1_STR)
+    app.include_router(router)
+    return app
+
+
+@router.get("/")
 async def root():
     return {
         "service": "API Gateway",
@@ -45,14 +112,15 @@ async def root():
         "api_prefix": settings.API_V1_STR
     }
 
-@app.get("/health")
+@router.get("/health")
 async def health():
     return {
         "status": "healthy",
+        "upstreams": proxy_service.health()["status"],
         "timestamp": datetime.utcnow().isoformat()
     }
 
-@app.get("/debug/services")
+@router.get("/debug/services")
 async def debug_services():
     return {
         name: {
@@ -64,14 +132,58 @@ async def debug_services():
         }
         for name, service in settings.services.items()
     }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(request: Request):
+    shared_metrics = request.app.state.shared_metrics
+    if shared_metrics is not None:
+        content = await shared_metrics.render()
+    else:
+        content = metrics.render()
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
+
+@router.get("/debug/config")
+async def debug_config():
+    return proxy_service.snapshot()
+
+@router.get("/debug/pools")
+async def debug_pools():
+    return proxy_service.pool_stats()
+
+@router.get("/debug/circuits")
+async def debug_circuits():
+    return proxy_service.breaker_stats()
+
+@router.get("/debug/limits")
+async def debug_limits():
+    return proxy_service.limit_stats()
+
+@router.get("/debug/cache")
+async def debug_cache():
+    return proxy_service.cache_stats()
+
+@router.get("/debug/coalescing")
+async def debug_coalescing():
+    return proxy_service.coalescing_stats()
+
+@router.get("/debug/tracing")
+async def debug_tracing(request: Request):
+    tracer = request.app.state.tracer
+    if tracer is None:
+        return {"enabled": False}
+    return {"enabled": True, **tracer.snapshot()}
     
-@app.get("/api/v1/test")
+@router.get("/api/v1/test")
 async def test():
     return {
         "status": "ok",
         "message": "mTLS test endpoint"
     }
-    
+
+
+# Instância usada por `uvicorn src.app.main:app` e pelo launcher (src/app/server.py)
+app = create_app()
+
 if __name__ == "__main__":
     # Configurar uvicorn com SSL/TLS
     uvicorn.run(
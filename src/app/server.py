@@ -0,0 +1,238 @@
+"""
+Launcher de produção: python -m src.app.server [--workers N] [--host H] [--port P]
+
+O processo mestre carrega a aplicação (settings, certificados mTLS, chaves de
+API) uma única vez e faz fork dos workers, que herdam esse estado; só os pools
+de conexão são criados no lifespan de cada worker. Cada worker roda um uvicorn
+no socket compartilhado (ou no seu próprio socket com SO_REUSEPORT). O mestre
+reinicia workers que morrem e, no SIGTERM/SIGINT, repassa o sinal e espera as
+requisições em andamento terminarem.
+"""
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+import argparse
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import logging
+
+import uvicorn
+
+from src.app.core.config.settings import ServerConfig, settings
+from src.app.core.metrics import METRICS_DIR_ENV
+
+logger = logging.getLogger(__name__)
+
+# Workers que morrem antes disso contam como falha de inicialização (backoff)
+_MIN_UPTIME = 5.0
+_MAX_BACKOFF = 30.0
+
+
+def resolve_loop(loop: str) -> str:
+    if loop == "auto":
+        return "uvloop" if find_spec("uvloop") is not None else "asyncio"
+    return loop
+
+
+def resolve_http(http: str) -> str:
+    if http == "auto":
+        return "httptools" if find_spec("httptools") is not None else "h11"
+    return http
+
+
+def bind_socket(config: ServerConfig, reuse_port: bool = False) -> socket.socket:
+    family = socket.AF_INET6 if ":" in config.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((config.host, config.port))
+    sock.listen(config.backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class _Worker:
+    __slots__ = ("pid", "started_at")
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.started_at = time.monotonic()
+
+
+class Supervisor:
+    """Mantém `workers` processos uvicorn rodando e os encerra de forma graciosa."""
+
+    def __init__(self, app, config: ServerConfig):
+        self.app = app
+        self.config = config
+        self.workers = config.workers or os.cpu_count() or 1
+        self.loop = resolve_loop(config.loop)
+        self.http = resolve_http(config.http)
+        self._socket: Optional[socket.socket] = None
+        # slot -> worker; slots sem worker aguardam (re)spawn
+        self._slots: Dict[int, Optional[_Worker]] = {slot: None for slot in range(self.workers)}
+        self._failures: Dict[int, int] = {slot: 0 for slot in range(self.workers)}
+        self._spawn_at: Dict[int, float] = {slot: 0.0 for slot in range(self.workers)}
+        self._stopping = False
+
+    def run(self) -> int:
+        if not self.config.reuse_port:
+            self._socket = bind_socket(self.config)
+        logger.info(
+            f"Starting {self.workers} workers on {self.config.host}:{self.config.port} "
+            f"(loop={self.loop}, http={self.http}, reuse_port={self.config.reuse_port})"
+        )
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        try:
+            while not self._stopping:
+                self._reap()
+                self._spawn_missing()
+                time.sleep(0.2)
+        finally:
+            self._stop_workers()
+            if self._socket is not None:
+                self._socket.close()
+        return 0
+
+    def _handle_stop(self, signum, frame) -> None:
+        if not self._stopping:
+            logger.info(f"Received {signal.Signals(signum).name}, draining workers")
+        self._stopping = True
+
+    def _spawn_missing(self) -> None:
+        now = time.monotonic()
+        for slot, worker in self._slots.items():
+            if worker is None and now >= self._spawn_at[slot]:
+                self._slots[slot] = self._spawn(slot)
+
+    def _spawn(self, slot: int) -> _Worker:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._run_worker()
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} failed")
+            finally:
+                os._exit(code)
+        logger.info(f"Worker {pid} started (slot {slot})")
+        return _Worker(pid)
+
+    def _run_worker(self) -> None:
+        # O uvicorn instala seus próprios handlers (shutdown gracioso)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        sock = bind_socket(self.config, reuse_port=True) if self.config.reuse_port else self._socket
+        config = uvicorn.Config(
+            self.app,
+            loop=self.loop,
+            http=self.http,
+            lifespan="on",
+            backlog=self.config.backlog,
+            timeout_graceful_shutdown=self.config.graceful_timeout,
+            access_log=self.config.access_log,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._worker_exited(pid, status)
+
+    def _worker_exited(self, pid: int, status: int) -> None:
+        slot = next((s for s, w in self._slots.items() if w is not None and w.pid == pid), None)
+        if slot is None:
+            return
+        worker = self._slots[slot]
+        self._slots[slot] = None
+        self._remove_metrics(pid)
+        if self._stopping:
+            return
+        uptime = time.monotonic() - worker.started_at
+        # Falhas seguidas logo após o start indicam erro de configuração: espera cada vez mais
+        self._failures[slot] = self._failures[slot] + 1 if uptime < _MIN_UPTIME else 0
+        delay = min(0.5 * 2 ** self._failures[slot], _MAX_BACKOFF) if self._failures[slot] else 0.0
+        self._spawn_at[slot] = time.monotonic() + delay
+        logger.warning(
+            f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)} "
+            f"after {uptime:.1f}s; restarting in {delay:.1f}s"
+        )
+
+    def _alive(self) -> List[_Worker]:
+        return [w for w in self._slots.values() if w is not None]
+
+    def _signal_workers(self, signum: int) -> None:
+        for worker in self._alive():
+            try:
+                os.kill(worker.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _stop_workers(self) -> None:
+        self._signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + self.config.graceful_timeout + 5
+        while self._alive() and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self._alive():
+            logger.warning(f"Killing {len(self._alive())} workers after graceful timeout")
+            self._signal_workers(signal.SIGKILL)
+            for worker in self._alive():
+                try:
+                    os.waitpid(worker.pid, 0)
+                except ChildProcessError:
+                    pass
+        logger.info("All workers stopped")
+
+    def _remove_metrics(self, pid: int) -> None:
+        directory = os.environ.get(METRICS_DIR_ENV)
+        if directory:
+            try:
+                os.unlink(os.path.join(directory, f"{pid}.json"))
+            except FileNotFoundError:
+                pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API Gateway production server")
+    parser.add_argument("--workers", type=int, help="number of workers (0 = one per CPU)")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args(argv)
+    updates = {name: value for name, value in vars(args).items() if value is not None}
+    config = settings.server.model_copy(update=updates)
+    settings.configure_logging()
+
+    if not hasattr(os, "fork"):
+        # Sem fork (Windows): um único processo
+        uvicorn.run("src.app.main:app", host=config.host, port=config.port,
+                    loop=resolve_loop(config.loop), http=resolve_http(config.http), access_log=config.access_log)
+        return 0
+
+    # Diretório em que os workers publicam as métricas; definido antes de
+    # importar a aplicação para que o /metrics mostre a visão combinada
+    metrics_dir = tempfile.mkdtemp(prefix="gateway-metrics-")
+    os.environ[METRICS_DIR_ENV] = metrics_dir
+    try:
+        # Carregado uma vez no mestre; os workers herdam via fork
+        from src.app.main import app
+        from src.app.api.v1.gateway import proxy_service
+        proxy_service.preload()
+        return Supervisor(app, config).run()
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
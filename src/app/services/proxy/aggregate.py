@@ -0,0 +1,281 @@
+from typing import Any, Dict, List, Mapping, Optional
+from urllib.parse import quote, urlencode
+import asyncio
+import json
+import time
+import logging
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.app.core.config.settings import BatchItemConfig, CompositionConfig, settings
+from src.app.core.metrics import metrics
+from src.app.core.timing import RequestTiming, TIMING_SCOPE_KEY
+from src.app.core.tracing import TRACE_SCOPE_KEY, Trace
+from src.app.services.proxy.body import ResponseTooLarge
+
+logger = logging.getLogger(__name__)
+
+BATCH_ITEMS = metrics.counter(
+    "gateway_batch_items_total",
+    "Batch and composition sub-requests by response status",
+    ("service", "status"),
+)
+
+# Headers da requisição original que não valem para as sub-requisições
+_DROPPED_HEADERS = frozenset({
+    "host", "content-length", "content-type", "transfer-encoding", "connection", "accept-encoding",
+})
+# Headers da sub-resposta que não fazem sentido dentro do JSON combinado
+_DROPPED_RESPONSE_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding", "connection"})
+
+
+class BatchTooLarge(Exception):
+    """Sub-resposta não cabe no que resta de `batch.max_response_bytes`."""
+
+
+class _ResponseBudget:
+    """Bytes de corpo que ainda cabem na resposta combinada, compartilhados pelos itens"""
+
+    __slots__ = ("remaining",)
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+
+    def take(self, size: int) -> None:
+        if size > self.remaining:
+            raise BatchTooLarge()
+        self.remaining -= size
+
+    def release(self, size: int) -> None:
+        self.remaining += size
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItemConfig]
+    # Timeout (s) padrão dos itens deste batch
+    timeout: Optional[float] = None
+
+
+def _path_params(params: Mapping[str, str]) -> Dict[str, str]:
+    """
+    Valores da query string para o path: cada um vira um único segmento
+    (`/`, `?` e `#` codificados), sem sair do prefixo do serviço.
+    """
+    quoted = {}
+    for name, value in params.items():
+        if value in (".", ".."):
+            raise HTTPException(status_code=400, detail=f"Invalid parameter: {name}")
+        quoted[name] = quote(value, safe="")
+    return quoted
+
+
+def render_composition(composition: CompositionConfig, params: Mapping[str, str]) -> List[BatchItemConfig]:
+    """Preenche os {parâmetros} de path, query e headers com os valores da query string"""
+    items = []
+    path_params = _path_params(params)
+    try:
+        for item in composition.requests:
+            items.append(item.model_copy(update={
+                "path": item.path.format_map(path_params),
+                "query": {name: value.format_map(params) for name, value in item.query.items()},
+                "headers": {name: value.format_map(params) for name, value in item.headers.items()},
+            }))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing parameter: {e.args[0]}")
+    return items
+
+
+def _decode_body(body: bytes, content_type: str) -> Any:
+    if not body:
+        return None
+    if "json" in content_type:
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    return body.decode("utf-8", errors="replace")
+
+
+class BatchExecutor:
+    """
+    Executa várias sub-requisições em paralelo e junta as respostas.
+
+    Cada item passa pelo mesmo caminho de uma requisição comum
+    (`forward_request`: autenticação, limites, cache, pools, circuit breaker),
+    com a API key e o IP do cliente da requisição original. Falhas ficam no
+    item correspondente; a resposta combinada é sempre 200.
+    """
+
+    def __init__(self, proxy_service):
+        self.proxy_service = proxy_service
+
+    async def execute(
+        self,
+        request: Request,
+        items: List[BatchItemConfig],
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        config = settings.batch
+        if not items:
+            raise HTTPException(status_code=400, detail="No sub-requests")
+        if len(items) > config.max_items:
+            raise HTTPException(status_code=400, detail=f"Too many sub-requests (max {config.max_items})")
+        ids = [item.id if item.id is not None else str(index) for index, item in enumerate(items)]
+        if len(set(ids)) != len(ids):
+            raise HTTPException(status_code=400, detail="Duplicate sub-request ids")
+
+        budget = self._client_budget(request)
+        response_budget = _ResponseBudget(config.max_response_bytes)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self._run_item(request, item, min(item.timeout or timeout or config.timeout, budget), response_budget)
+            for item in items
+        ))
+        logger.info(f"Batch of {len(items)} sub-requests finished in {time.perf_counter() - started:.3f}s")
+        return {"responses": dict(zip(ids, results))}
+
+    async def compose(self, request: Request, name: str) -> Dict[str, Any]:
+        composition = settings.batch.compositions.get(name)
+        if composition is None:
+            raise HTTPException(status_code=404, detail=f"Composition {name} not found")
+        items = render_composition(composition, request.query_params)
+        return await self.execute(request, items, composition.timeout)
+
+    @staticmethod
+    def _client_budget(request: Request) -> float:
+        """Tempo (s) que o cliente aceita esperar pelo batch inteiro (header de deadline)"""
+        value = request.headers.get(settings.deadline.header)
+        try:
+            return min(max(float(value) / 1000, 0.0), settings.deadline.max_timeout)
+        except (TypeError, ValueError):
+            return float("inf")
+
+    async def _run_item(
+        self, request: Request, item: BatchItemConfig, timeout: float, response_budget: _ResponseBudget
+    ) -> Dict[str, Any]:
+        # Os itens rodam em paralelo: cada um com seu span
+        trace = request.scope.get(TRACE_SCOPE_KEY)
+        if trace is not None:
+            trace = trace.fork("batch.item", service=item.service, path=item.path)
+        try:
+            async with asyncio.timeout(timeout):
+                sub_request = self._sub_request(request, item, timeout, trace)
+                response = await self.proxy_service.forward_request(item.service, item.path.lstrip("/"), sub_request)
+                service_config = self.proxy_service.services.get(item.service)
+                limit = service_config.body.max_response_bytes if service_config is not None else None
+                result = await self._read(response, limit, response_budget)
+        except HTTPException as e:
+            result = {"status": e.status_code, "error": e.detail}
+            if e.headers:
+                result["headers"] = dict(e.headers)
+        except TimeoutError:
+            result = {"status": 504, "error": "Sub-request timeout"}
+        except ResponseTooLarge:
+            result = {"status": 502, "error": "Upstream response too large"}
+        except BatchTooLarge:
+            result = {"status": 413, "error": "Batch response too large"}
+        except Exception as e:
+            logger.error(f"Error in sub-request to {item.service}: {e}", exc_info=True)
+            result = {"status": 500, "error": "Internal Gateway Error"}
+        # Nomes de serviço vêm do cliente: os desconhecidos não viram label
+        service = item.service if item.service in self.proxy_service.services else "-"
+        BATCH_ITEMS.inc((service, str(result["status"])))
+        if trace is not None and trace.sampled:
+            trace.current.set("http.response.status_code", result["status"])
+            trace.current.finish(error=f"HTTP {result['status']}" if result["status"] >= 500 else None)
+        return result
+
+    @staticmethod
+    def _sub_request(
+        request: Request, item: BatchItemConfig, timeout: float, trace: Optional[Trace] = None
+    ) -> Request:
+        headers = {
+            name: value for name, value in request.headers.items()
+            if name not in _DROPPED_HEADERS and name != settings.deadline.header
+        }
+        headers.update({name.lower(): value for name, value in item.headers.items()})
+        # O corpo da sub-resposta vai dentro do JSON: sem compressão
+        headers["accept-encoding"] = "identity"
+        headers[settings.deadline.header] = str(int(timeout * 1000))
+        body = b""
+        if item.body is not None:
+            body = json.dumps(item.body).encode()
+            headers["content-type"] = "application/json"
+            headers["content-length"] = str(len(body))
+
+        path = f"{settings.API_V1_STR}/{item.service}/{item.path.lstrip('/')}"
+        scope = dict(request.scope)
+        # A medição por fases é da requisição do batch, não de cada item
+        scope.pop(TIMING_SCOPE_KEY, None)
+        if trace is not None:
+            # RequestTiming só para levar o trace do item até o pool
+            timing = RequestTiming()
+            timing.trace = trace
+            scope[TIMING_SCOPE_KEY] = timing
+            scope[TRACE_SCOPE_KEY] = trace
+        scope.update(
+            method=item.method,
+            path=path,
+            raw_path=path.encode(),
+            query_string=urlencode(item.query).encode(),
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+        )
+        sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return Request(scope, receive)
+
+    @staticmethod
+    async def _read(response: Response, limit: Optional[int], budget: _ResponseBudget) -> Dict[str, Any]:
+        """
+        Lê o corpo da sub-resposta dentro de `body.max_response_bytes` do
+        serviço e do que resta de `batch.max_response_bytes`. Um item que não
+        cabe devolve ao orçamento o que já tinha lido.
+        """
+        received = 0
+        try:
+            if isinstance(response, StreamingResponse):
+                chunks = []
+                try:
+                    async for chunk in response.body_iterator:
+                        chunk = chunk.encode() if isinstance(chunk, str) else chunk
+                        if limit is not None and received + len(chunk) > limit:
+                            raise ResponseTooLarge(limit)
+                        budget.take(len(chunk))
+                        received += len(chunk)
+                        chunks.append(chunk)
+                finally:
+                    # Interrompido no meio (limite ou timeout): encerra o gerador do corpo
+                    aclose = getattr(response.body_iterator, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+                    # Fecha o stream do upstream e libera a vaga de concorrência
+                    if response.background is not None:
+                        await response.background()
+                body = b"".join(chunks)
+            else:
+                body = response.body
+                if limit is not None and len(body) > limit:
+                    raise ResponseTooLarge(limit)
+                budget.take(len(body))
+                received = len(body)
+        except BaseException:
+            budget.release(received)
+            raise
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name not in _DROPPED_RESPONSE_HEADERS
+        }
+        return {
+            "status": response.status_code,
+            "headers": headers,
+            "body": _decode_body(body, headers.get("content-type", "")),
+        }
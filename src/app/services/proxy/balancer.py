@@ -0,0 +1,195 @@
+from typing import Any, Callable, Dict, List, Optional
+import random
+import time
+import logging
+
+from src.app.core.config.settings import LoadBalancingConfig
+from src.app.services.proxy.pool import UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    """Instância de upstream de um serviço, com pool próprio e estatísticas de uso."""
+
+    __slots__ = (
+        "url", "weight", "pool", "outstanding", "ewma", "current_weight",
+        "consecutive_failures", "ejected_until", "ejections", "ejection_streak", "requests", "failures",
+        "healthy", "check_successes", "check_failures",
+    )
+
+    def __init__(self, url: str, weight: int, pool: UpstreamPool):
+        self.url = url.rstrip("/")
+        self.weight = weight
+        self.pool = pool
+        self.outstanding = 0
+        self.ewma = 0.0
+        self.current_weight = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.ejection_streak = 0
+        self.requests = 0
+        self.failures = 0
+        # Estado da verificação ativa (HealthChecker)
+        self.healthy = True
+        self.check_successes = 0
+        self.check_failures = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "available": self.is_available(now),
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency_ms": self.ewma * 1000,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "pool": self.pool.snapshot(),
+        }
+
+
+class LoadBalancer:
+    """
+    Seleciona o endpoint de cada requisição de um serviço.
+
+    Estratégias: `round_robin` (round-robin ponderado suave), `least_outstanding`
+    (menos requisições em andamento por peso) e `p2c_ewma` (dois sorteados,
+    vence a menor latência EWMA ponderada pelas requisições em andamento).
+    Endpoints com falhas consecutivas são ejetados temporariamente.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        endpoints: List[Endpoint],
+        config: LoadBalancingConfig,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self.service = service
+        self.endpoints = endpoints
+        self.config = config
+        self._on_change = on_change
+        self._pick = {
+            "round_robin": self._round_robin,
+            "least_outstanding": self._least_outstanding,
+            "p2c_ewma": self._p2c_ewma,
+        }[config.strategy]
+        self._random = random.Random()
+
+    def _candidates(self, now: float) -> List[Endpoint]:
+        endpoints = self.endpoints
+        if len(endpoints) == 1:
+            return endpoints
+        available = [endpoint for endpoint in endpoints if endpoint.is_available(now)]
+        # Se todos foram ejetados, usa todos (melhor tentar do que recusar tudo)
+        return available or endpoints
+
+    def pick(self) -> Endpoint:
+        candidates = self._candidates(time.monotonic())
+        if len(candidates) == 1:
+            return candidates[0]
+        return self._pick(candidates)
+
+    def _round_robin(self, candidates: List[Endpoint]) -> Endpoint:
+        total = 0
+        best: Optional[Endpoint] = None
+        for endpoint in candidates:
+            endpoint.current_weight += endpoint.weight
+            total += endpoint.weight
+            if best is None or endpoint.current_weight > best.current_weight:
+                best = endpoint
+        best.current_weight -= total
+        return best
+
+    @staticmethod
+    def _least_outstanding(candidates: List[Endpoint]) -> Endpoint:
+        return min(candidates, key=lambda endpoint: (endpoint.outstanding + 1) / endpoint.weight)
+
+    def _p2c_ewma(self, candidates: List[Endpoint]) -> Endpoint:
+        first, second = self._random.choices(candidates, weights=[e.weight for e in candidates], k=2)
+        if first is second:
+            return first
+
+        def score(endpoint: Endpoint) -> float:
+            return endpoint.ewma * (endpoint.outstanding + 1) / endpoint.weight
+
+        return first if score(first) <= score(second) else second
+
+    def on_start(self, endpoint: Endpoint) -> None:
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+
+    def on_finish(self, endpoint: Endpoint, latency: float, success: Optional[bool]) -> None:
+        """Registra o fim de uma chamada; `success=None` indica chamada cancelada"""
+        endpoint.outstanding -= 1
+        if success is None:
+            return
+        alpha = self.config.ewma_alpha
+        endpoint.ewma = latency if endpoint.ewma == 0.0 else alpha * latency + (1 - alpha) * endpoint.ewma
+        if success:
+            endpoint.consecutive_failures = 0
+            endpoint.ejection_streak = 0
+            if endpoint.ejected_until:
+                self._restore(endpoint)
+            return
+
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.config.failure_threshold:
+            self.eject(endpoint)
+
+    def eject(self, endpoint: Endpoint) -> None:
+        """
+        Ejeta o endpoint; o tempo dobra a cada ejeção seguida, até `max_ejection_time`.
+        Sem outro endpoint disponível ele continua recebendo tráfego (ver
+        `_candidates`), mas fica registrado como indisponível no health.
+        """
+        now = time.monotonic()
+        if not endpoint.is_available(now):
+            return
+        endpoint.ejections += 1
+        endpoint.ejection_streak += 1
+        duration = min(
+            self.config.ejection_time * (2 ** (endpoint.ejection_streak - 1)),
+            self.config.max_ejection_time,
+        )
+        endpoint.ejected_until = now + duration
+        endpoint.consecutive_failures = 0
+        if any(other.is_available(now) for other in self.endpoints):
+            logger.warning(f"Ejecting endpoint {endpoint.url} of service {self.service} for {duration:.0f}s")
+        else:
+            logger.warning(
+                f"Endpoint {endpoint.url} of service {self.service} failing and no other endpoint available: "
+                f"marked unavailable for {duration:.0f}s, still receiving traffic"
+            )
+        self._changed()
+
+    def _restore(self, endpoint: Endpoint) -> None:
+        now = time.monotonic()
+        if endpoint.ejected_until <= now:
+            endpoint.ejected_until = 0.0
+        elif not any(other.is_available(now) for other in self.endpoints):
+            # Ejetado mas recebendo tráfego por falta de outro disponível: respondeu, então volta
+            endpoint.ejected_until = 0.0
+            logger.info(f"Endpoint {endpoint.url} of service {self.service} recovered")
+            self._changed()
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def is_failure_status(self, status_code: int) -> bool:
+        return status_code in self.config.failure_status
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "strategy": self.config.strategy,
+            "endpoints": [endpoint.snapshot(now) for endpoint in self.endpoints],
+        }
@@ -0,0 +1,176 @@
+from typing import AsyncIterator, List, Optional, Union
+import asyncio
+import mmap
+import tempfile
+import httpx
+
+# Chave em `httpx.Response.extensions` do corpo de resposta guardado em arquivo
+SPOOLED_BODY = "gateway.spooled_body"
+# Blocos enviados a partir do arquivo
+CHUNK_SIZE = 512 * 1024
+# Bytes acumulados antes de cada escrita no arquivo (feita em thread)
+_WRITE_SIZE = 1024 * 1024
+# Blocos já enviados são liberados do mapeamento (continuam no page cache)
+_DONTNEED = getattr(mmap, "MADV_DONTNEED", None)
+
+
+class BodyTooLarge(Exception):
+    """Corpo maior que o limite configurado."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Body exceeds {limit} bytes")
+        self.limit = limit
+
+
+class ResponseTooLarge(BodyTooLarge):
+    """Resposta do upstream maior que o limite configurado."""
+
+
+class SpooledBody:
+    """
+    Corpo guardado em arquivo temporário e lido de volta por mmap: cada
+    iteração recomeça do início (reenvio em retries) sem trazer o corpo
+    inteiro para a memória do processo. As páginas são carregadas sob demanda,
+    um bloco por vez, e descartadas do mapeamento depois de enviadas, então o
+    RSS fica em torno de um bloco qualquer que seja o tamanho do corpo. O
+    arquivo some ao ser fechado.
+    """
+
+    __slots__ = ("size", "_file", "_map")
+
+    def __init__(self, file):
+        self._file = file
+        self.size = file.tell()
+        self._map = mmap.mmap(file.fileno(), self.size, flags=mmap.MAP_SHARED, prot=mmap.PROT_READ)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.chunks()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        data = self._map
+        for offset in range(0, self.size, CHUNK_SIZE):
+            chunk = data[offset:offset + CHUNK_SIZE]
+            if _DONTNEED is not None:
+                # O bloco já foi copiado; num retry as páginas voltam do page cache
+                data.madvise(_DONTNEED, offset, len(chunk))
+            yield chunk
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class _Spooler:
+    """Acumula o corpo em memória até `threshold` bytes; daí em diante, em arquivo temporário"""
+
+    __slots__ = ("limit", "threshold", "spool_dir", "size", "_chunks", "_pending", "_file")
+
+    def __init__(self, limit: Optional[int], threshold: Optional[int], spool_dir: Optional[str]):
+        self.limit = limit
+        self.threshold = threshold
+        self.spool_dir = spool_dir
+        self.size = 0
+        self._chunks: List[bytes] = []
+        self._pending = 0
+        self._file = None
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.limit is not None and self.size > self.limit:
+            raise BodyTooLarge(self.limit)
+        self._chunks.append(chunk)
+        self._pending += len(chunk)
+        if self._file is None:
+            if self.threshold is None or self.size <= self.threshold:
+                return
+            self._file = await asyncio.to_thread(tempfile.TemporaryFile, dir=self.spool_dir)
+        if self._pending >= _WRITE_SIZE:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        chunks, self._chunks, self._pending = self._chunks, [], 0
+        await asyncio.to_thread(self._file.writelines, chunks)
+
+    async def finish(self) -> Union[bytes, SpooledBody]:
+        if self._file is None:
+            return b"".join(self._chunks)
+        if self._chunks:
+            await self._flush()
+        await asyncio.to_thread(self._file.flush)
+        return SpooledBody(self._file)
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def check_length(content_length: Optional[str], limit: Optional[int]) -> None:
+    """Recusa pelo Content-Length declarado, antes de ler o corpo"""
+    if limit is not None and content_length and content_length.isdigit() and int(content_length) > limit:
+        raise BodyTooLarge(limit)
+
+
+async def read_body(
+    chunks: AsyncIterator[bytes],
+    limit: Optional[int],
+    threshold: Optional[int],
+    spool_dir: Optional[str] = None,
+) -> Union[bytes, SpooledBody]:
+    """
+    Lê o corpo inteiro, interrompendo assim que passa de `limit` bytes. Até
+    `threshold` bytes (ou sempre, com `threshold` None) retorna `bytes`;
+    acima disso, um SpooledBody que deve ser fechado pelo chamador.
+    """
+    spooler = _Spooler(limit, threshold, spool_dir)
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await spooler.write(chunk)
+        return await spooler.finish()
+    except BaseException:
+        spooler.discard()
+        raise
+
+
+async def limit_stream(chunks: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    """Repassa um corpo em streaming, interrompendo ao passar de `limit` bytes"""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge(limit)
+        yield chunk
+
+
+async def read_response(
+    response: httpx.Response,
+    limit: Optional[int],
+    threshold: Optional[int],
+    spool_dir: Optional[str] = None,
+) -> None:
+    """
+    Lê o corpo (decodificado) de uma resposta aberta com `stream=True`. Até
+    `threshold` bytes ele fica em `response.content`; acima disso, num
+    SpooledBody em `response.extensions[SPOOLED_BODY]`.
+    """
+    try:
+        # Em HEAD o Content-Length é o do recurso, sem corpo
+        if response.request.method != "HEAD":
+            check_length(response.headers.get("content-length"), limit)
+        body = await read_body(response.aiter_bytes(), limit, threshold, spool_dir)
+    except BodyTooLarge as e:
+        raise ResponseTooLarge(e.limit) from None
+    finally:
+        await response.aclose()
+    if isinstance(body, SpooledBody):
+        response.extensions[SPOOLED_BODY] = body
+    else:
+        # Como em httpx.Response.aread()
+        response._content = body
+
+
+def spooled_body(response: httpx.Response) -> Optional[SpooledBody]:
+    return response.extensions.get(SPOOLED_BODY)
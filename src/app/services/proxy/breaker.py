@@ -0,0 +1,241 @@
+from typing import Any, Callable, Dict, List, Optional
+import random
+import time
+import logging
+
+from src.app.core.config.settings import CircuitBreakerConfig, RetryBudgetConfig
+from src.app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_TRANSITIONS = metrics.counter(
+    "gateway_circuit_transitions_total",
+    "Circuit breaker state transitions",
+    ("service", "from_state", "to_state"),
+)
+CIRCUIT_REJECTIONS = metrics.counter(
+    "gateway_circuit_rejections_total",
+    "Requests rejected because the circuit was open",
+    ("service",),
+)
+RETRIES = metrics.counter(
+    "gateway_upstream_retries_total",
+    "Upstream retries performed",
+    ("service",),
+)
+RETRIES_DENIED = metrics.counter(
+    "gateway_retry_budget_exhausted_total",
+    "Retries skipped because the global retry budget was exhausted",
+    ("service",),
+)
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do serviço está aberto."""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"Circuit open for service {service}")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("slot", "total", "failures", "slow")
+
+    def __init__(self):
+        self.slot = -1
+        self.total = 0
+        self.failures = 0
+        self.slow = 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por serviço (closed -> open -> half_open -> closed).
+
+    Mantém uma janela deslizante de `window` segundos dividida em buckets com
+    total de chamadas, falhas e chamadas lentas. Com o circuito aberto as
+    chamadas falham imediatamente; após `open_duration` algumas chamadas de
+    teste (half-open) decidem se o circuito fecha ou volta a abrir.
+
+    Cada chamada de teste ocupa uma vaga até `record` ou, se terminar sem
+    resultado (cancelada, prazo do cliente, corpo acima do limite), até
+    `release`. Uma rodada de teste sem conclusão após `open_duration`
+    recomeça, para que vagas perdidas não deixem o circuito preso.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        config: CircuitBreakerConfig,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self.service = service
+        self.config = config
+        self._on_change = on_change
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        # Rodada de testes atual (identifica as vagas em `release`) e seu início
+        self._half_open_round = 0
+        self._half_open_at = 0.0
+        self._bucket_width = config.window / config.buckets
+        self._buckets: List[_Bucket] = [_Bucket() for _ in range(config.buckets)]
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        CIRCUIT_TRANSITIONS.inc((self.service, self.state, state))
+        logger.warning(f"Circuit breaker for service {self.service}: {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._start_round(time.monotonic())
+        else:
+            for bucket in self._buckets:
+                bucket.slot = -1
+        if self._on_change is not None:
+            self._on_change()
+
+    def current_state(self, now: float) -> str:
+        """Estado visto por uma chamada feita agora (aberto e vencido = half_open)"""
+        if self.state == OPEN and now >= self.opened_at + self.config.open_duration:
+            return HALF_OPEN
+        return self.state
+
+    def _start_round(self, now: float) -> None:
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        self._half_open_round += 1
+        self._half_open_at = now
+
+    def allow_request(self) -> Optional[int]:
+        """
+        Levanta CircuitOpenError se a chamada não pode ser feita agora. Em
+        half-open retorna a rodada da vaga de teste ocupada (para `release`).
+        """
+        if not self.config.enabled or self.state == CLOSED:
+            return None
+        now = time.monotonic()
+        if self.state == OPEN:
+            remaining = self.opened_at + self.config.open_duration - now
+            if remaining > 0:
+                CIRCUIT_REJECTIONS.inc((self.service,))
+                raise CircuitOpenError(self.service, remaining)
+            self._transition(HALF_OPEN)
+        if self._half_open_calls >= self.config.half_open_max_calls:
+            if now - self._half_open_at < self.config.open_duration:
+                CIRCUIT_REJECTIONS.inc((self.service,))
+                raise CircuitOpenError(self.service, self.config.open_duration)
+            logger.warning(f"Circuit breaker for service {self.service}: half-open probes expired, starting over")
+            self._start_round(now)
+        self._half_open_calls += 1
+        return self._half_open_round
+
+    def release(self, probe: Optional[int]) -> None:
+        """Devolve a vaga de teste de uma chamada que terminou sem `record`"""
+        if probe is not None and probe == self._half_open_round and self.state == HALF_OPEN:
+            self._half_open_calls -= 1
+
+    def record(self, success: bool, latency: float) -> None:
+        if not self.config.enabled:
+            return
+        slow = latency >= self.config.slow_call_threshold
+        if self.state == HALF_OPEN:
+            if success and not slow:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.config.half_open_max_calls:
+                    self._transition(CLOSED)
+            else:
+                self._transition(OPEN)
+            return
+
+        now = time.monotonic()
+        slot = int(now / self._bucket_width)
+        bucket = self._buckets[slot % len(self._buckets)]
+        if bucket.slot != slot:
+            bucket.slot = slot
+            bucket.total = bucket.failures = bucket.slow = 0
+        bucket.total += 1
+        if not success:
+            bucket.failures += 1
+        if slow:
+            bucket.slow += 1
+        if (not success or slow) and self.state == CLOSED:
+            self._evaluate(slot)
+
+    def _window(self, slot: int):
+        total = failures = slow = 0
+        oldest = slot - len(self._buckets)
+        for bucket in self._buckets:
+            if bucket.slot > oldest:
+                total += bucket.total
+                failures += bucket.failures
+                slow += bucket.slow
+        return total, failures, slow
+
+    def _evaluate(self, slot: int) -> None:
+        total, failures, slow = self._window(slot)
+        if total < self.config.minimum_calls:
+            return
+        if (
+            failures / total >= self.config.failure_rate_threshold
+            or slow / total >= self.config.slow_call_rate_threshold
+        ):
+            self._transition(OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total, failures, slow = self._window(int(time.monotonic() / self._bucket_width))
+        return {
+            "state": self.state,
+            "state_value": _STATE_VALUES[self.state],
+            "window_calls": total,
+            "window_failures": failures,
+            "window_slow_calls": slow,
+        }
+
+
+class RetryBudget:
+    """
+    Orçamento global de retries (token bucket).
+
+    Cada requisição original deposita `ratio` tokens e o saldo também cresce
+    `min_per_second` por segundo; cada retry consome um token. Assim os
+    retries ficam limitados a uma fração do tráfego e não amplificam uma queda.
+    """
+
+    def __init__(self, config: RetryBudgetConfig):
+        self.config = config
+        self.tokens = config.max_tokens
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.config.max_tokens,
+            self.tokens + (now - self._updated) * self.config.min_per_second,
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        self.tokens = min(self.config.max_tokens, self.tokens + self.config.ratio)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, rng: random.Random = random) -> float:
+    """Backoff exponencial com full jitter para a tentativa `attempt` (1 = primeiro retry)"""
+    return rng.uniform(0, min(maximum, base * (2 ** (attempt - 1))))
@@ -0,0 +1,312 @@
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import parse_qsl, urlencode
+import time
+import logging
+
+import httpx
+
+from src.app.core.config.settings import CacheConfig
+from src.app.services.proxy.body import spooled_body
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[Any, ...]
+
+# Headers repetidos numa resposta 304 (RFC 9110 §15.4.5)
+NOT_MODIFIED_HEADERS = frozenset({
+    "cache-control", "content-location", "date", "etag", "expires", "last-modified", "vary",
+})
+# Diretivas que autorizam guardar a resposta a uma requisição com Authorization (RFC 9111 §3.5)
+_SHARED_WITH_AUTHORIZATION = ("public", "s-maxage", "must-revalidate")
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Converte um header Cache-Control em dicionário (diretivas em minúsculas)"""
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def normalize_url(url: str) -> str:
+    """Ordena os parâmetros da query para que a ordem não altere a chave do cache"""
+    base, separator, query = url.partition("?")
+    if not separator:
+        return base
+    return f"{base}?{urlencode(sorted(parse_qsl(query, keep_blank_values=True)))}"
+
+
+class CacheStats:
+    __slots__ = ("hits", "stale_hits", "misses", "revalidations", "stores", "evictions", "expirations")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CacheEntry:
+    __slots__ = (
+        "status_code", "headers", "content", "etag", "last_modified",
+        "stored_at", "expires_at", "stale_until", "size", "revalidating", "variants", "in_cache",
+    )
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        content: bytes,
+        ttl: float,
+        stale_while_revalidate: float,
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        for name, value in headers:
+            if name == "etag":
+                self.etag = value
+            elif name == "last-modified":
+                self.last_modified = value
+        self.size = len(content) + sum(len(name) + len(value) for name, value in headers)
+        self.revalidating = False
+        # Versões comprimidas do corpo por Content-Encoding
+        self.variants: Dict[str, bytes] = {}
+        self.in_cache = False
+        self.refresh(ttl, stale_while_revalidate)
+
+    def refresh(self, ttl: float, stale_while_revalidate: float) -> None:
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+        self.stale_until = self.expires_at + stale_while_revalidate
+
+    @property
+    def has_validators(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def is_stale_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+    def age(self, now: float) -> int:
+        return int(now - self.stored_at)
+
+    def not_modified(self, request_headers: Dict[str, str]) -> bool:
+        """Se a requisição condicional do cliente casa com a entrada (responde 304)"""
+        # Só há representação selecionada (RFC 9110 §13.1) em respostas 2xx
+        if not 200 <= self.status_code < 300:
+            return False
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if self.etag is None:
+                return False
+            if if_none_match.strip() == "*":
+                return True
+            # Comparação fraca: a variante comprimida tem o ETag com W/
+            etag = _opaque_tag(self.etag)
+            return any(_opaque_tag(tag) == etag for tag in if_none_match.split(","))
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            return parsedate_to_datetime(self.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+
+def _expires_ttl(headers: httpx.Headers) -> float:
+    """Validade pelo Expires, relativa ao Date da resposta; data inválida = já expirada"""
+    try:
+        expires = parsedate_to_datetime(headers["expires"])
+        date = headers.get("date")
+        if date is None:
+            return expires.timestamp() - time.time()
+        return (expires - parsedate_to_datetime(date)).total_seconds()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+class ResponseCache:
+    """
+    Cache LRU em memória de respostas do upstream, limitado em bytes e entradas.
+
+    A chave primária é (método, URL normalizada, headers configurados em
+    `key_headers`). Respostas com `Vary` geram variantes pela combinação dos
+    valores dos headers listados.
+    """
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self.stats = CacheStats()
+        self.current_bytes = 0
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._vary: "OrderedDict[CacheKey, Tuple[str, ...]]" = OrderedDict()
+        self._key_headers = tuple(h.lower() for h in config.key_headers)
+
+    def primary_key(self, method: str, url: str, headers: Dict[str, str]) -> CacheKey:
+        return (method, normalize_url(url)) + tuple(headers.get(h) for h in self._key_headers)
+
+    def _variant_key(self, primary: CacheKey, vary: Tuple[str, ...], headers: Dict[str, str]) -> CacheKey:
+        if not vary:
+            return primary
+        return primary + tuple(headers.get(h) for h in vary)
+
+    def lookup(self, primary: CacheKey, headers: Dict[str, str]) -> Tuple[CacheKey, Optional[CacheEntry]]:
+        key = self._variant_key(primary, self._vary.get(primary, ()), headers)
+        entry = self._entries.get(key)
+        if entry is None:
+            return key, None
+        if not entry.is_stale_usable(time.monotonic()) and not entry.has_validators:
+            self._remove(key)
+            self.stats.expirations += 1
+            return key, None
+        self._entries.move_to_end(key)
+        return key, entry
+
+    def ttl_for(
+        self, response: httpx.Response, request_headers: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[float, float]]:
+        """Retorna (ttl, stale_while_revalidate) ou None se a resposta não pode ser armazenada"""
+        if response.status_code not in self.config.cacheable_status:
+            return None
+        headers = response.headers
+        # Cookies são de um cliente: nunca guardados nem repetidos para outros
+        if "set-cookie" in headers or headers.get("vary", "").strip() == "*":
+            return None
+        authorized = request_headers is not None and "authorization" in request_headers
+        return self._policy(headers, authorized)
+
+    def _policy(self, headers: httpx.Headers, authorized: bool = False) -> Optional[Tuple[float, float]]:
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives or "private" in directives:
+            return None
+        if authorized and not any(name in directives for name in _SHARED_WITH_AUTHORIZATION):
+            return None
+        ttl: Optional[float] = None
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name):
+                try:
+                    ttl = float(directives[name])
+                    break
+                except ValueError:
+                    pass
+        if ttl is None and "expires" in headers:
+            ttl = _expires_ttl(headers)
+        if ttl is None and "public" in directives:
+            ttl = self.config.default_ttl
+        if ttl is None:
+            # Sem validade explícita: só guardada com validadores, revalidada a cada uso
+            ttl = stale = 0
+        else:
+            stale = self.config.stale_while_revalidate
+            if directives.get("stale-while-revalidate"):
+                try:
+                    stale = float(directives["stale-while-revalidate"])
+                except ValueError:
+                    pass
+        if "no-cache" in directives:
+            # Pode ser armazenada, mas sempre revalidada antes de ser usada
+            ttl = stale = 0
+        elif "must-revalidate" in directives or "proxy-revalidate" in directives:
+            stale = 0
+        if ttl <= 0 and stale <= 0 and "etag" not in headers and "last-modified" not in headers:
+            return None
+        return ttl, stale
+
+    def store(
+        self,
+        primary: CacheKey,
+        request_headers: Dict[str, str],
+        response: httpx.Response,
+        headers: List[Tuple[str, str]],
+    ) -> Optional[CacheEntry]:
+        policy = self.ttl_for(response, request_headers)
+        if policy is None:
+            return None
+        # Corpo grande demais para a memória (em arquivo temporário)
+        if spooled_body(response) is not None:
+            return None
+        content = response.content
+        if len(content) > self.config.max_entry_bytes:
+            return None
+
+        vary = tuple(sorted(
+            h.strip().lower() for h in response.headers.get("vary", "").split(",") if h.strip()
+        ))
+        if vary:
+            self._vary[primary] = vary
+            self._vary.move_to_end(primary)
+            if len(self._vary) > self.config.max_entries:
+                self._vary.popitem(last=False)
+        else:
+            self._vary.pop(primary, None)
+        key = self._variant_key(primary, vary, request_headers)
+
+        entry = CacheEntry(response.status_code, headers, content, *policy)
+        self._remove(key)
+        self._entries[key] = entry
+        entry.in_cache = True
+        self.current_bytes += entry.size
+        self.stats.stores += 1
+        self._evict()
+        return entry
+
+    def refresh(self, key: CacheKey, entry: CacheEntry, response: httpx.Response) -> None:
+        """Atualiza a validade de uma entrada após um 304 do upstream"""
+        # Sem Cache-Control no 304 valem as diretivas da resposta guardada
+        explicit = "cache-control" in response.headers or "expires" in response.headers
+        headers = response.headers if explicit else httpx.Headers(entry.headers)
+        policy = self._policy(headers) or (0, 0)
+        entry.refresh(*policy)
+        self.stats.revalidations += 1
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def add_variant(self, entry: CacheEntry, encoding: str, content: bytes) -> None:
+        """Guarda a versão comprimida de uma entrada (contabilizada no limite de bytes)"""
+        if not entry.in_cache or encoding in entry.variants:
+            return
+        entry.variants[encoding] = content
+        entry.size += len(content)
+        self.current_bytes += len(content)
+        self._evict()
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.in_cache = False
+            self.current_bytes -= entry.size
+
+    def _evict(self) -> None:
+        entries = self._entries
+        while entries and (
+            self.current_bytes > self.config.max_bytes or len(entries) > self.config.max_entries
+        ):
+            _, entry = entries.popitem(last=False)
+            entry.in_cache = False
+            self.current_bytes -= entry.size
+            self.stats.evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.config.max_bytes,
+        }
@@ -0,0 +1,168 @@
+from typing import AsyncIterator, Dict, List, Mapping, Optional
+import asyncio
+import zlib
+import logging
+
+from httpx._decoders import SUPPORTED_DECODERS
+
+from src.app.core.config.settings import CompressionConfig
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - extra opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - extra opcional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE_ENCODINGS = frozenset(
+    ["gzip"] + (["br"] if brotli is not None else []) + (["zstd"] if zstandard is not None else [])
+)
+
+# Status sem corpo (ou em que o corpo não deve ser alterado)
+_SKIP_STATUS = frozenset({204, 206, 304})
+
+
+def parse_accept_encoding(value: Optional[str]) -> Dict[str, float]:
+    """Converte Accept-Encoding em {codificação: q}"""
+    accepted: Dict[str, float] = {}
+    if not value:
+        return accepted
+    for part in value.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def decoded_by_httpx(content_encoding: Optional[str]) -> bool:
+    """Se o httpx decodifica essa Content-Encoding ao ler `response.content`"""
+    if not content_encoding:
+        return False
+    return all(
+        coding.strip().lower() in SUPPORTED_DECODERS
+        for coding in content_encoding.split(",") if coding.strip()
+    )
+
+
+class _Compressor:
+    """Compressor incremental de uma codificação."""
+
+    def __init__(self, encoding: str, config: CompressionConfig):
+        if encoding == "gzip":
+            compressobj = zlib.compressobj(config.gzip_level, zlib.DEFLATED, 31)
+            self.compress = compressobj.compress
+            self._flush = compressobj.flush
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=config.brotli_quality)
+            self.compress = compressor.process
+            self._flush = compressor.finish
+        elif encoding == "zstd":
+            compressobj = zstandard.ZstdCompressor(level=config.zstd_level).compressobj()
+            self.compress = compressobj.compress
+            self._flush = compressobj.flush
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+class ResponseCompressor:
+    """
+    Negociação (Accept-Encoding) e compressão das respostas de um serviço.
+
+    Corpos em memória são comprimidos de uma vez e os de streaming bloco a
+    bloco; a partir de `thread_threshold` bytes o trabalho vai para uma thread
+    para não bloquear o event loop.
+    """
+
+    def __init__(self, config: CompressionConfig):
+        self.config = config
+        self.encodings: List[str] = [e for e in config.encodings if e in AVAILABLE_ENCODINGS]
+        missing = [e for e in config.encodings if e not in AVAILABLE_ENCODINGS]
+        if missing:
+            logger.info(f"Compression encodings not available (missing packages): {missing}")
+        self._content_types = tuple(t.lower() for t in config.content_types)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Escolhe a codificação com maior q aceita pelo cliente (empate: ordem de `encodings`)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        if not accepted:
+            return None
+        wildcard = accepted.get("*", 0.0)
+        best: Optional[str] = None
+        best_q = 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def eligible(self, status_code: int, headers: Mapping[str, str], size: Optional[int]) -> bool:
+        if status_code in _SKIP_STATUS or "content-encoding" in headers:
+            return False
+        if size is not None and size < self.config.min_size:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self._content_types)
+
+    def _compress_all(self, body: bytes, encoding: str) -> bytes:
+        compressor = _Compressor(encoding, self.config)
+        return compressor.compress(body) + compressor.flush()
+
+    async def compress(self, body: bytes, encoding: str) -> bytes:
+        if len(body) >= self.config.thread_threshold:
+            return await asyncio.to_thread(self._compress_all, body, encoding)
+        return self._compress_all(body, encoding)
+
+    async def compress_stream(self, chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+        compressor = _Compressor(encoding, self.config)
+        threshold = self.config.thread_threshold
+        async for chunk in chunks:
+            if len(chunk) >= threshold:
+                data = await asyncio.to_thread(compressor.compress, chunk)
+            else:
+                data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def vary_accept_encoding(vary: Optional[str]) -> str:
+    """Valor de Vary incluindo Accept-Encoding"""
+    if not vary:
+        return "Accept-Encoding"
+    if "accept-encoding" in vary.lower():
+        return vary
+    return f"{vary}, Accept-Encoding"
+
+
+def encoded_headers(headers: Mapping[str, str], encoding: str) -> Dict[str, str]:
+    """Headers da resposta após a compressão"""
+    result = {
+        name: value for name, value in headers.items()
+        if name.lower() not in ("content-length", "content-encoding")
+    }
+    result["content-encoding"] = encoding
+    result["vary"] = vary_accept_encoding(result.pop("vary", None))
+    # A representação comprimida não é idêntica byte a byte à original
+    etag = result.get("etag")
+    if etag and not etag.startswith("W/"):
+        result["etag"] = f"W/{etag}"
+    return result
@@ -0,0 +1,46 @@
+from typing import Optional
+import math
+import httpx
+
+from src.app.core.config.settings import DeadlineConfig
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Prazo da requisição esgotado antes da resposta do upstream."""
+
+
+def parse_deadline(
+    value: Optional[str],
+    config: DeadlineConfig,
+    total: Optional[float],
+    now: float,
+) -> Optional[float]:
+    """
+    Calcula o instante limite (time.monotonic) da requisição a partir do header
+    do cliente (ms restantes) e do `timeouts.total` do serviço; vale o menor.
+    Valores inválidos no header são ignorados.
+    """
+    budget = total
+    if value is not None:
+        try:
+            client = float(value) / 1000
+        except ValueError:
+            client = math.nan
+        if not math.isnan(client):
+            client = min(max(client, 0.0), config.max_timeout)
+            budget = client if budget is None else min(budget, client)
+    return None if budget is None else now + budget
+
+
+def _clip(value: Optional[float], remaining: float) -> float:
+    return remaining if value is None else min(value, remaining)
+
+
+def attempt_timeout(base: httpx.Timeout, remaining: float) -> httpx.Timeout:
+    """Limita os timeouts de cada fase ao tempo que resta até o prazo"""
+    return httpx.Timeout(
+        connect=_clip(base.connect, remaining),
+        read=_clip(base.read, remaining),
+        write=_clip(base.write, remaining),
+        pool=_clip(base.pool, remaining),
+    )
@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+import httpx
+from starlette.responses import Response
+
+from src.app.core.config.settings import HeaderRulesConfig
+from src.app.services.proxy.compression import decoded_by_httpx
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+# Headers de conexão (RFC 9110 §7.6.1): valem só entre cliente e gateway ou
+# entre gateway e upstream, nunca são repassados
+HOP_BY_HOP = frozenset({
+    b"connection", b"keep-alive", b"proxy-connection", b"te", b"trailer",
+    b"transfer-encoding", b"upgrade", b"proxy-authenticate", b"proxy-authorization",
+})
+
+
+def _names(names) -> frozenset:
+    return frozenset(name.lower().encode("latin-1") for name in names)
+
+
+class HeaderPipeline:
+    """
+    Tratamento dos headers de um serviço, montado uma vez a partir da
+    configuração (`headers` do serviço).
+
+    Na ida, percorre uma única vez a lista de headers do scope ASGI e monta o
+    dict repassado ao upstream já sem os headers de conexão, `host` e os de
+    `request_remove`, com os de `request_set` e, se ativo, os X-Forwarded-*.
+    Na volta, gera a lista de headers ASGI da resposta direto dos headers
+    brutos do httpx, sem dicts intermediários.
+    """
+
+    __slots__ = (
+        "forwarded", "_request_drop", "_buffered_drop", "_request_set",
+        "_stream_drop", "_response_drop", "_decoded_drop", "_response_set",
+    )
+
+    def __init__(self, rules: HeaderRulesConfig):
+        self.forwarded = rules.forwarded
+        self._request_drop = HOP_BY_HOP | {b"host"} | _names(rules.request_remove)
+        # Com o corpo em memória o httpx calcula o content-length
+        self._buffered_drop = self._request_drop | {b"content-length"}
+        self._request_set = {name.lower(): value for name, value in rules.request_set.items()}
+        response_set = _names(rules.response_set)
+        self._stream_drop = HOP_BY_HOP | _names(rules.response_remove) | response_set
+        self._response_drop = self._stream_drop | {b"content-length"}
+        self._decoded_drop = self._response_drop | {b"content-encoding"}
+        self._response_set = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in rules.response_set.items()
+        ]
+
+    def request(self, scope: Mapping[str, Any], streaming: bool) -> Tuple[Dict[str, str], bool]:
+        """Headers para o upstream e se a requisição tem corpo"""
+        drop = self._request_drop if streaming else self._buffered_drop
+        headers: Dict[str, str] = {}
+        connection = host = None
+        # Vem dos headers do cliente: o content-length é descartado no modo bufferizado
+        has_body = False
+        for name, value in scope["headers"]:
+            if name in drop:
+                if name == b"connection":
+                    connection = value
+                elif name == b"host":
+                    host = value
+                elif name == b"transfer-encoding" or name == b"content-length":
+                    has_body = True
+                continue
+            if name == b"content-length":
+                has_body = True
+            key = name.decode("latin-1")
+            previous = headers.get(key)
+            if previous is None:
+                headers[key] = value.decode("latin-1")
+            else:
+                # Headers repetidos viram um só (cookies com "; ", os demais com ", ")
+                separator = "; " if key == "cookie" else ", "
+                headers[key] = previous + separator + value.decode("latin-1")
+
+        if connection is not None:
+            # Headers listados em Connection também são de conexão
+            for token in connection.decode("latin-1").split(","):
+                headers.pop(token.strip().lower(), None)
+        if self.forwarded:
+            client = scope.get("client")
+            if client:
+                prior = headers.get("x-forwarded-for")
+                headers["x-forwarded-for"] = f"{prior}, {client[0]}" if prior else client[0]
+            headers.setdefault("x-forwarded-proto", scope.get("scheme", "http"))
+            if host is not None:
+                headers.setdefault("x-forwarded-host", host.decode("latin-1"))
+        if self._request_set:
+            headers.update(self._request_set)
+        return headers, has_body
+
+    def response(self, upstream: httpx.Response, buffered: bool = True) -> RawHeaders:
+        """
+        Headers ASGI da resposta. Com `buffered`, o corpo vem de
+        `upstream.content`: o content-length é recalculado e o content-encoding
+        descartado se o httpx decodificou o corpo.
+        """
+        if not buffered:
+            drop = self._stream_drop
+        elif decoded_by_httpx(upstream.headers.get("content-encoding")):
+            drop = self._decoded_drop
+        else:
+            drop = self._response_drop
+        raw = []
+        for name, value in upstream.headers.raw:
+            name = name.lower()
+            if name not in drop:
+                raw.append((name, value))
+        if self._response_set:
+            raw.extend(self._response_set)
+        return raw
+
+
+class RawResponse(Response):
+    """Response com os headers já no formato ASGI (sem conversão de dict/media_type)."""
+
+    def __init__(self, content: bytes, status_code: int, raw_headers: RawHeaders):
+        self.status_code = status_code
+        self.body = content
+        self.background = None
+        if not (status_code < 200 or status_code in (204, 304)) and not any(
+            name == b"content-length" for name, _ in raw_headers
+        ):
+            raw_headers.append((b"content-length", str(len(content)).encode("latin-1")))
+        self.raw_headers = raw_headers
+
+
+def encode_headers(headers: Iterable[Tuple[str, str]]) -> RawHeaders:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import random
+import time
+import logging
+
+from src.app.core.config.settings import ServiceConfig
+from src.app.services.proxy.balancer import Endpoint, LoadBalancer
+from src.app.services.proxy.breaker import CircuitBreaker, CLOSED, OPEN
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """
+    Verificação ativa dos endpoints: cada endpoint é consultado em
+    `health_check.path` a cada `interval` segundos (com jitter), limitando o
+    número de verificações simultâneas. O resultado altera `endpoint.healthy`,
+    usado pelo balanceamento.
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, ServiceConfig],
+        balancers: Callable[[], Dict[str, LoadBalancer]],
+        max_concurrency: int = 10,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self.services = services
+        self._balancers = balancers
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._on_change = on_change
+        self._tasks: List[asyncio.Task] = []
+        self._random = random.Random()
+
+    def start(self) -> None:
+        for name, balancer in self._balancers().items():
+            check = self.services[name].health_check
+            if not check.enabled:
+                continue
+            for endpoint in balancer.endpoints:
+                self._tasks.append(asyncio.create_task(self._run(name, endpoint)))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, service: str, endpoint: Endpoint) -> None:
+        check = self.services[service].health_check
+        while True:
+            jitter = check.interval * check.jitter
+            await asyncio.sleep(check.interval + self._random.uniform(-jitter, jitter))
+            async with self._semaphore:
+                healthy = await self._probe(service, endpoint)
+            self._record(service, endpoint, healthy)
+
+    async def _probe(self, service: str, endpoint: Endpoint) -> bool:
+        check = self.services[service].health_check
+        try:
+            response = await endpoint.pool.client.get(endpoint.url + check.path, timeout=check.timeout)
+            return response.status_code in check.expected_status
+        except Exception as e:
+            logger.debug(f"Health check failed for {service} ({endpoint.url}): {e}")
+            return False
+
+    def _record(self, service: str, endpoint: Endpoint, healthy: bool) -> None:
+        check = self.services[service].health_check
+        if healthy:
+            endpoint.check_failures = 0
+            endpoint.check_successes += 1
+            if not endpoint.healthy and endpoint.check_successes >= check.healthy_threshold:
+                endpoint.healthy = True
+                logger.info(f"Endpoint {endpoint.url} of service {service} is healthy again")
+                self._changed()
+        else:
+            endpoint.check_successes = 0
+            endpoint.check_failures += 1
+            if endpoint.healthy and endpoint.check_failures >= check.unhealthy_threshold:
+                endpoint.healthy = False
+                logger.warning(f"Endpoint {endpoint.url} of service {service} marked unhealthy")
+                self._changed()
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+
+class HealthState:
+    """
+    Resumo de saúde dos serviços mantido em memória. O snapshot só é
+    recalculado quando algo muda (ou quando vence uma ejeção ou o tempo de
+    circuito aberto), então a consulta do /health não faz I/O nem percorre os
+    endpoints a cada chamada.
+
+    Um serviço fica `unhealthy` sem endpoints disponíveis (verificação ativa
+    ou falhas do tráfego real) ou com o circuito aberto, e `degraded` com o
+    circuito em half-open.
+    """
+
+    def __init__(
+        self,
+        balancers: Callable[[], Dict[str, LoadBalancer]],
+        breakers: Callable[[], Dict[str, CircuitBreaker]],
+    ):
+        self._balancers = balancers
+        self._breakers = breakers
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._valid_until = 0.0
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._snapshot is None or now >= self._valid_until:
+            self._snapshot, self._valid_until = self._build(now)
+        return self._snapshot
+
+    def _build(self, now: float):
+        services: Dict[str, Any] = {}
+        valid_until = float("inf")
+        breakers = self._breakers()
+        for name, balancer in self._balancers().items():
+            endpoints = []
+            for endpoint in balancer.endpoints:
+                if endpoint.ejected_until > now:
+                    valid_until = min(valid_until, endpoint.ejected_until)
+                endpoints.append({
+                    "url": endpoint.url,
+                    "healthy": endpoint.healthy,
+                    "ejected": endpoint.ejected_until > now,
+                })
+            available = sum(1 for endpoint in balancer.endpoints if endpoint.is_available(now))
+            breaker = breakers.get(name)
+            circuit = breaker.current_state(now) if breaker is not None else CLOSED
+            if circuit == OPEN:
+                valid_until = min(valid_until, breaker.opened_at + breaker.config.open_duration)
+            if not available or circuit == OPEN:
+                service_status = "unhealthy"
+            elif circuit != CLOSED:
+                service_status = "degraded"
+            else:
+                service_status = "healthy"
+            services[name] = {
+                "status": service_status,
+                "available_endpoints": available,
+                "circuit": circuit,
+                "endpoints": endpoints,
+            }
+        statuses = [service["status"] for service in services.values()]
+        if all(status == "healthy" for status in statuses):
+            status = "healthy"
+        elif all(status == "unhealthy" for status in statuses):
+            status = "unhealthy"
+        else:
+            status = "degraded"
+        return {"status": status, "services": services}, valid_until
@@ -0,0 +1,316 @@
+from typing import Dict, Any, Optional, Tuple
+import time
+import asyncio
+import logging
+import httpx
+
+from src.app.core.config.settings import ServiceConfig
+from src.app.core.timing import RequestTiming
+
+logger = logging.getLogger(__name__)
+
+# O estado das conexões (usado pelo pré-aquecimento e pelo snapshot) não tem API
+# pública no httpx: vem de `AsyncClient._transport._pool.connections` e, em cada
+# conexão, de `_connection._expire_at` (conferidos no httpx 0.28 / httpcore 1.0).
+# Se uma versão nova mudar esses atributos, o pré-aquecimento vira no-op (com um
+# aviso, uma vez) em vez de renovar conexões sem parar ou quebrar o proxy.
+_internals_warned = False
+_MISSING = object()
+
+
+def _internals_unavailable(what: str) -> None:
+    global _internals_warned
+    if not _internals_warned:
+        _internals_warned = True
+        logger.warning(
+            f"Connection pool state unavailable ({what} not found in httpx/httpcore "
+            f"{getattr(httpx, '__version__', '?')}); prewarm disabled"
+        )
+
+
+class PoolStats:
+    """Contadores de uso do pool de conexões de um upstream."""
+
+    __slots__ = (
+        "requests", "in_flight", "max_in_flight", "outstanding", "wait_total", "wait_max", "errors",
+        "warm_requests", "warm_errors",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        # Aguardando os headers da resposta
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Do envio até a resposta ser fechada (corpo lido ou repassado); o pool só fecha com 0
+        self.outstanding = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.errors = 0
+        # Requisições de pré-aquecimento (fora de `requests`)
+        self.warm_requests = 0
+        self.warm_errors = 0
+
+    def record_wait(self, elapsed: float) -> None:
+        self.wait_total += elapsed
+        if elapsed > self.wait_max:
+            self.wait_max = elapsed
+
+
+class _RequestTrace:
+    """
+    Callback de trace do httpcore que mede as fases da chamada ao upstream.
+
+    O primeiro evento emitido pela conexão marca o fim da espera no pool; os
+    demais alimentam o RequestTiming da requisição (quando houver) e, se ela
+    estiver na amostra do tracing, viram spans filhos da tentativa.
+    """
+
+    __slots__ = (
+        "stats", "timing", "span", "started", "acquired",
+        "connect_started", "tls_started", "request_started", "body_started",
+    )
+
+    def __init__(self, stats: PoolStats, timing: Optional[RequestTiming]):
+        self.stats = stats
+        self.timing = timing
+        trace = timing.trace if timing is not None else None
+        self.span = trace.current if trace is not None else None
+        self.started = time.perf_counter()
+        self.acquired = False
+        self.connect_started: Optional[float] = None
+        self.tls_started: Optional[float] = None
+        self.request_started: Optional[float] = None
+        self.body_started: Optional[float] = None
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        span = self.span
+        if not self.acquired:
+            self.acquired = True
+            wait = now - self.started
+            self.stats.record_wait(wait)
+            if self.timing is not None:
+                self.timing.pool_wait = wait
+            if span is not None:
+                span.child("pool.acquire", self.started, now)
+        timing = self.timing
+        if timing is None:
+            return
+
+        if event_name == "connection.connect_tcp.started":
+            self.connect_started = now
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if self.connect_started is not None:
+                timing.upstream_connect = now - self.connect_started
+            if span is not None:
+                if event_name == "connection.start_tls.complete":
+                    span.child("upstream.tls_handshake", self.tls_started or now, now)
+                elif self.connect_started is not None:
+                    span.child("upstream.connect", self.connect_started, now)
+        elif event_name == "connection.start_tls.started":
+            self.tls_started = now
+        elif event_name.endswith("send_request_headers.started"):
+            self.request_started = now
+        elif event_name.endswith("receive_response_headers.complete"):
+            timing.upstream_ttfb = now - self.started
+            if span is not None and self.request_started is not None:
+                span.child("upstream.wait", self.request_started, now)
+        elif event_name.endswith("receive_response_body.started"):
+            self.body_started = now
+        elif event_name.endswith("receive_response_body.complete"):
+            if self.body_started is not None:
+                timing.upstream_body = now - self.body_started
+                if span is not None:
+                    span.child("upstream.body", self.body_started, now)
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Corpo da resposta que conta em `PoolStats.outstanding` até ser fechado"""
+
+    __slots__ = ("_stream", "_stats")
+
+    def __init__(self, stream: httpx.AsyncByteStream, stats: PoolStats):
+        self._stream = stream
+        self._stats = stats
+
+    def __aiter__(self):
+        return self._stream.__aiter__()
+
+    async def aclose(self) -> None:
+        stats, self._stats = self._stats, None
+        try:
+            await self._stream.aclose()
+        finally:
+            if stats is not None:
+                stats.outstanding -= 1
+
+
+class UpstreamPool:
+    """Cliente HTTP persistente (com pool de conexões) para um upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        service_config: ServiceConfig,
+        client_config: Dict[str, Any],
+        url: Optional[str] = None,
+    ):
+        self.name = name
+        self.url = url or service_config.url
+        self.service_config = service_config
+        pool_config = service_config.pool
+        self.stats = PoolStats()
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_config.max_connections,
+                max_keepalive_connections=pool_config.max_keepalive_connections,
+                keepalive_expiry=pool_config.keepalive_expiry,
+            ),
+            http2=pool_config.http2,
+            **client_config
+        )
+
+    async def send(
+        self,
+        request: httpx.Request,
+        stream: bool = False,
+        timing: Optional[RequestTiming] = None,
+    ) -> httpx.Response:
+        stats = self.stats
+        request.extensions["trace"] = _RequestTrace(stats, timing)
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.outstanding += 1
+        if stats.in_flight > stats.max_in_flight:
+            stats.max_in_flight = stats.in_flight
+        response = None
+        try:
+            response = await self.client.send(request, stream=stream)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            if response is None:
+                stats.outstanding -= 1
+        if stream and not response.is_closed:
+            # A conexão continua em uso até o corpo ser lido ou a resposta fechada
+            response.stream = _TrackedStream(response.stream, stats)
+        else:
+            stats.outstanding -= 1
+        return response
+
+    def _connections(self) -> Optional[list]:
+        """Conexões do pool do httpcore; None se não dá para inspecioná-las"""
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            _internals_unavailable("AsyncClient._transport._pool.connections")
+            return None
+        return list(connections)
+
+    def warm_state(self, refresh_after: float) -> Optional[Tuple[int, int]]:
+        """
+        (conexões em uso, conexões ociosas há menos de `refresh_after` s).
+        Conexões ainda abrindo contam como em uso; fechadas ou expiradas
+        não contam. None se o estado do pool não está disponível.
+        """
+        connections = self._connections()
+        if connections is None:
+            return None
+        keepalive_expiry = self.service_config.pool.keepalive_expiry
+        now = time.monotonic()
+        busy = fresh = 0
+        for conn in connections:
+            if conn.is_closed() or conn.has_expired():
+                continue
+            if not conn.is_idle():
+                busy += 1
+                continue
+            # httpcore guarda quando a conexão ociosa expira; daí o tempo ociosa
+            expire_at = getattr(getattr(conn, "_connection", None), "_expire_at", _MISSING)
+            if expire_at is _MISSING:
+                _internals_unavailable("_connection._expire_at")
+                return None
+            idle_for = keepalive_expiry - (expire_at - now) if expire_at is not None else 0.0
+            if idle_for < refresh_after:
+                fresh += 1
+        return busy, fresh
+
+    async def warm(self, count: int, method: str, path: str, timeout: float) -> int:
+        """
+        Abre (ou renova) `count` conexões com requisições leves simultâneas.
+        Cada resposta segura sua conexão até todas chegarem, então cada
+        requisição usa uma conexão distinta. Retorna quantas deram certo.
+        """
+        url = self.url.rstrip("/") + path
+        results = await asyncio.gather(
+            *(
+                self.client.send(self.client.build_request(method, url, timeout=timeout), stream=True)
+                for _ in range(count)
+            ),
+            return_exceptions=True,
+        )
+        warmed = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.debug(f"Prewarm request failed for {self.name} ({self.url}): {result}")
+                continue
+            try:
+                await result.aread()
+                warmed += 1
+            except httpx.HTTPError as e:
+                logger.debug(f"Prewarm request failed for {self.name} ({self.url}): {e}")
+            finally:
+                await result.aclose()
+        self.stats.warm_requests += warmed
+        self.stats.warm_errors += count - warmed
+        return warmed
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.stats
+        connections = self._connections()
+        if connections is None:
+            total = idle = None
+        else:
+            total = len(connections)
+            idle = sum(1 for conn in connections if conn.is_idle())
+        pool_config = self.service_config.pool
+        return {
+            "max_connections": pool_config.max_connections,
+            "max_keepalive_connections": pool_config.max_keepalive_connections,
+            "keepalive_expiry": pool_config.keepalive_expiry,
+            "http2": pool_config.http2,
+            "connections": total,
+            "active_connections": total - idle if total is not None else None,
+            "idle_connections": idle,
+            "requests": stats.requests,
+            "in_flight": stats.in_flight,
+            "max_in_flight": stats.max_in_flight,
+            "outstanding": stats.outstanding,
+            "errors": stats.errors,
+            "warm_requests": stats.warm_requests,
+            "warm_errors": stats.warm_errors,
+            "wait_avg_ms": (stats.wait_total / stats.requests * 1000) if stats.requests else 0.0,
+            "wait_max_ms": stats.wait_max * 1000,
+        }
+
+    async def drain_and_close(self, timeout: float = 30.0, poll_interval: float = 0.1) -> None:
+        """
+        Aguarda (até `timeout`) as requisições em andamento, inclusive as
+        respostas cujo corpo ainda está sendo lido ou repassado, e fecha o cliente
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.stats.outstanding and loop.time() < deadline:
+            await asyncio.sleep(poll_interval)
+        if self.stats.outstanding:
+            logger.warning(
+                f"Closing upstream pool for service {self.name} ({self.url}) "
+                f"with {self.stats.outstanding} responses still open after {timeout}s"
+            )
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        logger.info(f"Closed upstream pool for service {self.name} ({self.url})")
@@ -0,0 +1,137 @@
+from typing import Any, Callable, Dict, List
+import asyncio
+import random
+import time
+import logging
+
+from src.app.core.config.settings import ServiceConfig
+from src.app.services.proxy.balancer import Endpoint, LoadBalancer
+
+logger = logging.getLogger(__name__)
+
+
+class PoolWarmer:
+    """
+    Pré-aquecimento dos pools: para cada endpoint de serviços com
+    `prewarm.min_connections`, abre as conexões (TCP/TLS) no startup e as
+    mantém abertas, renovando com uma requisição leve as que estão ociosas
+    há mais de `refresh_ratio` do keep-alive (o menor entre o do pool e o do
+    upstream), antes que um dos lados as feche.
+
+    `ready` fica verdadeiro quando todos os endpoints passaram pela primeira
+    rodada (com ou sem sucesso: falhas aparecem no health do endpoint).
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, ServiceConfig],
+        balancers: Callable[[], Dict[str, LoadBalancer]],
+        max_concurrency: int = 10,
+    ):
+        self.services = services
+        self._balancers = balancers
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: List[asyncio.Task] = []
+        self._pending = 0
+        self._ready = asyncio.Event()
+        self._random = random.Random()
+        # Conexões aquecidas por serviço e endpoint após a última rodada
+        self.connections: Dict[str, Dict[str, int]] = {}
+        self.targets: Dict[str, int] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        for name, balancer in self._balancers().items():
+            target = self._target(self.services[name])
+            if not target:
+                continue
+            self.targets[name] = target * len(balancer.endpoints)
+            self.connections[name] = {endpoint.url: 0 for endpoint in balancer.endpoints}
+            for endpoint in balancer.endpoints:
+                self._tasks.append(asyncio.create_task(self._run(name, endpoint)))
+        self._pending = len(self._tasks)
+        if not self._pending:
+            self._ready.set()
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Espera a primeira rodada (até `timeout` s); retorna se terminou"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "services": {
+                name: {"target": target, "connections": sum(self.connections[name].values())}
+                for name, target in self.targets.items()
+            },
+        }
+
+    @staticmethod
+    def _target(service_config: ServiceConfig) -> int:
+        # Com HTTP/2 as requisições são multiplexadas numa única conexão
+        min_connections = service_config.prewarm.min_connections
+        return min(min_connections, 1) if service_config.pool.http2 else min_connections
+
+    @staticmethod
+    def _refresh_after(service_config: ServiceConfig) -> float:
+        prewarm = service_config.prewarm
+        keepalive = service_config.pool.keepalive_expiry
+        if prewarm.upstream_keepalive is not None:
+            keepalive = min(keepalive, prewarm.upstream_keepalive)
+        return keepalive * prewarm.refresh_ratio
+
+    async def _run(self, service: str, endpoint: Endpoint) -> None:
+        first = True
+        while True:
+            async with self._semaphore:
+                supported = await self._warm(service, endpoint)
+            if first:
+                first = False
+                self._pending -= 1
+                if not self._pending:
+                    self._ready.set()
+                    logger.info(f"Upstream pools warm for services: {list(self.targets)}")
+            if not supported:
+                # Sem o estado das conexões (ver pool.py) não há o que renovar
+                return
+            # Meio intervalo de renovação: cada conexão é renovada antes do keep-alive
+            interval = self._refresh_after(self.services[service]) / 2
+            await asyncio.sleep(interval * self._random.uniform(0.9, 1.1))
+
+    async def _warm(self, service: str, endpoint: Endpoint) -> bool:
+        """Uma rodada do endpoint; False se o pool não expõe o estado das conexões"""
+        service_config = self.services[service]
+        # Lido a cada rodada: o pool é trocado quando os certificados mTLS mudam
+        pool = endpoint.pool
+        target = self._target(service_config)
+        refresh_after = self._refresh_after(service_config)
+        state = pool.warm_state(refresh_after)
+        if state is None:
+            return False
+        busy, fresh = state
+        # Instâncias fora do balanceamento não recebem tráfego
+        if busy + fresh < target and endpoint.is_available(time.monotonic()):
+            prewarm = service_config.prewarm
+            try:
+                await pool.warm(target - busy, prewarm.method, prewarm.path, prewarm.timeout)
+            except Exception as e:
+                logger.debug(f"Prewarm failed for {service} ({endpoint.url}): {e}")
+            state = pool.warm_state(refresh_after)
+            if state is None:
+                return False
+            busy, fresh = state
+        self.connections[service][endpoint.url] = min(busy + fresh, target)
+        return True
@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import time
+import logging
+from fastapi import Request, Response
+
+from src.app.core.config.settings import Settings, ServiceConfig, settings
+from src.app.core.metrics import Sample
+from src.app.core.security.api_key import api_key_store
+from src.app.core.security.mtls import MTLSConfig
+from src.app.services.proxy.service import ProxyService, load_mtls_config
+
+logger = logging.getLogger(__name__)
+
+
+def enabled_services(services: Dict[str, ServiceConfig]) -> Dict[str, Dict[str, Any]]:
+    """Configuração (em dict) dos serviços habilitados, no formato aceito pelo ProxyService"""
+    return {
+        name: service.model_dump()
+        for name, service in services.items()
+        if service.enabled
+    }
+
+
+class ReloadableProxyService:
+    """
+    Mantém o ProxyService atual (um snapshot versionado da configuração dos
+    serviços) e o troca atomicamente quando os YAMLs mudam.
+
+    Cada requisição usa o snapshot vigente no momento em que chegou, então as
+    requisições em andamento terminam no snapshot antigo. Pools, caches e
+    circuit breakers de serviços que não mudaram passam para o novo snapshot.
+    Os demais atributos são delegados ao snapshot atual.
+
+    O primeiro snapshot só é montado em `startup` (lifespan da aplicação):
+    importar o módulo não cria pools, contextos TLS nem lê arquivos.
+    """
+
+    def __init__(self, services_config: Optional[Dict[str, Dict[str, Any]]] = None):
+        # Sem configuração explícita, usa os serviços habilitados de `settings` no startup
+        self._services_config = services_config
+        self.current: Optional[ProxyService] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._fingerprint: Optional[List] = None
+        self._mtls_config: Optional[MTLSConfig] = None
+        self._preloaded = False
+
+    def __getattr__(self, name: str) -> Any:
+        current = self.__dict__.get("current")
+        if current is None:
+            raise AttributeError(f"{name} (proxy service not started)")
+        return getattr(current, name)
+
+    async def forward_request(self, service: str, path: str, request: Request) -> Response:
+        return await self.current.forward_request(service, path, request)
+
+    def collect_metrics(self) -> Iterable[Sample]:
+        if self.current is None:
+            return
+        yield from self.current.collect_metrics()
+        yield ("gateway_config_version", "gauge", "Version of the active services configuration",
+               [({}, self.current.version)])
+
+    def preload(self) -> None:
+        """
+        Lê os certificados mTLS (montando o SSLContext) e as chaves de API antes
+        do startup. O launcher chama no processo mestre, antes do fork: os
+        workers herdam esse estado e o primeiro snapshot não relê os arquivos.
+        """
+        self._mtls_config = load_mtls_config()
+        self._preloaded = True
+        api_key_store.load()
+
+    async def startup(self) -> None:
+        if self.current is None:
+            services_config = self._services_config
+            if services_config is None:
+                services_config = enabled_services(settings.services)
+            self.current = ProxyService(services_config, mtls_config=self._mtls_config, mtls_loaded=self._preloaded)
+            self.loaded_at = time.time()
+        await self.current.startup()
+        if settings.config_reload.enabled:
+            self._fingerprint = Settings.config_fingerprint()
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def shutdown(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self.current is not None:
+            await self.current.shutdown()
+
+    async def reload(self, services_config: Dict[str, Dict[str, Any]]) -> int:
+        """Monta um novo snapshot, ativa-o e desativa o anterior; retorna a nova versão"""
+        async with self._lock:
+            previous = self.current
+            successor = ProxyService(services_config, previous=previous)
+            await successor.startup()
+            self.current = successor
+            self.loaded_at = time.time()
+            await previous.retire(successor)
+        logger.info(f"Services configuration reloaded (version {successor.version}): {list(successor.services)}")
+        return successor.version
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "version": self.current.version,
+            "loaded_at": self.loaded_at,
+            "services": list(self.current.services),
+        }
+
+    async def _watch(self) -> None:
+        """Verifica os YAMLs a cada `config_reload.interval` segundos"""
+        while True:
+            await asyncio.sleep(settings.config_reload.interval)
+            fingerprint = Settings.config_fingerprint()
+            if fingerprint == self._fingerprint:
+                continue
+            self._fingerprint = fingerprint
+            try:
+                # Valida a configuração inteira antes de trocar; se falhar, mantém a atual
+                new_settings = Settings(**await asyncio.to_thread(Settings.load_config))
+            except Exception as e:
+                logger.error(f"Invalid configuration, keeping version {self.current.version}: {e}")
+                continue
+            try:
+                await self.reload(enabled_services(new_settings.services))
+                settings.services = new_settings.services
+                settings.batch = new_settings.batch
+            except Exception as e:
+                logger.error(f"Error reloading services configuration: {e}", exc_info=True)
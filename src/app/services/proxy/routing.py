@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from src.app.core.config.settings import ServiceConfig, RouteConfig
+
+logger = logging.getLogger(__name__)
+
+
+class _CompiledRule:
+    """Regra de reescrita compilada: template do path no upstream já separado em partes."""
+
+    __slots__ = ("methods", "parts", "streaming")
+
+    def __init__(self, route: RouteConfig):
+        self.methods = frozenset(m.upper() for m in route.methods) or None
+        self.streaming = route.streaming
+        # Partes alternadas: (True, nome_param) ou (False, literal)
+        self.parts: List[Tuple[bool, str]] = []
+        rewrite = "/" + route.rewrite.strip("/") if route.rewrite.strip("/") else ""
+        for index, chunk in enumerate(rewrite.replace("}", "{").split("{")):
+            if chunk:
+                self.parts.append((index % 2 == 1, chunk))
+
+    def render(self, params: Dict[str, str]) -> str:
+        return "".join(params[value] if is_param else value for is_param, value in self.parts)
+
+
+class _Node:
+    __slots__ = ("children", "param_child", "param_name", "rules")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param_child: Optional["_Node"] = None
+        self.param_name: Optional[str] = None
+        self.rules: List[_CompiledRule] = []
+
+    def match_rule(self, method: str) -> Optional[_CompiledRule]:
+        fallback = None
+        for rule in self.rules:
+            if rule.methods is None:
+                fallback = fallback or rule
+            elif method in rule.methods:
+                return rule
+        return fallback
+
+
+class ResolvedRoute:
+    # `path` é relativo à URL base do endpoint escolhido (inclui a query string)
+    __slots__ = ("path", "streaming")
+
+    def __init__(self, path: str, streaming: Optional[bool]):
+        self.path = path
+        self.streaming = streaming
+
+
+class _ServiceRoutes:
+    """Trie de segmentos de path para as regras de um serviço."""
+
+    def __init__(self, name: str, service_config: ServiceConfig, api_prefix: str):
+        prefix_segments = [s for s in api_prefix.split("/") if s]
+        upstream_prefix = service_config.upstream_prefix
+        if upstream_prefix is None:
+            upstream_prefix = "/".join(prefix_segments + [name])
+        upstream_prefix = upstream_prefix.strip("/")
+        self.default_base = f"/{upstream_prefix}" if upstream_prefix else ""
+        # Segmentos redundantes que o cliente pode repetir no path (compatibilidade)
+        self.redundant_prefix = prefix_segments
+        self.name = name
+        self.root = _Node()
+        for route in service_config.routes:
+            self._insert(route)
+
+    def _insert(self, route: RouteConfig) -> None:
+        node = self.root
+        for segment in route.path.strip("/").split("/"):
+            if not segment:
+                continue
+            if segment.startswith("{") and segment.endswith("}"):
+                name = segment[1:-1]
+                if node.param_child is None:
+                    node.param_child = _Node()
+                    node.param_name = name
+                elif node.param_name != name:
+                    raise ValueError(
+                        f"Conflicting path parameters '{node.param_name}' and '{name}' in routes of service {self.name}"
+                    )
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.rules.append(_CompiledRule(route))
+
+    def _strip_redundant(self, segments: List[str]) -> int:
+        start = 0
+        prefix = self.redundant_prefix
+        if prefix and segments[:len(prefix)] == prefix:
+            start = len(prefix)
+        if start < len(segments) and segments[start] == self.name:
+            start += 1
+        return start
+
+    def resolve(self, method: str, path: str) -> ResolvedRoute:
+        segments = path.strip("/").split("/") if path else []
+        if "" in segments:
+            segments = [s for s in segments if s]
+        start = self._strip_redundant(segments) if segments else 0
+
+        # Busca gulosa no trie (literal antes de parâmetro), guardando a regra mais profunda
+        node = self.root
+        params: Dict[str, str] = {}
+        best_rule = node.match_rule(method) if node.rules else None
+        best_depth = start
+        depth = start
+        count = len(segments)
+        while depth < count:
+            segment = segments[depth]
+            child = node.children.get(segment)
+            if child is None:
+                child = node.param_child
+                if child is None:
+                    break
+                params[node.param_name] = segment
+            node = child
+            depth += 1
+            if node.rules:
+                rule = node.match_rule(method)
+                if rule is not None:
+                    best_rule, best_depth = rule, depth
+
+        rest = "/".join(segments[best_depth:]) if best_depth < count else ""
+        if best_rule is None:
+            path = f"{self.default_base}/{rest}" if rest else self.default_base
+            return ResolvedRoute(path, None)
+        target = best_rule.render(params)
+        if rest:
+            target = f"{target}/{rest}"
+        return ResolvedRoute(target or "/", best_rule.streaming)
+
+
+class RouteTable:
+    """
+    Tabela de rotas compilada a partir de `settings.services`.
+
+    Resolve (serviço, método, path) para o path no upstream percorrendo o path
+    uma única vez, sem reprocessar as configurações a cada requisição.
+    """
+
+    def __init__(self, services: Dict[str, ServiceConfig], api_prefix: str):
+        self._services: Dict[str, _ServiceRoutes] = {
+            name: _ServiceRoutes(name, service_config, api_prefix)
+            for name, service_config in services.items()
+        }
+
+    def __contains__(self, service: str) -> bool:
+        return service in self._services
+
+    def resolve(self, service: str, method: str, path: str, query_string: bytes = b"") -> ResolvedRoute:
+        resolved = self._services[service].resolve(method, path)
+        if query_string:
+            resolved.path = f"{resolved.path}?{query_string.decode('latin-1')}"
+        return resolved
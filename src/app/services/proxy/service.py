@@ -1,110 +1,331 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from functools import lru_cache
+import asyncio
+import math
+import time
 from fastapi import Request, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import MutableHeaders
+from starlette.types import Scope
 import httpx
 import logging
 from pathlib import Path
 import ssl
 from src.app.core.config.settings import settings, ServiceConfig
 from src.app.core.security.mtls import MTLSConfig
+from src.app.core.timing import RequestTiming, TIMING_SCOPE_KEY
+from src.app.core.tracing import KIND_CLIENT, TRACE_SCOPE_KEY, stage
+from src.app.core.security.middleware import CLIENT_IP_SCOPE_KEY
+from src.app.core.security.api_key import APIKeyInfo, api_key_store
+from src.app.core.security.ratelimit import (
+    ConcurrencyLimiter, ConcurrencyPermit, RateLimiter, RateLimitExceeded, RATE_LIMITED
+)
+from src.app.core.metrics import Sample
+from src.app.core.logs import RequestLog
+from src.app.services.proxy.pool import UpstreamPool
+from src.app.services.proxy.routing import RouteTable
+from src.app.services.proxy.cache import (
+    ResponseCache, CacheEntry, CacheKey, NOT_MODIFIED_HEADERS, parse_cache_control, normalize_url
+)
+from src.app.services.proxy.singleflight import SingleFlight
+from src.app.services.proxy.balancer import Endpoint, LoadBalancer
+from src.app.services.proxy.health import HealthChecker, HealthState
+from src.app.services.proxy.prewarm import PoolWarmer
+from src.app.services.proxy.breaker import (
+    CircuitBreaker, CircuitOpenError, RetryBudget, backoff_delay, RETRIES, RETRIES_DENIED
+)
+from src.app.services.proxy.deadline import DeadlineExceeded, attempt_timeout, parse_deadline
+from src.app.services.proxy.headers import HeaderPipeline, RawResponse, encode_headers
+from src.app.services.proxy.body import (
+    BodyTooLarge, ResponseTooLarge, SpooledBody, check_length, limit_stream, read_body, read_response, spooled_body
+)
+from src.app.services.proxy.compression import (
+    ResponseCompressor, encoded_headers, vary_accept_encoding
+)
 
 logger = logging.getLogger(__name__)
 
+CACHEABLE_METHODS = frozenset({"GET", "HEAD"})
+
+
+@lru_cache(maxsize=1)
+def _insecure_ssl_context() -> ssl.SSLContext:
+    """
+    Contexto sem verificação (verify=False) compartilhado pelos pools sem
+    mTLS: o httpx criaria um por cliente.
+    """
+    return httpx.create_ssl_context(verify=False)
+
+
+def load_mtls_config() -> Optional[MTLSConfig]:
+    """Configura mTLS se os certificados estiverem disponíveis (lê o disco)"""
+    try:
+        # Verifica se mTLS está habilitado nas configurações
+        if not settings.mtls.enabled:  # Mudança aqui: acessando diretamente o atributo
+            logger.info("mTLS is not enabled in settings")
+            return None
+
+        cert_path = Path(settings.mtls.cert_path)
+        key_path = Path(settings.mtls.key_path)
+        ca_path = Path(settings.mtls.ca_path)
+
+        # Verifica se todos os arquivos necessários existem
+        if all(p.exists() for p in [cert_path, key_path, ca_path]):
+            mtls_config = MTLSConfig(
+                cert_path=cert_path,
+                key_path=key_path,
+                ca_path=ca_path
+            )
+            # Monta o SSLContext aqui, não no primeiro pool
+            mtls_config.get_ssl_context()
+            logger.info("mTLS configuration loaded successfully")
+            return mtls_config
+        logger.warning("mTLS certificates not found, running without mTLS")
+    except Exception as e:
+        logger.error(f"Error setting up mTLS: {e}")
+    return None
+
+
 class ProxyService:
-    def __init__(self, services_config: Dict[str, Dict[str, Any]]):
+    def __init__(
+        self,
+        services_config: Dict[str, Dict[str, Any]],
+        previous: Optional["ProxyService"] = None,
+        mtls_config: Optional[MTLSConfig] = None,
+        mtls_loaded: bool = False,
+    ):
         # Convertendo cada configuração para ServiceConfig
         self.services: Dict[str, ServiceConfig] = {}
-        self.mtls_config: Optional[MTLSConfig] = None
+        self.balancers: Dict[str, LoadBalancer] = {}
+        self._background_tasks: set = set()
+        self._mtls_reload_task: Optional[asyncio.Task] = None
+        self._api_keys_reload_task: Optional[asyncio.Task] = None
+        # Versão do snapshot de configuração (incrementada a cada reload)
+        self.version = previous.version + 1 if previous is not None else 1
 
-        # Inicializar mTLS se configurado
-        self._setup_mtls()
+        # mTLS: carregado em startup (lê o disco), a não ser que já venha
+        # carregado (`mtls_loaded`, pelo processo mestre); os snapshots seguintes herdam
+        if previous is not None:
+            self.mtls_config = previous.mtls_config
+        else:
+            self.mtls_config = mtls_config
+        self._mtls_loaded = previous is not None or mtls_loaded
 
         for service_name, config in services_config.items():
             try:
-                self.services[service_name] = ServiceConfig(
-                    url=config['url'],
-                    api_key=config.get('api_key'),
-                    timeout=config.get('timeout', 30),
-                    enabled=config.get('enabled', True),
-                    require_mtls=config.get('require_mtls', False)
-                )
-                logger.debug(f"Initialized service {service_name} with config: {config}")
+                self.services[service_name] = ServiceConfig(**config)
+                logger.debug(f"Initialized service {service_name}")
             except Exception as e:
                 logger.error(f"Error initializing service {service_name}: {e}")
                 raise
 
-    def _setup_mtls(self) -> None:
-        """Configura mTLS se os certificados estiverem disponíveis"""
-        try:
-            # Verifica se mTLS está habilitado nas configurações
-            if not settings.mtls.enabled:  # Mudança aqui: acessando diretamente o atributo
-                logger.info("mTLS is not enabled in settings")
-                return
-
-            cert_path = Path(settings.mtls.cert_path)
-            key_path = Path(settings.mtls.key_path)
-            ca_path = Path(settings.mtls.ca_path)
-
-            # Verifica se todos os arquivos necessários existem
-            if all(p.exists() for p in [cert_path, key_path, ca_path]):
-                self.mtls_config = MTLSConfig(
-                    cert_path=cert_path,
-                    key_path=key_path,
-                    ca_path=ca_path
+        # Tabela de rotas compilada uma única vez a partir das configurações
+        self.routes = RouteTable(self.services, settings.API_V1_STR)
+        self.caches: Dict[str, ResponseCache] = {
+            name: ResponseCache(service_config.cache)
+            for name, service_config in self.services.items()
+            if service_config.cache.enabled
+        }
+        self.health_state = HealthState(lambda: self.balancers, lambda: self.breakers)
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name, service_config.circuit_breaker, on_change=self.health_state.invalidate)
+            for name, service_config in self.services.items()
+        }
+        self.retry_budget = RetryBudget(settings.retry_budget)
+        self.deadline_config = settings.deadline
+        self.rate_limiter = RateLimiter(settings.rate_limit)
+        self.concurrency: Dict[str, ConcurrencyLimiter] = {
+            name: ConcurrencyLimiter(service_config.limits.max_concurrent)
+            for name, service_config in self.services.items()
+            if service_config.limits.max_concurrent is not None
+        }
+        self.timeouts: Dict[str, httpx.Timeout] = {
+            name: self._build_timeout(service_config) for name, service_config in self.services.items()
+        }
+        self.health_checker = HealthChecker(
+            self.services,
+            lambda: self.balancers,
+            max_concurrency=settings.health_checks.max_concurrency,
+            on_change=self.health_state.invalidate
+        )
+        self.warmer = PoolWarmer(
+            self.services, lambda: self.balancers, max_concurrency=settings.prewarm.max_concurrency
+        )
+        self.single_flights: Dict[str, SingleFlight] = {
+            name: SingleFlight()
+            for name, service_config in self.services.items()
+            if service_config.coalescing.enabled
+        }
+        self.header_pipelines: Dict[str, HeaderPipeline] = {
+            name: HeaderPipeline(service_config.headers) for name, service_config in self.services.items()
+        }
+        self.request_log = RequestLog(logger, settings.logging.sample_rate)
+        self.compressors: Dict[str, ResponseCompressor] = {
+            name: ResponseCompressor(service_config.compression)
+            for name, service_config in self.services.items()
+            if service_config.compression.enabled
+        }
+        if previous is not None:
+            self._adopt(previous)
+
+    @staticmethod
+    def _pool_signature(service_config: ServiceConfig) -> tuple:
+        """Campos que definem os pools/balanceamento; se não mudam, os pools são mantidos"""
+        return (
+            service_config.endpoints, service_config.pool, service_config.timeout,
+            service_config.require_mtls, service_config.load_balancing,
+        )
+
+    def _adopt(self, previous: "ProxyService") -> None:
+        """Reaproveita do snapshot anterior o estado das partes cuja configuração não mudou"""
+        self.retry_budget = previous.retry_budget
+        self.rate_limiter = previous.rate_limiter
+        for name, service_config in self.services.items():
+            old_config = previous.services.get(name)
+            if old_config is None:
+                continue
+            balancer = previous.balancers.get(name)
+            if balancer is not None and self._pool_signature(service_config) == self._pool_signature(old_config):
+                balancer._on_change = self.health_state.invalidate
+                self.balancers[name] = balancer
+            # Cache só é mantido se também apontar para os mesmos upstreams
+            for fields, components, old_components in (
+                (('cache', 'endpoints', 'routes', 'upstream_prefix'), self.caches, previous.caches),
+                (('circuit_breaker',), self.breakers, previous.breakers),
+                (('coalescing',), self.single_flights, previous.single_flights),
+                (('limits',), self.concurrency, previous.concurrency),
+            ):
+                if name in components and name in old_components and all(
+                    getattr(service_config, field) == getattr(old_config, field) for field in fields
+                ):
+                    components[name] = old_components[name]
+            if self.breakers[name] is previous.breakers.get(name):
+                self.breakers[name]._on_change = self.health_state.invalidate
+
+    async def startup(self) -> None:
+        """Cria um cliente persistente por endpoint de cada serviço (chamado no startup da aplicação)"""
+        # Certificados do mTLS e arquivo de chaves: lidos em paralelo, fora do event loop
+        loads = []
+        if not self._mtls_loaded:
+            self._mtls_loaded = True
+            loads.append(asyncio.to_thread(self._load_mtls))
+        if not api_key_store.loaded:
+            loads.append(asyncio.to_thread(api_key_store.load))
+        if loads:
+            await asyncio.gather(*loads)
+
+        for service_name in self.services:
+            self._get_balancer(service_name)
+        logger.info(f"Upstream pools ready for services: {list(self.balancers)}")
+        self.health_checker.start()
+        self.warmer.start()
+        if settings.prewarm.wait_on_startup and not self.warmer.ready:
+            # Só aceita tráfego (ou troca o snapshot, no reload) com os pools aquecidos
+            if not await self.warmer.wait_ready(settings.prewarm.startup_timeout):
+                logger.warning(
+                    f"Upstream pools not warm after {settings.prewarm.startup_timeout}s, "
+                    f"continuing in background: {self.warmer.state()['services']}"
                 )
-                logger.info("mTLS configuration loaded successfully")
-            else:
-                logger.warning("mTLS certificates not found, running without mTLS")
-        except Exception as e:
-            logger.error(f"Error setting up mTLS: {e}")
-        
+        if self.mtls_config and settings.mtls.reload_interval > 0:
+            self._mtls_reload_task = asyncio.create_task(self._watch_mtls_files())
+        if api_key_store.config.path and api_key_store.config.reload_interval > 0:
+            self._api_keys_reload_task = asyncio.create_task(api_key_store.watch())
+
+    async def shutdown(self) -> None:
+        """Fecha os clientes persistentes (chamado no shutdown da aplicação)"""
+        self._stop_watchers()
+        await self.health_checker.stop()
+        await self.warmer.stop()
+        balancers, self.balancers = self.balancers, {}
+        for balancer in balancers.values():
+            for endpoint in balancer.endpoints:
+                await endpoint.pool.aclose()
+
+    def _stop_watchers(self) -> None:
+        for task in (self._mtls_reload_task, self._api_keys_reload_task):
+            if task is not None:
+                task.cancel()
+        self._mtls_reload_task = self._api_keys_reload_task = None
+
+    async def retire(self, successor: "ProxyService") -> None:
+        """
+        Desativa este snapshot após a troca por `successor`: as requisições em
+        andamento terminam normalmente e só os pools não reaproveitados são
+        fechados (depois de drenados).
+        """
+        self._stop_watchers()
+        await self.health_checker.stop()
+        await self.warmer.stop()
+        for name, balancer in self.balancers.items():
+            if successor.balancers.get(name) is balancer:
+                continue
+            for endpoint in balancer.endpoints:
+                self._retire_pool(endpoint.pool)
+
+    def _retire_pool(self, pool: UpstreamPool) -> None:
+        """Fecha um pool substituído em background, após as requisições em andamento"""
+        self._spawn(pool.drain_and_close())
+
+    async def _watch_mtls_files(self) -> None:
+        """Recria os pools com mTLS quando os certificados mudam no disco"""
+        while True:
+            await asyncio.sleep(settings.mtls.reload_interval)
+            try:
+                if not self.mtls_config.reload_if_changed():
+                    continue
+                for name, balancer in self.balancers.items():
+                    service_config = self.services[name]
+                    if not service_config.require_mtls:
+                        continue
+                    for endpoint in balancer.endpoints:
+                        old_pool = endpoint.pool
+                        endpoint.pool = self._create_pool(name, service_config, endpoint.url)
+                        self._retire_pool(old_pool)
+            except Exception as e:
+                logger.error(f"Error reloading mTLS configuration: {e}")
+
+    def _create_pool(self, service: str, service_config: ServiceConfig, url: str) -> UpstreamPool:
+        return UpstreamPool(service, service_config, self._get_client_config(service_config), url=url)
+
+    def _get_balancer(self, service: str) -> LoadBalancer:
+        balancer = self.balancers.get(service)
+        if balancer is None:
+            service_config = self.services[service]
+            endpoints = [
+                Endpoint(endpoint.url, endpoint.weight, self._create_pool(service, service_config, endpoint.url))
+                for endpoint in service_config.endpoints
+            ]
+            balancer = LoadBalancer(
+                service, endpoints, service_config.load_balancing, on_change=self.health_state.invalidate
+            )
+            self.balancers[service] = balancer
+            self.health_state.invalidate()
+        return balancer
+
+    def health(self) -> Dict[str, Any]:
+        """Saúde dos upstreams e estado do pré-aquecimento, em memória (sem I/O)"""
+        return {**self.health_state.snapshot(), "warm": self.warmer.state()}
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: balancer.snapshot() for name, balancer in self.balancers.items()}
+
+    def _load_mtls(self) -> None:
+        self.mtls_config = load_mtls_config()
 
-    def _build_target_url(self, service: str, path: str) -> str:
-        service_config = self.services[service]
-        base_url = service_config.url.rstrip('/')
-        
-        full_path = []
-        
-        if not path.startswith(settings.API_V1_STR):
-            full_path.append(settings.API_V1_STR.strip('/'))
-            
-        if not path.startswith(f"/{service}") and service not in path:
-            full_path.append(service)
-            
-        clean_path = path.strip('/')
-        if clean_path and clean_path != service:
-            if clean_path.startswith(settings.API_V1_STR.strip('/')):
-                clean_path = clean_path[len(settings.API_V1_STR.strip('/')):]
-            if clean_path.startswith(service):
-                clean_path = clean_path[len(service):]
-            clean_path = clean_path.strip('/')
-            if clean_path:
-                full_path.append(clean_path)
-        
-        final_path = '/'.join(full_path)
-        target_url = f"{base_url}/{final_path}"
-        
-        logger.debug(f"Built target URL: {target_url} for service: {service}")
-        return target_url
-    
     def _get_client_config(self, service_config: ServiceConfig) -> Dict[str, Any]:
         """Prepara a configuração do cliente HTTP com ou sem mTLS"""
         client_config = {
             "follow_redirects": True,
-            "timeout": httpx.Timeout(service_config.timeout),
+            "timeout": self._build_timeout(service_config),
         }
 
         # Adiciona configuração mTLS se necessário
         if service_config.require_mtls and self.mtls_config:
             try:
-                ssl_context = self.mtls_config.create_ssl_context()
-                client_config.update({
-                    "verify": str(self.mtls_config.ca_path),
-                    "cert": (
-                        str(self.mtls_config.cert_path),
-                        str(self.mtls_config.key_path)
-                    )
-                })
-                logger.debug(f"mTLS configuration added for request")
+                # Contexto compartilhado entre todos os pools com mTLS
+                client_config["verify"] = self.mtls_config.get_ssl_context()
+                logger.debug(f"mTLS configuration added for service client")
             except Exception as e:
                 logger.error(f"Error configuring mTLS for request: {e}")
                 raise HTTPException(
@@ -112,72 +333,751 @@ class ProxyService:
                     detail="Failed to configure secure connection"
                 )
         else:
-            client_config["verify"] = False
+            client_config["verify"] = _insecure_ssl_context()
 
         return client_config
 
+    @staticmethod
+    def _build_timeout(service_config: ServiceConfig) -> httpx.Timeout:
+        """`timeout` do serviço como padrão, com os limites por fase de `timeouts`"""
+        phases = service_config.timeouts.model_dump(include={'connect', 'read', 'write', 'pool'})
+        return httpx.Timeout(
+            service_config.timeout,
+            **{phase: value for phase, value in phases.items() if value is not None}
+        )
+
+    @staticmethod
+    def _is_streaming(service_config: ServiceConfig, path: str) -> bool:
+        """Define se a requisição usa streaming ou corpo totalmente em memória"""
+        if not service_config.streaming:
+            return False
+        clean_path = path.lstrip('/')
+        return not any(clean_path.startswith(prefix) for prefix in service_config.buffered_paths)
+
+    def _response_headers(self, service: str, response: httpx.Response) -> List[Tuple[str, str]]:
+        """Headers da resposta (corpo lido com `response.content`) guardados no cache"""
+        return [
+            (name.decode('latin-1'), value.decode('latin-1'))
+            for name, value in self.header_pipelines[service].response(response)
+        ]
+
+    def _build_response(
+        self, service: str, response: httpx.Response, cache_status: Optional[str] = None
+    ) -> Response:
+        # HEAD mantém o content-length (e content-encoding) informado pelo upstream
+        raw_headers = self.header_pipelines[service].response(response, buffered=response.request.method != 'HEAD')
+        if cache_status:
+            raw_headers.append((b'x-cache', cache_status.encode('latin-1')))
+        spooled = spooled_body(response)
+        if spooled is not None:
+            # Corpo em arquivo temporário: enviado em blocos, fechado ao terminar
+            raw_headers.append((b'content-length', str(spooled.size).encode('latin-1')))
+            streaming_response = StreamingResponse(
+                self._spooled_content(spooled),
+                status_code=response.status_code,
+                background=BackgroundTask(spooled.close)
+            )
+            streaming_response.raw_headers = raw_headers
+            return streaming_response
+        return RawResponse(response.content, response.status_code, raw_headers)
+
+    @staticmethod
+    async def _spooled_content(spooled: SpooledBody):
+        try:
+            async for chunk in spooled.chunks():
+                yield chunk
+        finally:
+            spooled.close()
+
+    @staticmethod
+    async def _discard(response: httpx.Response) -> None:
+        spooled = spooled_body(response)
+        if spooled is not None:
+            spooled.close()
+        await response.aclose()
+
+    @staticmethod
+    def _cached_response(entry: CacheEntry, cache_status: str, request_headers: Dict[str, str]) -> Response:
+        # Requisição condicional do cliente que casa com a entrada: 304 sem corpo
+        if entry.not_modified(request_headers):
+            raw_headers = encode_headers(
+                (name, value) for name, value in entry.headers if name in NOT_MODIFIED_HEADERS
+            )
+            status_code, content = 304, b""
+        else:
+            raw_headers = encode_headers(entry.headers)
+            status_code, content = entry.status_code, entry.content
+        raw_headers.append((b'age', str(entry.age(time.monotonic())).encode('latin-1')))
+        raw_headers.append((b'x-cache', cache_status.encode('latin-1')))
+        return RawResponse(content, status_code, raw_headers)
+
+    async def _fetch(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        timing: Optional[RequestTiming] = None,
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        single_flight = self.single_flights.get(service)
+        if single_flight is None:
+            return await self._send(service, method, path, headers, timing=timing, deadline=deadline)
+
+        # Requisições idênticas concorrentes compartilham a mesma chamada ao
+        # upstream; a resposta compartilhada fica em memória (sem spool)
+        service_config = self.services[service]
+        coalescing = service_config.coalescing
+        key = (method, normalize_url(path) if coalescing.normalize_query else path) + tuple(
+            headers.get(h) for h in coalescing.key_headers
+        )
+        # A chamada compartilhada não é de nenhum cliente: só o `timeouts.total`
+        # do serviço a limita (nem o prazo nem o timing/trace de quem a iniciou)
+        total = service_config.timeouts.total
+        shared_deadline = time.monotonic() + total if total is not None else None
+        call = single_flight.do(
+            key,
+            lambda: self._send(service, method, path, headers, deadline=shared_deadline, spool=False),
+            coalescing.max_wait
+        )
+        if deadline is None:
+            return await call
+        # Cada cliente espera até o próprio prazo; a chamada segue para os demais
+        try:
+            async with asyncio.timeout(max(deadline - time.monotonic(), 0.0)):
+                return await call
+        except TimeoutError:
+            raise DeadlineExceeded(f"Deadline exceeded waiting for coalesced call to {service}") from None
+
+    async def _send(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        content: Any = None,
+        stream: bool = False,
+        timing: Optional[RequestTiming] = None,
+        deadline: Optional[float] = None,
+        spool: bool = True,
+    ) -> httpx.Response:
+        """
+        Envia a requisição ao upstream passando pelo circuit breaker do serviço,
+        com retries (métodos idempotentes e corpo reaproveitável) limitados pelo
+        orçamento global de retries e pelo prazo (`deadline`) da requisição.
+        Sem `stream`, o corpo da resposta é lido dentro de `body.max_response_bytes`
+        e, com `spool`, vai para arquivo temporário acima de `body.memory_threshold`.
+        """
+        service_config = self.services[service]
+        retry = service_config.retry
+        breaker = self.breakers[service]
+        retryable = (
+            retry.max_attempts > 1
+            and method in retry.methods
+            and (content is None or isinstance(content, (bytes, SpooledBody)))
+        )
+        self.retry_budget.deposit()
+
+        attempt = 1
+        while True:
+            if deadline is not None and deadline <= time.monotonic():
+                raise DeadlineExceeded(f"Deadline exceeded before attempt {attempt} to {service}")
+            probe = breaker.allow_request()
+            delay = backoff_delay(attempt, retry.backoff_base, retry.backoff_max)
+            started = time.perf_counter()
+            try:
+                response = await self._send_once(
+                    service, method, path, headers, content, stream, timing, deadline, spool
+                )
+            except DeadlineExceeded:
+                # Prazo definido pelo cliente: não conta como falha do upstream
+                breaker.release(probe)
+                raise
+            except httpx.TransportError:
+                breaker.record(False, time.perf_counter() - started)
+                if not (
+                    retryable and attempt < retry.max_attempts and self._retry_allowed(service, deadline, delay)
+                ):
+                    raise
+            except BaseException:
+                # Cancelamento ou corpo acima do limite: sem resultado para o
+                # breaker, a vaga de teste (half-open) é devolvida
+                breaker.release(probe)
+                raise
+            else:
+                failed = response.status_code in service_config.circuit_breaker.failure_status
+                breaker.record(not failed, time.perf_counter() - started)
+                if not (
+                    retryable
+                    and response.status_code in retry.retry_on_status
+                    and attempt < retry.max_attempts
+                    and self._retry_allowed(service, deadline, delay)
+                ):
+                    return response
+                await self._discard(response)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _retry_allowed(self, service: str, deadline: Optional[float], delay: float) -> bool:
+        # Não vale tentar de novo se o backoff já consome o prazo restante
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        if self.retry_budget.try_withdraw():
+            RETRIES.inc((service,))
+            return True
+        RETRIES_DENIED.inc((service,))
+        return False
+
+    async def _send_once(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        content: Any,
+        stream: bool,
+        timing: Optional[RequestTiming],
+        deadline: Optional[float],
+        spool: bool = True,
+    ) -> httpx.Response:
+        """Escolhe um endpoint do serviço e envia a requisição pelo pool dele"""
+        timeout = self.timeouts[service]
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            timeout = attempt_timeout(timeout, remaining)
+            if self.deadline_config.propagate:
+                headers = {**headers, self.deadline_config.header: str(max(1, int(remaining * 1000)))}
+
+        balancer = self._get_balancer(service)
+        endpoint = balancer.pick()
+        pool = endpoint.pool
+        trace = timing.trace if timing is not None else None
+        with stage(trace, "upstream", KIND_CLIENT, service=service, endpoint=endpoint.url) as span:
+            if trace is not None:
+                # O upstream recebe como parent o span desta tentativa
+                headers = {**headers, 'traceparent': trace.traceparent()}
+            upstream_request = pool.client.build_request(
+                method=method,
+                url=endpoint.url + path,
+                headers=headers,
+                content=content,
+                timeout=timeout
+            )
+            balancer.on_start(endpoint)
+            started = time.perf_counter()
+            try:
+                if remaining is None:
+                    response = await self._exchange(service, pool, upstream_request, stream, timing, spool)
+                else:
+                    # Os timeouts do httpx valem por operação; o prazo limita a chamada inteira
+                    async with asyncio.timeout(remaining):
+                        response = await self._exchange(service, pool, upstream_request, stream, timing, spool)
+            except (asyncio.CancelledError, BodyTooLarge):
+                # Corpo acima do limite (requisição em streaming ou resposta) não é falha do endpoint
+                balancer.on_finish(endpoint, time.perf_counter() - started, None)
+                raise
+            except TimeoutError as e:
+                balancer.on_finish(endpoint, time.perf_counter() - started, None)
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {service}") from e
+            except httpx.TimeoutException as e:
+                if remaining is not None and deadline - time.monotonic() <= 0.001:
+                    # Timeout da fase encurtado pelo prazo da requisição
+                    balancer.on_finish(endpoint, time.perf_counter() - started, None)
+                    raise DeadlineExceeded(f"Deadline exceeded waiting for {service}") from e
+                balancer.on_finish(endpoint, time.perf_counter() - started, False)
+                raise
+            except Exception:
+                balancer.on_finish(endpoint, time.perf_counter() - started, False)
+                raise
+            balancer.on_finish(
+                endpoint, time.perf_counter() - started, not balancer.is_failure_status(response.status_code)
+            )
+            if span is not None:
+                span.set("http.response.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.error = f"HTTP {response.status_code}"
+            return response
+
+    async def _exchange(
+        self,
+        service: str,
+        pool: UpstreamPool,
+        upstream_request: httpx.Request,
+        stream: bool,
+        timing: Optional[RequestTiming],
+        spool: bool,
+    ) -> httpx.Response:
+        """Envia pelo pool e, sem `stream`, lê o corpo da resposta (dentro do prazo da tentativa)"""
+        response = await pool.send(upstream_request, stream=True, timing=timing)
+        if not stream:
+            body = self.services[service].body
+            await read_response(
+                response,
+                body.max_response_bytes,
+                body.memory_threshold if spool else None,
+                settings.body_buffer.spool_dir
+            )
+        return response
+
+    async def _forward_cached(
+        self,
+        scope: Scope,
+        service: str,
+        cache: ResponseCache,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        timing: Optional[RequestTiming] = None,
+        deadline: Optional[float] = None,
+    ) -> Response:
+        """Atende GET/HEAD a partir do cache do serviço, revalidando com o upstream quando necessário"""
+        request_directives = parse_cache_control(headers.get('cache-control'))
+        if 'no-store' in request_directives:
+            response = await self._fetch(service, method, path, headers, timing, deadline)
+            return await self._encode(service, headers, self._build_response(service, response, "BYPASS"))
+
+        primary = cache.primary_key(method, path, headers)
+        key, entry = cache.lookup(primary, headers)
+        now = time.monotonic()
+
+        if entry is not None and 'no-cache' not in request_directives:
+            if entry.is_fresh(now):
+                cache.stats.hits += 1
+                return await self._encode(service, headers, self._cached_response(entry, "HIT", headers), cache, entry)
+            if entry.is_stale_usable(now):
+                cache.stats.stale_hits += 1
+                if not entry.revalidating:
+                    entry.revalidating = True
+                    self._spawn(self._revalidate(service, cache, primary, key, entry, method, path, headers))
+                return await self._encode(
+                    service, headers, self._cached_response(entry, "STALE", headers), cache, entry
+                )
+
+        cache.stats.misses += 1
+        upstream_headers = headers
+        conditional = entry is not None and entry.has_validators and not (
+            'if-none-match' in headers or 'if-modified-since' in headers
+        )
+        if conditional:
+            upstream_headers = self._conditional_headers(headers, entry)
+
+        response = await self._fetch(service, method, path, upstream_headers, timing, deadline)
+        if self.request_log.enabled(logging.INFO, scope):
+            self.request_log.emit(logging.INFO, "upstream_response", service=service, status=response.status_code)
+        if conditional and response.status_code == 304:
+            cache.refresh(key, entry, response)
+            return await self._encode(
+                service, headers, self._cached_response(entry, "REVALIDATED", headers), cache, entry
+            )
+
+        stored = cache.store(primary, headers, response, self._response_headers(service, response))
+        return await self._encode(service, headers, self._build_response(service, response, "MISS"), cache, stored)
+
+    async def _encode(
+        self,
+        service: str,
+        request_headers: Dict[str, str],
+        response: Response,
+        cache: Optional[ResponseCache] = None,
+        entry: Optional[CacheEntry] = None,
+    ) -> Response:
+        """Comprime a resposta conforme o Accept-Encoding do cliente, reaproveitando a variante em cache"""
+        compressor = self.compressors.get(service)
+        if compressor is None:
+            return response
+        spooled = isinstance(response, StreamingResponse)
+        size = int(response.headers['content-length']) if spooled else len(response.body)
+        if not compressor.eligible(response.status_code, response.headers, size):
+            return response
+        encoding = compressor.negotiate(request_headers.get('accept-encoding'))
+        if encoding is None:
+            response.headers['vary'] = vary_accept_encoding(response.headers.get('vary'))
+            return response
+        if spooled:
+            # Corpo em arquivo temporário: comprimido em streaming, sem variante no cache
+            response.body_iterator = compressor.compress_stream(response.body_iterator, encoding)
+            response.raw_headers = encode_headers(encoded_headers(response.headers, encoding).items())
+            return response
+
+        use_variants = entry is not None and compressor.config.cache_variants
+        body = entry.variants.get(encoding) if use_variants else None
+        if body is None:
+            body = await compressor.compress(response.body, encoding)
+            if use_variants:
+                cache.add_variant(entry, encoding, body)
+        if len(body) >= len(response.body):
+            return response
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=encoded_headers(response.headers, encoding)
+        )
+
+    @staticmethod
+    def _conditional_headers(headers: Dict[str, str], entry: CacheEntry) -> Dict[str, str]:
+        conditional = dict(headers)
+        if entry.etag is not None:
+            conditional['if-none-match'] = entry.etag
+        if entry.last_modified is not None:
+            conditional['if-modified-since'] = entry.last_modified
+        return conditional
+
+    async def _revalidate(
+        self,
+        service: str,
+        cache: ResponseCache,
+        primary: CacheKey,
+        key: CacheKey,
+        entry: CacheEntry,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+    ) -> None:
+        """Revalidação em background para stale-while-revalidate"""
+        try:
+            upstream_headers = self._conditional_headers(headers, entry) if entry.has_validators else headers
+            response = await self._fetch(service, method, path, upstream_headers)
+            if response.status_code == 304 and entry.has_validators:
+                cache.refresh(key, entry, response)
+            else:
+                cache.store(primary, headers, response, self._response_headers(service, response))
+            await self._discard(response)
+        except Exception as e:
+            logger.warning("Background revalidation failed for %s %s: %r", service, path, e)
+        finally:
+            entry.revalidating = False
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+    def limit_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limit": self.rate_limiter.snapshot(),
+            "concurrency": {name: limiter.snapshot() for name, limiter in self.concurrency.items()},
+        }
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: cache.snapshot() for name, cache in self.caches.items()}
+
+    def collect_metrics(self) -> Iterable[Sample]:
+        """Gauges/contadores dos pools e caches para o endpoint /metrics"""
+        endpoints = [
+            (name, endpoint, endpoint.pool.snapshot())
+            for name, balancer in self.balancers.items() for endpoint in balancer.endpoints
+        ]
+        now = time.monotonic()
+        yield ("gateway_upstream_pool_connections", "gauge", "Open upstream connections",
+               [({"service": name, "endpoint": endpoint.url, "state": state}, stats[f"{state}_connections"])
+                for name, endpoint, stats in endpoints for state in ("active", "idle")])
+        yield ("gateway_upstream_in_flight", "gauge", "Upstream requests waiting for response headers",
+               [({"service": name, "endpoint": endpoint.url}, endpoint.outstanding)
+                for name, endpoint, _ in endpoints])
+        yield ("gateway_upstream_endpoint_available", "gauge", "Whether the endpoint is eligible for load balancing",
+               [({"service": name, "endpoint": endpoint.url}, int(endpoint.is_available(now)))
+                for name, endpoint, _ in endpoints])
+        yield ("gateway_upstream_ejections_total", "counter", "Endpoint ejections after consecutive failures",
+               [({"service": name, "endpoint": endpoint.url}, endpoint.ejections)
+                for name, endpoint, _ in endpoints])
+        yield ("gateway_upstream_warm_connections", "gauge", "Warm upstream connections after the last prewarm pass",
+               [({"service": name, "endpoint": url}, value)
+                for name, warm in self.warmer.connections.items() for url, value in warm.items()])
+        yield ("gateway_circuit_state", "gauge", "Circuit breaker state (0=closed, 1=half_open, 2=open)",
+               [({"service": name}, breaker.snapshot()["state_value"]) for name, breaker in self.breakers.items()])
+        yield ("gateway_service_in_flight", "gauge", "Requests in flight per service with a concurrency limit",
+               [({"service": name}, limiter.in_flight) for name, limiter in self.concurrency.items()])
+        yield ("gateway_cache_events_total", "counter", "Response cache events",
+               [({"service": name, "event": event}, value)
+                for name, cache in self.caches.items() for event, value in cache.stats.as_dict().items()])
+        yield ("gateway_cache_bytes", "gauge", "Bytes held by the response cache",
+               [({"service": name}, cache.current_bytes) for name, cache in self.caches.items()])
+
+    def coalescing_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {**single_flight.stats.as_dict(), "in_flight": single_flight.in_flight}
+            for name, single_flight in self.single_flights.items()
+        }
+
     async def forward_request(
         self,
         service: str,
         path: str,
         request: Request,
+    ) -> Response:
+        trace = request.scope.get(TRACE_SCOPE_KEY)
+        if trace is None or not trace.sampled:
+            return await self._forward(service, path, request)
+        # Do último middleware até aqui: roteamento do Starlette/FastAPI
+        now = time.perf_counter()
+        if trace.handoff is not None and trace.current is not None:
+            trace.current.child("routing", trace.handoff, now)
+        with trace.stage("proxy", service=service):
+            return await self._forward(service, path, request)
+
+    async def _forward(
+        self,
+        service: str,
+        path: str,
+        request: Request,
     ) -> Response:
         if service not in self.services:
             raise HTTPException(status_code=404, detail=f"Service {service} not found")
 
         service_config = self.services[service]
-        logger.debug(f"Processing request for service: {service}")
-        logger.debug(f"Service config: {service_config}")
+        scope = request.scope
+        timing = scope.get(TIMING_SCOPE_KEY)
+        if timing is not None:
+            timing.service = service
 
         # Verifica se o serviço requer mTLS e se está configurado
         if service_config.require_mtls and not self.mtls_config:
-            logger.error(f"Service {service} requires mTLS but it's not configured")
+            if self.request_log.enabled(logging.ERROR, scope):
+                self.request_log.emit(logging.ERROR, "mtls_not_configured", service=service)
             raise HTTPException(
                 status_code=500,
                 detail="Service requires secure connection but it's not configured"
             )
 
-        target_url = self._build_target_url(service, path)
-        headers = dict(request.headers)
-        headers.pop('host', None)
-        headers.pop('content-length', None)
+        prepare_started = time.perf_counter()
+        method = request.method
+        route = self.routes.resolve(service, method, path, scope.get("query_string", b""))
+        target_path = route.path
+        streaming = route.streaming if route.streaming is not None else self._is_streaming(service_config, path)
+        request_log = self.request_log
+        if request_log.enabled(logging.DEBUG, scope):
+            request_log.emit(logging.DEBUG, "proxy_request", service=service, method=method,
+                             path=path, target=target_path, streaming=streaming)
+        headers, has_body = self.header_pipelines[service].request(scope, streaming)
+        deadline = parse_deadline(
+            headers.pop(self.deadline_config.header, None),
+            self.deadline_config,
+            service_config.timeouts.total,
+            time.monotonic()
+        )
 
-        # Adiciona a API key se existir
+        client_api_key = headers.get('x-api-key')
+        key_info = self._authenticate(service, service_config, headers, scope)
+        if key_info is None and client_api_key:
+            # Sem require_api_key a chave é opcional: só conta para os limites se for válida
+            known = api_key_store.lookup(client_api_key)
+            if known is not None and known.allows(service):
+                key_info = known
+        if key_info is None:
+            # Chave não autenticada não tem limite próprio (seria trocada a cada requisição): vale o por IP
+            client_api_key = None
+
+        # Content-Length acima do limite: 413 antes de ler o corpo
+        max_request_bytes = service_config.body.max_request_bytes
+        if has_body and max_request_bytes is not None:
+            try:
+                check_length(request.headers.get('content-length'), max_request_bytes)
+            except BodyTooLarge:
+                raise HTTPException(status_code=413, detail="Request body too large")
+
+        # Adiciona a API key se existir (substitui a enviada pelo cliente)
         if service_config.api_key:
-            headers['X-API-Key'] = service_config.api_key
-            logger.debug(f"Added X-API-Key header for service {service}")
-        
-        logger.debug(f"Final headers: {headers}")
+            headers['x-api-key'] = service_config.api_key
 
+        permit = await self._enforce_limits(service, service_config, request, key_info, client_api_key)
+        span = timing.trace.current if timing is not None and timing.trace is not None else None
+        if span is not None:
+            # Rota, headers, autenticação e limites
+            span.child("proxy.prepare", prepare_started, time.perf_counter())
+        handed_off = False
+        body = None
         try:
-            body = await request.body()
-            params = dict(request.query_params)
-
-            # Obter configuração do cliente antes de usar
-            client_config = self._get_client_config(service_config)  
-
-            async with httpx.AsyncClient(
-                follow_redirects=True,
-                timeout=httpx.Timeout(service_config.timeout),
-                verify=False
-            ) as client:
-                
-                response = await client.request(
-                    method=request.method,
-                    url=target_url,
-                    headers=headers,
-                    params=params,
-                    content=body
+            if streaming:
+                if has_body:
+                    body = request.stream()
+                    if max_request_bytes is not None:
+                        body = limit_stream(body, max_request_bytes)
+            else:
+                # Acima de `memory_threshold` o corpo vai para arquivo temporário (reenviável em retries)
+                body = await read_body(
+                    request.stream(), max_request_bytes,
+                    service_config.body.memory_threshold, settings.body_buffer.spool_dir
                 )
-                
-                logger.info(f"Response from {service}: {response.status_code}")
-                return Response(
-                    content=response.content,
+                if isinstance(body, SpooledBody):
+                    headers['content-length'] = str(body.size)
+
+            cache = self.caches.get(service)
+            if not streaming and request.method in CACHEABLE_METHODS:
+                if cache is not None:
+                    return await self._forward_cached(
+                        scope, service, cache, request.method, target_path, headers, timing, deadline
+                    )
+                if service in self.single_flights and not body:
+                    response = await self._fetch(service, method, target_path, headers, timing, deadline)
+                    if request_log.enabled(logging.INFO, scope):
+                        request_log.emit(logging.INFO, "upstream_response", service=service, status=response.status_code)
+                    return await self._encode(service, headers, self._build_response(service, response))
+
+            response = await self._send(
+                service, method, target_path, headers,
+                content=body, stream=streaming, timing=timing, deadline=deadline
+            )
+
+            if request_log.enabled(logging.INFO, scope):
+                request_log.emit(logging.INFO, "upstream_response", service=service, status=response.status_code)
+            if streaming:
+                # O corpo é repassado sem decodificação, então os headers
+                # (content-encoding/content-length) continuam válidos
+                max_response_bytes = service_config.body.max_response_bytes
+                if max_response_bytes is not None and method != 'HEAD':
+                    try:
+                        check_length(response.headers.get('content-length'), max_response_bytes)
+                    except BodyTooLarge:
+                        await response.aclose()
+                        raise ResponseTooLarge(max_response_bytes)
+                content = self._stream_body(response, permit, max_response_bytes)
+                raw_headers = self.header_pipelines[service].response(response, buffered=False)
+                compressor = self.compressors.get(service)
+                if compressor is not None:
+                    encoding = compressor.negotiate(headers.get('accept-encoding'))
+                    length = response.headers.get('content-length')
+                    size = int(length) if length and length.isdigit() else None
+                    if encoding and compressor.eligible(response.status_code, response.headers, size):
+                        content = compressor.compress_stream(content, encoding)
+                        raw_headers = encode_headers(
+                            encoded_headers(MutableHeaders(raw=raw_headers), encoding).items()
+                        )
+                handed_off = True
+                streaming_response = StreamingResponse(
+                    content,
                     status_code=response.status_code,
-                    headers=dict(response.headers),
-                    media_type=response.headers.get('content-type')
+                    background=BackgroundTask(self._close_stream, response, permit)
                 )
+                streaming_response.raw_headers = raw_headers
+                return streaming_response
+            return await self._encode(service, headers, self._build_response(service, response))
 
+        except HTTPException:
+            raise
+        except ResponseTooLarge as e:
+            if request_log.enabled(logging.WARNING, scope):
+                request_log.emit(logging.WARNING, "response_too_large", service=service, limit=e.limit)
+            raise HTTPException(status_code=502, detail="Upstream response too large")
+        except BodyTooLarge:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        except CircuitOpenError as e:
+            if request_log.enabled(logging.WARNING, scope):
+                request_log.emit(logging.WARNING, "circuit_open", service=service)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Service {service} temporarily unavailable",
+                headers={"Retry-After": str(max(1, int(e.retry_after)))}
+            )
+        except httpx.TimeoutException as e:
+            if request_log.enabled(logging.WARNING, scope):
+                request_log.emit(logging.WARNING, "upstream_timeout", service=service, error=repr(e))
+            raise HTTPException(status_code=504, detail="Upstream timeout")
+        except httpx.TransportError as e:
+            if request_log.enabled(logging.WARNING, scope):
+                request_log.emit(logging.WARNING, "upstream_unavailable", service=service, error=repr(e))
+            raise HTTPException(status_code=502, detail="Upstream unavailable")
         except Exception as e:
-            logger.error(f"Error forwarding request: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            logger.error("Error forwarding request to %s: %s", service, e, exc_info=True)
+            raise HTTPException(status_code=500, detail="Internal Gateway Error")
+        finally:
+            if permit is not None and not handed_off:
+                permit.release()
+            if isinstance(body, SpooledBody):
+                body.close()
+
+    def _authenticate(
+        self,
+        service: str,
+        service_config: ServiceConfig,
+        headers: Dict[str, str],
+        scope: Scope,
+    ) -> Optional[APIKeyInfo]:
+        """Valida a X-API-Key do cliente nos serviços com `require_api_key`"""
+        if not service_config.require_api_key:
+            return None
+        # A chave do cliente não é repassada ao upstream
+        api_key = headers.pop('x-api-key', None)
+        if not api_key:
+            raise HTTPException(status_code=403, detail="No API key provided")
+        key_info = api_key_store.lookup(api_key)
+        if key_info is None or not key_info.enabled:
+            raise HTTPException(status_code=403, detail="Invalid API key")
+        if not key_info.allows(service):
+            if self.request_log.enabled(logging.WARNING, scope):
+                self.request_log.emit(logging.WARNING, "api_key_not_allowed", service=service, tenant=key_info.tenant)
+            raise HTTPException(status_code=403, detail="API key not allowed for this service")
+        return key_info
+
+    async def _enforce_limits(
+        self,
+        service: str,
+        service_config: ServiceConfig,
+        request: Request,
+        key_info: Optional[APIKeyInfo] = None,
+        api_key: Optional[str] = None,
+    ) -> Optional[ConcurrencyPermit]:
+        """Aplica os limites de taxa e reserva uma vaga de concorrência do serviço"""
+        scope = request.scope
+        client_ip = scope.get(CLIENT_IP_SCOPE_KEY)
+        if client_ip is None and scope.get("client"):
+            client_ip = scope["client"][0]
+        try:
+            await self.rate_limiter.check(
+                service, service_config.limits, api_key, client_ip,
+                key_info.rate_limit if key_info is not None else None
+            )
+        except RateLimitExceeded as e:
+            if self.request_log.enabled(logging.WARNING, scope):
+                self.request_log.emit(logging.WARNING, "rate_limited", service=service, limit=e.limit, client=client_ip)
+            raise HTTPException(
+                status_code=429,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+
+        concurrency = self.concurrency.get(service)
+        if concurrency is None:
+            return None
+        permit = concurrency.try_acquire()
+        if permit is None:
+            RATE_LIMITED.inc((service, "concurrency"))
+            if self.request_log.enabled(logging.WARNING, scope):
+                self.request_log.emit(logging.WARNING, "concurrency_limited", service=service)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Service {service} is overloaded",
+                headers={"Retry-After": "1"}
+            )
+        return permit
+
+    @staticmethod
+    async def _stream_body(
+        response: httpx.Response,
+        permit: Optional[ConcurrencyPermit],
+        limit: Optional[int] = None,
+    ):
+        # A vaga só é liberada quando o corpo termina (ou o cliente desconecta)
+        try:
+            chunks = response.aiter_raw()
+            if limit is not None:
+                # Sem Content-Length, o limite só é percebido no meio do corpo: a resposta é interrompida
+                chunks = limit_stream(chunks, limit)
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            if permit is not None:
+                permit.release()
+            # Cliente desconectado no meio do corpo: a resposta é fechada aqui mesmo
+            # (a background task de _close_stream pode não rodar)
+            await response.aclose()
+
+    @staticmethod
+    async def _close_stream(response: httpx.Response, permit: Optional[ConcurrencyPermit]) -> None:
+        if permit is not None:
+            permit.release()
+        await response.aclose()
\ No newline at end of file
@@ -0,0 +1,59 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightStats:
+    __slots__ = ("leaders", "shared", "timeouts")
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira chamada dispara a coroutine em uma task própria (não é
+    cancelada se o cliente que a originou desconectar) e as demais aguardam o
+    mesmo resultado. Quem espera mais que `max_wait` faz a própria chamada.
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marca a exceção como consumida mesmo que nenhum waiter tenha restado
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], max_wait: float) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+            self.stats.leaders += 1
+            return await asyncio.shield(task)
+
+        self.stats.shared += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max_wait)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            logger.debug(f"Coalesced request exceeded max_wait ({max_wait}s), calling upstream directly")
+            return await fn()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
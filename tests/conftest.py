@@ -0,0 +1,44 @@
+import pytest
+from starlette.requests import Request
+
+from src.app.core.config.settings import ServiceConfig
+
+
+@pytest.fixture
+def anyio_backend():
+    # Testes assíncronos (@pytest.mark.anyio) rodam só no asyncio, como o gateway
+    return "asyncio"
+
+
+@pytest.fixture
+def service_config():
+    """Monta um ServiceConfig com `url` padrão e os campos informados"""
+    def build(**fields) -> ServiceConfig:
+        fields.setdefault("url", "http://upstream.test")
+        return ServiceConfig(**fields)
+    return build
+
+
+@pytest.fixture
+def make_request():
+    """Request do Starlette a partir de um scope HTTP mínimo, com corpo entregue em `chunks`"""
+    def build(method="GET", path="/", headers=None, chunks=(), client=("10.0.0.1", 1234)) -> Request:
+        messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+        messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()
+            ],
+            "client": client,
+            "scheme": "http",
+        }
+        return Request(scope, receive)
+    return build
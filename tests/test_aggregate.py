@@ -0,0 +1,95 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from src.app.core.config.settings import BatchItemConfig, CompositionConfig, settings
+from src.app.services.proxy.aggregate import BatchExecutor, render_composition
+
+COMPOSITION = CompositionConfig(requests=[
+    {"id": "user", "service": "users", "path": "users/{id}", "query": {"ref": "{id}"}},
+])
+
+
+def test_parameters_fill_path_and_query():
+    [item] = render_composition(COMPOSITION, {"id": "42"})
+    assert item.path == "users/42"
+    assert item.query == {"ref": "42"}
+
+
+def test_path_parameter_cannot_escape_the_service_prefix():
+    [item] = render_composition(COMPOSITION, {"id": "../../../internal"})
+    assert item.path == "users/..%2F..%2F..%2Finternal"
+    # Na query o valor segue como veio (codificado depois pelo urlencode)
+    assert item.query == {"ref": "../../../internal"}
+
+
+def test_path_parameter_cannot_inject_query_or_fragment():
+    [item] = render_composition(COMPOSITION, {"id": "1?admin=true#x"})
+    assert item.path == "users/1%3Fadmin%3Dtrue%23x"
+
+
+@pytest.mark.parametrize("value", [".", ".."])
+def test_dot_segments_are_rejected(value):
+    with pytest.raises(HTTPException) as error:
+        render_composition(COMPOSITION, {"id": value})
+    assert error.value.status_code == 400
+
+
+def test_missing_parameter():
+    with pytest.raises(HTTPException) as error:
+        render_composition(COMPOSITION, {})
+    assert error.value.status_code == 400
+
+
+class FakeProxy:
+    """forward_request devolvendo, por serviço, uma resposta em streaming de `size` bytes"""
+
+    def __init__(self, service_config, sizes):
+        self.sizes = sizes
+        self.services = {
+            name: service_config(body={"max_response_bytes": 1000}) for name in sizes
+        }
+        self.closed = []
+
+    async def forward_request(self, service, path, request):
+        size = self.sizes[service]
+
+        async def body():
+            for _ in range(size // 100):
+                yield b"x" * 100
+
+        async def close():
+            self.closed.append(service)
+
+        return StreamingResponse(body(), media_type="text/plain", background=BackgroundTask(close))
+
+
+@pytest.fixture
+def batch_limit(monkeypatch):
+    def set_limit(limit):
+        monkeypatch.setattr(settings.batch, "max_response_bytes", limit)
+    return set_limit
+
+
+@pytest.mark.anyio
+async def test_sub_response_over_service_limit_is_a_502(service_config, make_request, batch_limit):
+    batch_limit(10_000)
+    proxy = FakeProxy(service_config, {"small": 500, "huge": 5000})
+    items = [BatchItemConfig(id=name, service=name) for name in ("small", "huge")]
+    result = (await BatchExecutor(proxy).execute(make_request("POST"), items))["responses"]
+    assert result["small"]["status"] == 200 and len(result["small"]["body"]) == 500
+    assert result["huge"] == {"status": 502, "error": "Upstream response too large"}
+    assert sorted(proxy.closed) == ["huge", "small"]
+
+
+@pytest.mark.anyio
+async def test_batch_total_is_capped(service_config, make_request, batch_limit):
+    batch_limit(1500)
+    proxy = FakeProxy(service_config, {"a": 800, "b": 800})
+    items = [BatchItemConfig(id=name, service=name) for name in ("a", "b")]
+    result = (await BatchExecutor(proxy).execute(make_request("POST"), items))["responses"]
+    statuses = sorted(item["status"] for item in result.values())
+    # Só um dos dois cabe; o outro devolve ao orçamento o que leu
+    assert statuses == [200, 413]
+    assert sorted(proxy.closed) == ["a", "b"]
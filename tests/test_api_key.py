@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from src.app.core.config.settings import APIKeyStoreConfig
+from src.app.core.security.api_key import APIKeyStore, hash_api_key
+
+
+@pytest.fixture
+def key_file(tmp_path):
+    path = tmp_path / "keys.txt"
+    metadata = json.dumps({"tenant": "acme", "services": ["orders"], "rate_limit": {"rate": 5, "burst": 10}})
+    path.write_text(
+        "# comentário\n"
+        f"{hash_api_key('acme-key')} {metadata}\n"
+        f"{hash_api_key('disabled-key').upper()} {json.dumps({'enabled': False})}\n"
+        f"{hash_api_key('broken-key')} {{not json\n"
+        "tooshort\n"
+    )
+    return path
+
+
+def test_lookup_with_metadata(key_file):
+    store = APIKeyStore(APIKeyStoreConfig(path=str(key_file)))
+    info = store.lookup("acme-key")
+    assert info.tenant == "acme"
+    assert info.allows("orders") and not info.allows("products")
+    assert info.rate_limit.rate == 5
+    assert len(store) == 3
+
+
+def test_unknown_disabled_and_invalid_metadata(key_file):
+    store = APIKeyStore(APIKeyStoreConfig(path=str(key_file)))
+    assert store.lookup("other-key") is None
+    assert store.lookup("") is None
+    assert not store.lookup("disabled-key").allows("orders")
+    # Metadados inválidos desativam a chave em vez de liberar tudo
+    assert store.lookup("broken-key").enabled is False
+
+
+def test_plaintext_keys_use_defaults():
+    store = APIKeyStore(APIKeyStoreConfig(), ["config-key"])
+    info = store.lookup("config-key")
+    assert info.tenant == "default" and info.allows("anything")
+
+
+def test_reload_if_changed(key_file):
+    store = APIKeyStore(APIKeyStoreConfig(path=str(key_file)))
+    store.load()
+    assert not store.reload_if_changed()
+    key_file.write_text(f"{hash_api_key('new-key')}\n")
+    assert store.reload_if_changed()
+    assert store.lookup("new-key") is not None
+    assert store.lookup("acme-key") is None
+
+
+def test_missing_file_keeps_plaintext_keys(tmp_path):
+    store = APIKeyStore(APIKeyStoreConfig(path=str(tmp_path / "missing.txt")), ["config-key"])
+    assert store.lookup("config-key") is not None
@@ -0,0 +1,80 @@
+from collections import Counter
+import random
+
+import pytest
+
+from src.app.core.config.settings import LoadBalancingConfig
+from src.app.services.proxy.balancer import Endpoint, LoadBalancer
+
+
+def make_balancer(strategy="round_robin", weights=(1, 1), **config):
+    endpoints = [Endpoint(f"http://upstream-{index}.test", weight, None) for index, weight in enumerate(weights)]
+    return LoadBalancer("catalog", endpoints, LoadBalancingConfig(strategy=strategy, **config))
+
+
+def test_smooth_weighted_round_robin():
+    balancer = make_balancer(weights=(5, 1, 1))
+    picks = [balancer.pick().url for _ in range(7)]
+    assert Counter(picks) == {"http://upstream-0.test": 5, "http://upstream-1.test": 1, "http://upstream-2.test": 1}
+    # Suave: o endpoint de peso maior não recebe as 5 seguidas
+    assert picks[:3] != ["http://upstream-0.test"] * 3
+
+
+def test_least_outstanding_by_weight():
+    balancer = make_balancer("least_outstanding", weights=(1, 2))
+    first, second = balancer.endpoints
+    second.outstanding = 2
+    assert balancer.pick() is first
+    first.outstanding = 2
+    assert balancer.pick() is second
+
+
+def test_p2c_ewma_prefers_lower_latency():
+    balancer = make_balancer("p2c_ewma")
+    fast, slow = balancer.endpoints
+    fast.ewma, slow.ewma = 0.01, 1.0
+    balancer._random = random.Random(0)
+    picks = Counter(balancer.pick() is fast for _ in range(400))
+    # O lento só vence quando é sorteado duas vezes (~1/4)
+    assert picks[True] > 3 * picks[False] * 0.8
+
+
+def test_ejection_after_consecutive_failures():
+    balancer = make_balancer(failure_threshold=2, ejection_time=30)
+    bad, good = balancer.endpoints
+    balancer.on_start(bad)
+    balancer.on_finish(bad, 0.1, False)
+    assert bad.ejections == 0
+    balancer.on_start(bad)
+    balancer.on_finish(bad, 0.1, False)
+    assert bad.ejections == 1
+    assert all(balancer.pick() is good for _ in range(5))
+
+
+def test_ejection_time_doubles_and_resets_on_success():
+    balancer = make_balancer(failure_threshold=1, ejection_time=10, max_ejection_time=15)
+    endpoint = balancer.endpoints[0]
+    balancer.eject(endpoint)
+    first = endpoint.ejected_until
+    endpoint.ejected_until = 0.0
+    balancer.eject(endpoint)
+    assert endpoint.ejected_until - first == pytest.approx(5, abs=0.5)
+    balancer.on_start(endpoint)
+    balancer.on_finish(endpoint, 0.1, True)
+    assert endpoint.ejection_streak == 0
+
+
+def test_all_ejected_falls_back_to_every_endpoint():
+    balancer = make_balancer()
+    for endpoint in balancer.endpoints:
+        balancer.eject(endpoint)
+    assert balancer.pick() in balancer.endpoints
+
+
+def test_cancelled_call_is_not_a_failure():
+    balancer = make_balancer(failure_threshold=1)
+    endpoint = balancer.endpoints[0]
+    balancer.on_start(endpoint)
+    balancer.on_finish(endpoint, 0.1, None)
+    assert endpoint.outstanding == 0
+    assert endpoint.failures == 0 and endpoint.ejections == 0
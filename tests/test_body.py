@@ -0,0 +1,136 @@
+import os
+import tempfile
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.app.core.config.settings import HeaderRulesConfig
+from src.app.services.proxy.body import (
+    BodyTooLarge, ResponseTooLarge, SpooledBody, check_length, limit_stream, read_body, read_response, spooled_body
+)
+from src.app.services.proxy.headers import HeaderPipeline
+from src.app.services.proxy.service import ProxyService
+
+pytestmark = pytest.mark.anyio
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def test_check_length():
+    check_length("10", 10)
+    check_length(None, 10)
+    check_length("abc", 10)
+    check_length("100", None)
+    with pytest.raises(BodyTooLarge):
+        check_length("11", 10)
+
+
+async def test_read_body_in_memory_and_limit():
+    assert await read_body(chunks(b"ab", b"", b"cd"), 4, None) == b"abcd"
+    with pytest.raises(BodyTooLarge):
+        await read_body(chunks(b"ab", b"cde"), 4, None)
+
+
+async def test_read_body_spools_above_threshold(tmp_path):
+    body = await read_body(chunks(b"a" * 6, b"b" * 6), None, 8, str(tmp_path))
+    try:
+        assert isinstance(body, SpooledBody)
+        assert len(body) == 12
+        # Reenviável: cada iteração recomeça do início
+        for _ in range(2):
+            assert b"".join([chunk async for chunk in body]) == b"a" * 6 + b"b" * 6
+    finally:
+        body.close()
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="RSS lido de /proc")
+async def test_spooled_body_does_not_load_whole_file(tmp_path):
+    size = 64 * 1024 * 1024
+    file = tempfile.TemporaryFile(dir=tmp_path)
+    for _ in range(size // (1024 * 1024)):
+        file.write(os.urandom(1024 * 1024))
+    file.flush()
+    before = rss()
+    body = SpooledBody(file)
+    try:
+        assert rss() - before < 8 * 1024 * 1024
+        peak = sent = 0
+        async for chunk in body:
+            sent += len(chunk)
+            peak = max(peak, rss() - before)
+        assert sent == size
+        # Só o bloco corrente fica mapeado
+        assert peak < 16 * 1024 * 1024
+    finally:
+        body.close()
+
+
+async def test_limit_stream_stops_past_limit():
+    received = []
+    with pytest.raises(BodyTooLarge):
+        async for chunk in limit_stream(chunks(b"abc", b"def"), 4):
+            received.append(chunk)
+    assert received == [b"abc"]
+
+
+async def test_read_response_limits_and_spools(tmp_path):
+    def respond(request):
+        return httpx.Response(200, content=b"x" * 32)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        response = await client.send(client.build_request("GET", "http://orders.test/"), stream=True)
+        await read_response(response, None, None)
+        assert response.content == b"x" * 32
+
+        response = await client.send(client.build_request("GET", "http://orders.test/"), stream=True)
+        await read_response(response, None, 16, str(tmp_path))
+        body = spooled_body(response)
+        assert body is not None and body.size == 32
+        body.close()
+
+        response = await client.send(client.build_request("GET", "http://orders.test/"), stream=True)
+        with pytest.raises(ResponseTooLarge):
+            await read_response(response, 16, None)
+        assert response.is_closed
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_has_body_from_client_headers(streaming):
+    pipeline = HeaderPipeline(HeaderRulesConfig())
+    scope = {"headers": [(b"content-length", b"5")], "client": None}
+    headers, has_body = pipeline.request(scope, streaming)
+    assert has_body
+    # No modo bufferizado quem calcula o content-length é o httpx
+    assert ("content-length" in headers) is streaming
+
+    assert pipeline.request({"headers": [(b"transfer-encoding", b"chunked")]}, streaming)[1]
+    assert not pipeline.request({"headers": [(b"accept", b"*/*")]}, streaming)[1]
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+async def test_declared_length_over_limit_is_rejected_before_reading(streaming, make_request, monkeypatch):
+    proxy = ProxyService({"orders": {
+        "url": "http://orders.test", "streaming": streaming, "body": {"max_request_bytes": 10},
+    }})
+    sent = []
+
+    async def send(*args, **kwargs):
+        sent.append(kwargs)
+        return httpx.Response(200, content=b"ok", request=httpx.Request("POST", "http://orders.test/"))
+
+    monkeypatch.setattr(proxy, "_send", send)
+    # O corpo enviado é pequeno: só o Content-Length declarado passa do limite
+    request = make_request("POST", headers={"content-length": "100"}, chunks=[b"small"])
+    with pytest.raises(HTTPException) as error:
+        await proxy._forward("orders", "items", request)
+    assert error.value.status_code == 413
+    assert sent == []
@@ -0,0 +1,193 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.app.core.config.settings import CircuitBreakerConfig, RetryBudgetConfig
+from src.app.services.proxy import breaker as breaker_module
+from src.app.services.proxy.breaker import CircuitBreaker, CircuitOpenError, RetryBudget, backoff_delay
+from src.app.services.proxy.deadline import DeadlineExceeded
+from src.app.services.proxy.service import ProxyService
+
+
+class Clock:
+    """Substitui o módulo `time` do breaker (o event loop continua com o relógio real)"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", clock)
+    return clock
+
+
+def make_breaker(**config):
+    config = {"minimum_calls": 4, "open_duration": 10, "half_open_max_calls": 3, **config}
+    return CircuitBreaker("orders", CircuitBreakerConfig(**config))
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.config.minimum_calls):
+        breaker.allow_request()
+        breaker.record(False, 0.01)
+    assert breaker.state == "open"
+
+
+def test_opens_on_failure_rate(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(False, 0.01)
+    assert breaker.state == "closed"
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.allow_request()
+    assert error.value.retry_after == pytest.approx(10)
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = make_breaker(slow_call_threshold=1.0, slow_call_rate_threshold=0.5)
+    for latency in (0.1, 0.1, 2.0, 2.0):
+        breaker.record(True, latency)
+    assert breaker.state == "open"
+
+
+def test_old_buckets_leave_the_window(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(False, 0.01)
+    clock.now += 11
+    breaker.record(False, 0.01)
+    assert breaker.state == "closed"
+
+
+def test_half_open_closes_after_successful_probes(clock):
+    breaker = make_breaker()
+    open_circuit(breaker)
+    clock.now += 10
+    probes = [breaker.allow_request() for _ in range(3)]
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow_request()
+    for _ in probes:
+        breaker.record(True, 0.01)
+    assert breaker.state == "closed"
+
+
+def test_half_open_failure_reopens(clock):
+    breaker = make_breaker()
+    open_circuit(breaker)
+    clock.now += 10
+    breaker.allow_request()
+    breaker.record(False, 0.01)
+    assert breaker.state == "open"
+
+
+def test_released_probe_frees_its_slot(clock):
+    breaker = make_breaker()
+    open_circuit(breaker)
+    clock.now += 10
+    probes = [breaker.allow_request() for _ in range(3)]
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    # Terceira vaga: chamada cancelada, sem record
+    breaker.release(probes[2])
+    breaker.allow_request()
+    breaker.record(True, 0.01)
+    assert breaker.state == "closed"
+
+
+def test_release_from_previous_round_is_ignored(clock):
+    breaker = make_breaker()
+    open_circuit(breaker)
+    clock.now += 10
+    stale = breaker.allow_request()
+    breaker.allow_request()
+    breaker.record(False, 0.01)
+    clock.now += 10
+    breaker.allow_request()
+    breaker.release(stale)
+    assert breaker._half_open_calls == 1
+
+
+def test_unreleased_probes_expire(clock):
+    breaker = make_breaker()
+    open_circuit(breaker)
+    clock.now += 10
+    for _ in range(3):
+        breaker.allow_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow_request()
+    clock.now += 10
+    assert breaker.allow_request() is not None
+    assert breaker.state == "half_open"
+
+
+def test_disabled_breaker_never_opens(clock):
+    breaker = make_breaker(enabled=False)
+    for _ in range(10):
+        breaker.record(False, 0.01)
+    assert breaker.allow_request() is None
+    assert breaker.state == "closed"
+
+
+def test_retry_budget(clock):
+    budget = RetryBudget(RetryBudgetConfig(ratio=0.5, min_per_second=0, max_tokens=2))
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+
+
+def test_backoff_delay_is_bounded():
+    for attempt in range(1, 8):
+        assert 0 <= backoff_delay(attempt, 0.05, 1.0) <= min(1.0, 0.05 * 2 ** (attempt - 1))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error", [
+    DeadlineExceeded("client deadline"), asyncio.CancelledError(), RuntimeError("unexpected"),
+])
+async def test_send_releases_probe_on_unrecorded_exit(monkeypatch, clock, error):
+    proxy = ProxyService({"orders": {
+        "url": "http://orders.test",
+        "retry": {"max_attempts": 1},
+        "circuit_breaker": {"minimum_calls": 4, "open_duration": 10, "half_open_max_calls": 3},
+    }})
+    breaker = proxy.breakers["orders"]
+    open_circuit(breaker)
+    clock.now += 10
+
+    async def send_once(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(proxy, "_send_once", send_once)
+    for _ in range(5):
+        with pytest.raises(type(error)):
+            await proxy._send("orders", "GET", "/", {})
+    assert breaker.state == "half_open"
+    assert breaker._half_open_calls == 0
+
+
+@pytest.mark.anyio
+async def test_send_records_transport_errors(monkeypatch, clock):
+    proxy = ProxyService({"orders": {
+        "url": "http://orders.test", "retry": {"max_attempts": 1}, "circuit_breaker": {"minimum_calls": 2},
+    }})
+
+    async def send_once(*args, **kwargs):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(proxy, "_send_once", send_once)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await proxy._send("orders", "GET", "/", {})
+    assert proxy.breakers["orders"].state == "open"
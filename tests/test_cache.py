@@ -0,0 +1,135 @@
+import httpx
+import pytest
+
+from src.app.core.config.settings import CacheConfig
+from src.app.services.proxy.cache import ResponseCache, normalize_url, parse_cache_control
+from src.app.services.proxy.service import ProxyService
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(CacheConfig(enabled=True, default_ttl=60, stale_while_revalidate=30))
+
+
+def store(cache, response_headers, request_headers=None, status_code=200, content=b"body"):
+    request_headers = request_headers or {}
+    response = httpx.Response(status_code, headers=response_headers, content=content)
+    primary = cache.primary_key("GET", "/items?b=2&a=1", request_headers)
+    return cache.store(primary, request_headers, response, list(response.headers.items()))
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('public, max-age=60, no-cache="set-cookie"') == {
+        "public": None, "max-age": "60", "no-cache": "set-cookie",
+    }
+    assert normalize_url("/items?b=2&a=1") == "/items?a=1&b=2"
+
+
+def test_max_age_and_stale_while_revalidate(cache):
+    entry = store(cache, {"cache-control": "max-age=10, stale-while-revalidate=5"})
+    assert entry.expires_at - entry.stored_at == pytest.approx(10)
+    assert entry.stale_until - entry.expires_at == pytest.approx(5)
+
+
+def test_default_ttl_only_for_explicitly_cacheable(cache):
+    assert store(cache, {}) is None
+    entry = store(cache, {"cache-control": "public"})
+    assert entry.expires_at - entry.stored_at == pytest.approx(60)
+
+
+def test_without_explicit_freshness_requires_validators(cache):
+    entry = store(cache, {"etag": '"v1"'})
+    assert entry is not None
+    assert not entry.is_fresh(entry.stored_at)
+    assert not entry.is_stale_usable(entry.stored_at)
+
+
+def test_expires_relative_to_date(cache):
+    entry = store(cache, {
+        "date": "Wed, 21 Oct 2026 07:28:00 GMT", "expires": "Wed, 21 Oct 2026 07:29:00 GMT",
+    })
+    assert entry.expires_at - entry.stored_at == pytest.approx(60)
+    expired = store(cache, {"expires": "0", "etag": '"v1"'})
+    assert not expired.is_fresh(expired.stored_at)
+
+
+def test_set_cookie_is_never_stored(cache):
+    assert store(cache, {"cache-control": "public, max-age=60", "set-cookie": "session=alice"}) is None
+
+
+@pytest.mark.parametrize("cache_control, stored", [
+    (None, False),
+    ("max-age=60", False),
+    ("public", True),
+    ("s-maxage=60", True),
+    ("max-age=60, must-revalidate", True),
+])
+def test_authorization_requires_shared_directive(cache, cache_control, stored):
+    headers = {"cache-control": cache_control} if cache_control else {}
+    entry = store(cache, headers, {"authorization": "Bearer alice"})
+    assert (entry is not None) is stored
+
+
+def test_private_no_store_and_vary_star(cache):
+    assert store(cache, {"cache-control": "private, max-age=60"}) is None
+    assert store(cache, {"cache-control": "no-store"}) is None
+    assert store(cache, {"cache-control": "max-age=60", "vary": "*"}) is None
+    assert store(cache, {"cache-control": "max-age=60"}, status_code=500) is None
+
+
+def test_must_revalidate_disables_stale(cache):
+    entry = store(cache, {"cache-control": "max-age=10, must-revalidate"})
+    assert entry.stale_until == entry.expires_at
+
+
+def test_vary_variants(cache):
+    store(cache, {"cache-control": "max-age=60", "vary": "Accept-Language"}, {"accept-language": "pt"})
+    primary = cache.primary_key("GET", "/items?a=1&b=2", {})
+    assert cache.lookup(primary, {"accept-language": "pt"})[1] is not None
+    assert cache.lookup(primary, {"accept-language": "en"})[1] is None
+
+
+def test_refresh_keeps_stored_directives(cache):
+    entry = store(cache, {"cache-control": "max-age=10", "etag": '"v1"'})
+    entry.expires_at = entry.stored_at
+    primary = cache.primary_key("GET", "/items", {})
+    cache.refresh(primary, entry, httpx.Response(304))
+    assert entry.expires_at - entry.stored_at == pytest.approx(10)
+
+
+def test_lru_eviction_by_entries():
+    cache = ResponseCache(CacheConfig(enabled=True, max_entries=2))
+    for path in ("/a", "/b", "/c"):
+        response = httpx.Response(200, headers={"cache-control": "max-age=60"}, content=b"x")
+        cache.store(cache.primary_key("GET", path, {}), {}, response, [])
+    assert cache.lookup(cache.primary_key("GET", "/a", {}), {})[1] is None
+    assert cache.snapshot()["entries"] == 2
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.parametrize("request_headers, not_modified", [
+    ({"if-none-match": '"v1"'}, True),
+    ({"if-none-match": 'W/"v1"'}, True),
+    ({"if-none-match": '"v0", "v1"'}, True),
+    ({"if-none-match": '"v0"'}, False),
+    ({"if-none-match": "*"}, True),
+    ({"if-modified-since": "Wed, 21 Oct 2026 07:28:00 GMT"}, True),
+    ({"if-modified-since": "Tue, 20 Oct 2026 07:28:00 GMT"}, False),
+    ({}, False),
+])
+def test_not_modified(cache, request_headers, not_modified):
+    entry = store(cache, {
+        "cache-control": "max-age=60", "etag": '"v1"', "last-modified": "Wed, 21 Oct 2026 07:28:00 GMT",
+    })
+    assert entry.not_modified(request_headers) is not_modified
+
+
+def test_fresh_hit_with_matching_etag_is_304(cache):
+    entry = store(cache, {"cache-control": "max-age=60", "etag": '"v1"', "content-type": "text/plain"})
+    response = ProxyService._cached_response(entry, "HIT", {"if-none-match": '"v1"'})
+    assert response.status_code == 304
+    assert response.body == b""
+    headers = dict(response.headers)
+    assert headers["etag"] == '"v1"'
+    assert "content-type" not in headers and "content-length" not in headers
+    assert ProxyService._cached_response(entry, "HIT", {}).body == b"body"
@@ -0,0 +1,94 @@
+import gzip
+
+import pytest
+
+from src.app.core.config.settings import CacheConfig, CompressionConfig
+from src.app.services.proxy.cache import CacheEntry
+from src.app.services.proxy.compression import (
+    ResponseCompressor, encoded_headers, parse_accept_encoding, vary_accept_encoding
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def compressor():
+    compressor = ResponseCompressor(CompressionConfig(enabled=True, encodings=["gzip"], min_size=10))
+    # Negociação independe dos pacotes opcionais instalados (br/zstd)
+    compressor.encodings = ["br", "gzip"]
+    return compressor
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, BR;q=0.5, identity;q=0, *;q=abc, ;q=1") == {
+        "gzip": 1.0, "br": 0.5, "identity": 0.0, "*": 0.0,
+    }
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),                    # empate: ordem de `encodings`
+    ("gzip;q=1, br;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("br;q=0, gzip;q=0.1", "gzip"),
+    ("*", "br"),
+    ("*;q=0", None),
+    ("br;q=0, *", "gzip"),                 # o explícito vale mais que o curinga
+    ("gzip;q=0, *;q=0.5", "br"),
+    ("deflate", None),
+])
+def test_negotiate(compressor, accept_encoding, expected):
+    assert compressor.negotiate(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("status_code, headers, size, expected", [
+    (200, {"content-type": "application/json"}, 100, True),
+    (200, {"content-type": "text/html; charset=utf-8"}, None, True),
+    (200, {"content-type": "image/png"}, 100, False),
+    (200, {"content-type": "application/json"}, 5, False),
+    (200, {"content-type": "application/json", "content-encoding": "gzip"}, 100, False),
+    (200, {"content-type": "application/json", "cache-control": "public, no-transform"}, 100, False),
+    (206, {"content-type": "application/json"}, 100, False),
+    (304, {"content-type": "application/json"}, None, False),
+])
+def test_eligible(compressor, status_code, headers, size, expected):
+    assert compressor.eligible(status_code, headers, size) is expected
+
+
+def test_encoded_headers():
+    headers = encoded_headers(
+        {"Content-Length": "100", "content-type": "application/json", "vary": "Origin", "etag": '"v1"'}, "gzip"
+    )
+    assert headers == {
+        "content-type": "application/json", "content-encoding": "gzip",
+        "vary": "Origin, Accept-Encoding", "etag": 'W/"v1"',
+    }
+    # ETag já fraco não ganha outro W/
+    assert encoded_headers({"etag": 'W/"v1"'}, "gzip")["etag"] == 'W/"v1"'
+    assert vary_accept_encoding(None) == "Accept-Encoding"
+    assert vary_accept_encoding("accept-encoding, Origin") == "accept-encoding, Origin"
+
+
+def test_weak_etag_of_compressed_variant_revalidates_cached_entry():
+    config = CacheConfig(enabled=True)
+    entry = CacheEntry(200, [("etag", '"v1"')], b"body", 60, config.stale_while_revalidate)
+    compressed_etag = encoded_headers(dict(entry.headers), "gzip")["etag"]
+    assert entry.not_modified({"if-none-match": compressed_etag})
+    assert entry.not_modified({"if-none-match": '"v0", ' + compressed_etag})
+    assert not entry.not_modified({"if-none-match": 'W/"v2"'})
+
+
+async def test_compress_round_trip(compressor):
+    body = b'{"items": []}' * 100
+    assert gzip.decompress(await compressor.compress(body, "gzip")) == body
+
+    async def chunks():
+        for _ in range(3):
+            yield body
+
+    streamed = b"".join([chunk async for chunk in compressor.compress_stream(chunks(), "gzip")])
+    assert gzip.decompress(streamed) == body * 3
@@ -0,0 +1,33 @@
+import httpx
+import pytest
+
+from src.app.core.config.settings import DeadlineConfig
+from src.app.services.proxy.deadline import DeadlineExceeded, attempt_timeout, parse_deadline
+
+CONFIG = DeadlineConfig(max_timeout=60)
+
+
+@pytest.mark.parametrize("header, total, expected", [
+    (None, None, None),
+    (None, 5.0, 105.0),
+    ("2000", None, 102.0),
+    ("2000", 1.0, 101.0),
+    ("-10", None, 100.0),
+    ("999999", None, 160.0),
+    ("abc", 5.0, 105.0),
+    ("nan", None, None),
+])
+def test_parse_deadline(header, total, expected):
+    assert parse_deadline(header, CONFIG, total, 100.0) == expected
+
+
+def test_attempt_timeout_clips_each_phase():
+    timeout = attempt_timeout(httpx.Timeout(30, connect=2), 5.0)
+    assert (timeout.connect, timeout.read, timeout.write, timeout.pool) == (2, 5.0, 5.0, 5.0)
+    unlimited = attempt_timeout(httpx.Timeout(None), 1.5)
+    assert unlimited.read == 1.5
+
+
+def test_deadline_exceeded_is_a_timeout():
+    # Mapeado para 504 junto com os timeouts do httpx
+    assert issubclass(DeadlineExceeded, httpx.TimeoutException)
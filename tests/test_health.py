@@ -0,0 +1,110 @@
+import pytest
+
+from src.app.core.config.settings import CircuitBreakerConfig, LoadBalancingConfig
+from src.app.services.proxy.balancer import Endpoint, LoadBalancer
+from src.app.services.proxy.breaker import CircuitBreaker
+from src.app.services.proxy.health import HealthChecker, HealthState
+
+
+@pytest.fixture
+def gateway():
+    """Balanceadores e breakers de dois serviços ligados a um HealthState, como no ProxyService"""
+    balancers, breakers = {}, {}
+    state = HealthState(lambda: balancers, lambda: breakers)
+    for name, urls in (("orders", ["http://orders.test"]), ("products", ["http://a.test", "http://b.test"])):
+        balancers[name] = LoadBalancer(
+            name, [Endpoint(url, 1, None) for url in urls],
+            LoadBalancingConfig(failure_threshold=2), on_change=state.invalidate
+        )
+        breakers[name] = CircuitBreaker(
+            name, CircuitBreakerConfig(minimum_calls=2, open_duration=30), on_change=state.invalidate
+        )
+    return balancers, breakers, state
+
+
+def fail(balancer, endpoint, times):
+    for _ in range(times):
+        balancer.on_start(endpoint)
+        balancer.on_finish(endpoint, 0.01, False)
+
+
+def test_all_healthy(gateway):
+    _, _, state = gateway
+    snapshot = state.snapshot()
+    assert snapshot["status"] == "healthy"
+    assert snapshot["services"]["orders"]["circuit"] == "closed"
+
+
+def test_single_endpoint_passive_failures(gateway):
+    balancers, _, state = gateway
+    balancer = balancers["orders"]
+    endpoint = balancer.endpoints[0]
+    fail(balancer, endpoint, 2)
+    snapshot = state.snapshot()
+    assert snapshot["services"]["orders"]["status"] == "unhealthy"
+    assert snapshot["services"]["orders"]["endpoints"][0]["ejected"]
+    assert snapshot["status"] == "degraded"
+    # Sem outra instância ela continua recebendo tráfego
+    assert balancer.pick() is endpoint
+
+    balancer.on_start(endpoint)
+    balancer.on_finish(endpoint, 0.01, True)
+    assert state.snapshot()["services"]["orders"]["status"] == "healthy"
+
+
+def test_ejected_endpoint_with_alternatives_stays_ejected_on_late_success(gateway):
+    balancers, _, state = gateway
+    balancer = balancers["products"]
+    bad, good = balancer.endpoints
+    fail(balancer, bad, 2)
+    balancer.on_start(bad)
+    balancer.on_finish(bad, 0.01, True)
+    assert bad.ejected_until > 0
+    assert state.snapshot()["services"]["products"]["available_endpoints"] == 1
+    assert state.snapshot()["services"]["products"]["status"] == "healthy"
+
+
+def test_open_circuit_is_unhealthy(gateway):
+    _, breakers, state = gateway
+    breaker = breakers["orders"]
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == "open"
+    snapshot = state.snapshot()
+    assert snapshot["services"]["orders"]["status"] == "unhealthy"
+    assert snapshot["services"]["orders"]["circuit"] == "open"
+    assert snapshot["status"] == "degraded"
+
+    breakers["products"].record(False, 0.01)
+    breakers["products"].record(False, 0.01)
+    assert state.snapshot()["status"] == "unhealthy"
+
+
+def test_open_circuit_past_open_duration_is_degraded(gateway):
+    _, breakers, state = gateway
+    breaker = breakers["orders"]
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    breaker.opened_at -= 31
+    state.invalidate()
+    service = state.snapshot()["services"]["orders"]
+    assert service["status"] == "degraded"
+    assert service["circuit"] == "half_open"
+
+
+def test_active_checks_thresholds(gateway, service_config):
+    balancers, _, state = gateway
+    checker = HealthChecker(
+        {"orders": service_config(health_check={"enabled": True, "unhealthy_threshold": 2, "healthy_threshold": 2})},
+        lambda: balancers, on_change=state.invalidate
+    )
+    endpoint = balancers["orders"].endpoints[0]
+    checker._record("orders", endpoint, False)
+    assert endpoint.healthy
+    checker._record("orders", endpoint, False)
+    assert not endpoint.healthy
+    assert state.snapshot()["services"]["orders"]["status"] == "unhealthy"
+    checker._record("orders", endpoint, True)
+    checker._record("orders", endpoint, True)
+    assert endpoint.healthy
+    assert state.snapshot()["services"]["orders"]["status"] == "healthy"
@@ -0,0 +1,75 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.app.core.logs import LOG_SAMPLED_SCOPE_KEY, RequestLog
+from src.app.core.tracing import TRACE_SCOPE_KEY
+from src.app.services.proxy import service as service_module
+from src.app.services.proxy.service import ProxyService
+
+
+class FakeTrace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("tests.request_log")
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_sampling_decision_is_taken_once_per_request(logger, monkeypatch):
+    request_log = RequestLog(logger, sample_rate=0.5)
+    draws = iter([0.1, 0.9, 0.9])
+    monkeypatch.setattr("src.app.core.logs.random.random", lambda: next(draws))
+    scope = {}
+
+    assert [request_log.enabled(logging.INFO, scope) for _ in range(3)] == [True, True, True]
+    assert scope[LOG_SAMPLED_SCOPE_KEY] is True
+
+    other = {}
+    assert [request_log.enabled(logging.DEBUG, other) for _ in range(3)] == [False, False, False]
+
+
+def test_sampling_follows_trace_id(logger):
+    request_log = RequestLog(logger, sample_rate=0.25)
+    low = {TRACE_SCOPE_KEY: FakeTrace("f" * 16 + "1" + "0" * 15)}
+    high = {TRACE_SCOPE_KEY: FakeTrace("0" * 16 + "f" * 16)}
+
+    assert request_log.enabled(logging.INFO, low)
+    assert not request_log.enabled(logging.INFO, high)
+    # Outro gateway com o mesmo trace decide igual
+    assert RequestLog(logger, sample_rate=0.25).sampled({TRACE_SCOPE_KEY: FakeTrace("0" * 16 + "f" * 16)}) is False
+
+
+def test_errors_and_full_rate_skip_sampling(logger):
+    scope = {LOG_SAMPLED_SCOPE_KEY: False}
+    assert RequestLog(logger, sample_rate=0.1).enabled(logging.ERROR, scope)
+    assert RequestLog(logger, sample_rate=1.0).enabled(logging.INFO, scope)
+
+    logger.setLevel(logging.WARNING)
+    assert not RequestLog(logger, sample_rate=1.0).enabled(logging.INFO, {})
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sample_rate, logged", [(0.0, 0), (1.0, 1)])
+async def test_upstream_failures_are_sampled_warnings(sample_rate, logged, make_request, monkeypatch, caplog):
+    proxy = ProxyService({"orders": {"url": "http://orders.test"}})
+    proxy.request_log = RequestLog(logging.getLogger(service_module.__name__), sample_rate)
+
+    async def send(*args, **kwargs):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(proxy, "_send", send)
+    with caplog.at_level(logging.DEBUG, logger=service_module.__name__):
+        with pytest.raises(HTTPException) as error:
+            await proxy._forward("orders", "items", make_request())
+    assert error.value.status_code == 502
+    records = [record for record in caplog.records if getattr(record, "event", None) == "upstream_unavailable"]
+    assert len(records) == logged
+    assert all(record.levelno == logging.WARNING for record in records)
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
@@ -0,0 +1,111 @@
+import pytest
+
+from src.app.core.security.middleware import CLIENT_IP_SCOPE_KEY, InternalNetworkMiddleware
+from src.app.core.security.networks import CIDRMatcher, VerdictCache
+
+
+@pytest.mark.parametrize("ip, expected", [
+    ("10.1.2.3", True),
+    ("10.255.255.255", True),
+    ("11.0.0.0", False),
+    ("192.168.1.1", True),
+    ("192.168.2.1", False),
+    ("::ffff:10.1.2.3", True),     # IPv4 mapeado em IPv6
+    ("::ffff:8.8.8.8", False),
+    ("fd00::1", True),
+    ("fe80::1", False),
+    ("not-an-ip", False),
+    ("", False),
+    ("10.0.0.256", False),
+])
+def test_cidr_matcher(ip, expected):
+    matcher = CIDRMatcher(["10.0.0.0/8", "192.168.1.0/24", "fd00::/8"])
+    assert matcher.contains(ip) is expected
+
+
+def test_overlapping_and_adjacent_ranges_are_merged():
+    matcher = CIDRMatcher(["10.0.0.0/24", "10.0.0.128/25", "10.0.1.0/24", " 10.0.3.7/16 "])
+    assert matcher._starts[4] == [int.from_bytes(bytes([10, 0, 0, 0]), "big")]
+    assert matcher.contains("10.0.1.255")
+    assert matcher.contains("10.0.200.1")
+    assert not matcher.contains("10.1.0.0")
+
+
+def test_empty_matcher():
+    matcher = CIDRMatcher([])
+    assert not matcher
+    assert not matcher.contains("10.0.0.1")
+    with pytest.raises(ValueError):
+        CIDRMatcher(["10.0.0.0/33"])
+
+
+def test_verdict_cache_is_lru():
+    cache = VerdictCache(2)
+    cache.set("a", True)
+    cache.set("b", False)
+    assert cache.get("a") is True
+    cache.set("c", True)
+    assert cache.get("b") is None
+    assert cache.get("c") is True
+    disabled = VerdictCache(0)
+    disabled.set("a", True)
+    assert disabled.get("a") is None
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call(middleware, client, forwarded=()):
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded],
+        "client": (client, 1234) if client else None,
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages[0]["status"], scope[CLIENT_IP_SCOPE_KEY]
+
+
+@pytest.fixture
+def middleware():
+    return InternalNetworkMiddleware(_app, ["10.0.0.0/8"], trusted_proxies=["172.16.0.0/12"])
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("client, forwarded, expected", [
+    # Cliente direto: o X-Forwarded-For é ignorado
+    ("10.0.0.5", (), (200, "10.0.0.5")),
+    ("8.8.8.8", (), (403, "8.8.8.8")),
+    ("8.8.8.8", ("10.0.0.5",), (403, "8.8.8.8")),
+    (None, (), (403, None)),
+    # Proxy confiável: vale o hop mais à direita que não é proxy confiável
+    ("172.16.0.1", ("10.0.0.5",), (200, "10.0.0.5")),
+    ("172.16.0.1", ("8.8.8.8",), (403, "8.8.8.8")),
+    ("172.16.0.1", ("10.0.0.5, 172.16.0.2, 172.20.0.3",), (200, "10.0.0.5")),
+    # O cliente não consegue se passar por interno acrescentando hops à esquerda
+    ("172.16.0.1", ("10.0.0.5, 8.8.8.8",), (403, "8.8.8.8")),
+    ("172.16.0.1", ("10.0.0.5", "8.8.8.8"), (403, "8.8.8.8")),
+    # Hop inválido não é confiável nem interno
+    ("172.16.0.1", ("10.0.0.5, garbage",), (403, "garbage")),
+    # Sem header ou só proxies confiáveis: o próprio proxy
+    ("172.16.0.1", (), (403, "172.16.0.1")),
+    ("172.16.0.1", ("172.16.0.9, ,",), (403, "172.16.0.1")),
+])
+async def test_client_ip_from_trusted_proxies(middleware, client, forwarded, expected):
+    assert await call(middleware, client, forwarded) == expected
+
+
+@pytest.mark.anyio
+async def test_without_trusted_proxies_forwarded_header_is_ignored():
+    middleware = InternalNetworkMiddleware(_app, ["10.0.0.0/8"])
+    assert await call(middleware, "8.8.8.8", ("10.0.0.5",)) == (403, "8.8.8.8")
+    assert await call(middleware, "::ffff:10.0.0.5") == (200, "::ffff:10.0.0.5")
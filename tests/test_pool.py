@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.app.services.proxy import pool as pool_module
+from src.app.services.proxy.balancer import Endpoint
+from src.app.services.proxy.pool import UpstreamPool
+from src.app.services.proxy.prewarm import PoolWarmer
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowBody(httpx.AsyncByteStream):
+    """Corpo entregue em blocos, liberados pelo teste"""
+
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+        self.release = asyncio.Event()
+
+    async def __aiter__(self):
+        for _ in range(self.chunks):
+            await self.release.wait()
+            yield b"x" * 1024
+
+
+@pytest.fixture
+def make_pool(service_config):
+    def build(handler):
+        return UpstreamPool("orders", service_config(), {"transport": httpx.MockTransport(handler)})
+    return build
+
+
+async def test_outstanding_until_response_is_closed(make_pool):
+    body = SlowBody(2)
+    pool = make_pool(lambda request: httpx.Response(200, stream=body))
+    response = await pool.send(pool.client.build_request("GET", "http://orders.test/"), stream=True)
+    assert pool.stats.in_flight == 0
+    assert pool.stats.outstanding == 1
+    body.release.set()
+    await response.aread()
+    assert pool.stats.outstanding == 0
+    # Fechar de novo não desconta duas vezes
+    await response.aclose()
+    assert pool.stats.outstanding == 0
+
+
+async def test_failed_send_is_not_outstanding(make_pool):
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    pool = make_pool(refuse)
+    with pytest.raises(httpx.ConnectError):
+        await pool.send(pool.client.build_request("GET", "http://orders.test/"), stream=True)
+    assert pool.stats.outstanding == 0
+    assert pool.stats.errors == 1
+
+
+async def test_drain_waits_for_streaming_body(make_pool):
+    body = SlowBody(3)
+    pool = make_pool(lambda request: httpx.Response(200, stream=body))
+    response = await pool.send(pool.client.build_request("GET", "http://orders.test/"), stream=True)
+
+    drain = asyncio.create_task(pool.drain_and_close(timeout=5, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    assert not drain.done()
+    assert not pool.client.is_closed
+
+    body.release.set()
+    chunks = [chunk async for chunk in response.aiter_raw()]
+    assert len(chunks) == 3
+    await asyncio.wait_for(drain, 1)
+    assert pool.client.is_closed
+
+
+async def test_drain_is_bounded_by_timeout(make_pool):
+    pool = make_pool(lambda request: httpx.Response(200, stream=SlowBody(1)))
+    await pool.send(pool.client.build_request("GET", "http://orders.test/"), stream=True)
+    await asyncio.wait_for(pool.drain_and_close(timeout=0.05, poll_interval=0.01), 1)
+    assert pool.client.is_closed
+    assert pool.stats.outstanding == 1
+
+
+async def test_buffered_read_releases_the_response(make_pool):
+    from src.app.services.proxy.body import read_response
+
+    body = SlowBody(2)
+    body.release.set()
+    pool = make_pool(lambda request: httpx.Response(200, stream=body))
+    response = await pool.send(pool.client.build_request("GET", "http://orders.test/"), stream=True)
+    assert pool.stats.outstanding == 1
+    await read_response(response, None, None)
+    assert len(response.content) == 2048
+    assert pool.stats.outstanding == 0
+
+
+class FakeConnection:
+    """Conexão do httpcore com só o que `warm_state` consulta"""
+
+    def __init__(self, idle=True, expire_at=None, closed=False):
+        self.idle = idle
+        self.closed = closed
+        self._connection = SimpleNamespace(_expire_at=expire_at)
+
+    def is_closed(self):
+        return self.closed
+
+    def has_expired(self):
+        return False
+
+    def is_idle(self):
+        return self.idle
+
+
+def test_warm_state_counts_busy_and_recently_used_connections(service_config, monkeypatch):
+    pool = UpstreamPool("orders", service_config(pool={"keepalive_expiry": 10.0}), {})
+    assert pool.warm_state(5.0) == (0, 0)
+
+    now = time.monotonic()
+    connections = [
+        FakeConnection(idle=False),
+        FakeConnection(expire_at=now + 9),   # ociosa há 1 s
+        FakeConnection(expire_at=now + 2),   # ociosa há 8 s
+        FakeConnection(closed=True),
+    ]
+    monkeypatch.setattr(pool, "_connections", lambda: connections)
+    assert pool.warm_state(5.0) == (1, 1)
+
+
+async def test_prewarm_is_a_noop_without_pool_internals(make_pool, service_config, monkeypatch, caplog):
+    monkeypatch.setattr(pool_module, "_internals_warned", False)
+    requests = []
+    pool = make_pool(lambda request: requests.append(request) or httpx.Response(204))
+
+    with caplog.at_level(logging.WARNING, logger=pool_module.__name__):
+        assert pool.warm_state(5.0) is None
+        assert pool.snapshot()["connections"] is None
+    assert len([r for r in caplog.records if "prewarm disabled" in r.getMessage()]) == 1
+
+    warmer = PoolWarmer({"orders": service_config(prewarm={"min_connections": 2})}, lambda: {})
+    warmer.connections["orders"] = {}
+    assert await warmer._warm("orders", Endpoint("http://orders.test", 1, pool)) is False
+    assert requests == []
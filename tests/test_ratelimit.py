@@ -0,0 +1,111 @@
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.app.core.config.settings import APIKeyStoreConfig, RateLimitConfig, RateLimitRule, ServiceLimitsConfig
+from src.app.core.security.api_key import APIKeyStore
+from src.app.core.security.ratelimit import (
+    ConcurrencyLimiter, LocalRateLimitBackend, RateLimiter, RateLimitExceeded
+)
+from src.app.services.proxy import service as service_module
+from src.app.services.proxy.service import ProxyService
+
+
+def test_gcra_rate_and_burst():
+    backend = LocalRateLimitBackend()
+    # 2/s com rajada de 3: três passam de imediato, a quarta espera meio intervalo
+    assert [backend.check("k", 2, 3, now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.check("k", 2, 3, now=0.0) == pytest.approx(0.5)
+    assert backend.check("k", 2, 3, now=0.5) == 0.0
+    assert backend.check("k", 2, 3, now=0.5) == pytest.approx(0.5)
+
+
+def test_gcra_rejection_does_not_consume():
+    backend = LocalRateLimitBackend()
+    backend.check("k", 1, 1, now=0.0)
+    for _ in range(5):
+        assert backend.check("k", 1, 1, now=0.1) > 0
+    assert backend.check("k", 1, 1, now=1.0) == 0.0
+
+
+def test_gcra_idle_key_recovers_full_burst():
+    backend = LocalRateLimitBackend()
+    for _ in range(3):
+        backend.check("k", 4, 3, now=0.0)
+    assert [backend.check("k", 4, 3, now=60.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_local_backend_is_bounded():
+    backend = LocalRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.check(key, 1, 1, now=0.0)
+    assert len(backend) == 2
+
+
+@pytest.mark.anyio
+async def test_rules_order_and_key_rule():
+    limiter = RateLimiter(RateLimitConfig(per_api_key=RateLimitRule(rate=1, burst=1)))
+    limits = ServiceLimitsConfig(per_client_ip=RateLimitRule(rate=1, burst=5), rate=RateLimitRule(rate=1, burst=100))
+    rules = limiter._rules("orders", limits, "key", "10.0.0.1", RateLimitRule(rate=5, burst=5))
+    assert [limit for limit, _, _ in rules] == ["client_ip", "api_key", "service"]
+    assert rules[1][2].rate == 5
+    # A chave nunca aparece em claro
+    assert "key" not in rules[1][1].split(":")[1:]
+
+    await limiter.check("orders", limits, None, "10.0.0.1")
+    with pytest.raises(RateLimitExceeded) as error:
+        for _ in range(5):
+            await limiter.check("orders", limits, None, "10.0.0.1")
+    assert error.value.limit == "client_ip"
+
+
+def test_concurrency_limiter_permits():
+    limiter = ConcurrencyLimiter(1)
+    permit = limiter.try_acquire()
+    assert limiter.try_acquire() is None
+    permit.release()
+    permit.release()
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()["rejected"] == 1
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    store = APIKeyStore(APIKeyStoreConfig(), ["valid-key"])
+    monkeypatch.setattr(service_module, "api_key_store", store)
+    proxy = ProxyService({"orders": {
+        "url": "http://orders.test",
+        "limits": {"per_api_key": {"rate": 1, "burst": 1}, "per_client_ip": {"rate": 1, "burst": 3}},
+    }})
+
+    async def send(*args, **kwargs):
+        return httpx.Response(200, content=b"ok", request=httpx.Request("GET", "http://orders.test/"))
+
+    monkeypatch.setattr(proxy, "_send", send)
+    return proxy
+
+
+async def statuses(proxy, make_request, keys):
+    result = []
+    for key in keys:
+        try:
+            response = await proxy._forward("orders", "items", make_request(headers={"x-api-key": key}))
+            result.append(response.status_code)
+        except HTTPException as e:
+            result.append(e.status_code)
+    return result
+
+
+@pytest.mark.anyio
+async def test_per_key_limit_applies_to_valid_key(proxy, make_request):
+    assert await statuses(proxy, make_request, ["valid-key"] * 3) == [200, 429, 429]
+
+
+@pytest.mark.anyio
+async def test_unknown_keys_fall_back_to_client_ip_limit(proxy, make_request):
+    keys = [str(uuid.uuid4()) for _ in range(5)]
+    assert await statuses(proxy, make_request, keys) == [200, 200, 200, 429, 429]
+    # Nenhuma chave inventada vira bucket no backend
+    assert len(proxy.rate_limiter.backend) == 1
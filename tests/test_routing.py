@@ -0,0 +1,63 @@
+import pytest
+
+from src.app.services.proxy.routing import RouteTable
+
+API_PREFIX = "/api/v1"
+
+
+@pytest.fixture
+def routes(service_config):
+    return RouteTable(
+        {
+            "catalog": service_config(routes=[
+                {"path": "items/{id}", "rewrite": "/v2/items/{id}"},
+                {"path": "items/{id}/reviews", "rewrite": "/reviews/{id}", "methods": ["GET"]},
+                {"path": "upload", "rewrite": "/files", "streaming": True},
+            ]),
+            "users": service_config(upstream_prefix=""),
+        },
+        API_PREFIX,
+    )
+
+
+def test_default_prefix_without_rule(routes):
+    assert routes.resolve("catalog", "GET", "search").path == "/api/v1/catalog/search"
+
+
+def test_empty_upstream_prefix(routes):
+    assert routes.resolve("users", "GET", "42/profile").path == "/42/profile"
+    assert routes.resolve("users", "GET", "").path == ""
+
+
+def test_rewrite_with_parameter_and_rest(routes):
+    assert routes.resolve("catalog", "GET", "items/7").path == "/v2/items/7"
+    assert routes.resolve("catalog", "GET", "items/7/images/1").path == "/v2/items/7/images/1"
+
+
+def test_method_specific_rule_and_fallback(routes):
+    assert routes.resolve("catalog", "GET", "items/7/reviews").path == "/reviews/7"
+    # Sem regra para POST no nó mais profundo: vale a do ancestral, com o restante anexado
+    assert routes.resolve("catalog", "POST", "items/7/reviews").path == "/v2/items/7/reviews"
+
+
+def test_redundant_prefix_and_empty_segments(routes):
+    assert routes.resolve("catalog", "GET", "api/v1/catalog/items/7").path == "/v2/items/7"
+    assert routes.resolve("catalog", "GET", "//items//7/").path == "/v2/items/7"
+
+
+def test_query_string_and_streaming_override(routes):
+    resolved = routes.resolve("catalog", "PUT", "upload", b"name=a%20b")
+    assert resolved.path == "/files?name=a%20b"
+    assert resolved.streaming is True
+    assert routes.resolve("catalog", "GET", "items/7").streaming is None
+
+
+def test_conflicting_parameters_are_rejected(service_config):
+    with pytest.raises(ValueError):
+        RouteTable(
+            {"catalog": service_config(routes=[
+                {"path": "items/{id}", "rewrite": "/a/{id}"},
+                {"path": "items/{sku}/x", "rewrite": "/b/{sku}"},
+            ])},
+            API_PREFIX,
+        )
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.app.services.proxy.deadline import DeadlineExceeded
+from src.app.services.proxy.service import ProxyService
+from src.app.services.proxy.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(single_flight.do("key", fetch, 5.0)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert single_flight.in_flight == 1
+    release.set()
+    assert await asyncio.gather(*waiters) == [1] * 5
+    assert calls == 1
+    assert single_flight.stats.as_dict() == {"leaders": 1, "shared": 4, "timeouts": 0}
+    assert single_flight.in_flight == 0
+
+
+async def test_different_keys_run_separately():
+    single_flight = SingleFlight()
+
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        single_flight.do("a", lambda: fetch("a"), 5.0),
+        single_flight.do("b", lambda: fetch("b"), 5.0),
+    )
+    assert results == ["a", "b"]
+    assert single_flight.stats.leaders == 2
+
+
+async def test_errors_reach_every_waiter():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", fail, 5.0) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert single_flight.in_flight == 0
+
+
+async def test_waiter_past_max_wait_calls_directly():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "shared"
+
+    async def direct():
+        return "direct"
+
+    leader = asyncio.create_task(single_flight.do("key", slow, 5.0))
+    await asyncio.sleep(0)
+    assert await single_flight.do("key", direct, 0.01) == "direct"
+    assert single_flight.stats.timeouts == 1
+    release.set()
+    assert await leader == "shared"
+
+
+async def test_leader_cancellation_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(single_flight.do("key", fetch, 5.0))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(single_flight.do("key", fetch, 5.0))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == "done"
+
+
+async def test_leader_deadline_does_not_cut_off_followers(monkeypatch):
+    proxy = ProxyService({"orders": {
+        "url": "http://orders.test", "coalescing": {"enabled": True}, "timeouts": {"total": 30},
+    }})
+    deadlines = []
+
+    async def send(service, method, path, headers, deadline=None, **kwargs):
+        deadlines.append(deadline)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, content=b"ok", request=httpx.Request(method, "http://orders.test/"))
+
+    monkeypatch.setattr(proxy, "_send", send)
+    now = time.monotonic()
+    leader = asyncio.create_task(proxy._fetch("orders", "GET", "/items", {}, deadline=now + 0.02))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(proxy._fetch("orders", "GET", "/items", {})) for _ in range(3)]
+
+    with pytest.raises(DeadlineExceeded):
+        await leader
+    responses = await asyncio.gather(*followers)
+    assert [response.status_code for response in responses] == [200] * 3
+    # Uma só chamada, limitada pelo timeouts.total do serviço e não pelo prazo do líder
+    assert len(deadlines) == 1
+    assert deadlines[0] >= now + 29
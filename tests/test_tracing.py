@@ -0,0 +1,77 @@
+import pytest
+
+from src.app.core.config.settings import TracingConfig
+from src.app.core.tracing import Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (f"00-{TRACE_ID}-{PARENT_ID}-01", (TRACE_ID, PARENT_ID, True)),
+    (f"00-{TRACE_ID}-{PARENT_ID}-00", (TRACE_ID, PARENT_ID, False)),
+    (f"  00-{TRACE_ID}-{PARENT_ID}-03  ", (TRACE_ID, PARENT_ID, True)),
+    # Versões futuras podem ter campos a mais
+    (f"01-{TRACE_ID}-{PARENT_ID}-01-extra", (TRACE_ID, PARENT_ID, True)),
+])
+def test_valid_traceparent(value, expected):
+    assert parse_traceparent(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    None,
+    "",
+    f"00-{TRACE_ID.upper()}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID.upper()}-01",
+    f"00-{TRACE_ID}-{PARENT_ID}-0A",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+    f"0-{TRACE_ID}-{PARENT_ID}-01",
+    f"zz-{TRACE_ID}-{PARENT_ID}-01",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+    f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}0-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID[:-1]}-01",
+    f"00-{TRACE_ID}-{PARENT_ID}-1",
+    f"00-{TRACE_ID}-{PARENT_ID}-01-extra",
+    f"00-{TRACE_ID}-{PARENT_ID}",
+    f"00-{TRACE_ID[:-1]}g-{PARENT_ID}-01",
+])
+def test_invalid_traceparent(value):
+    assert parse_traceparent(value) is None
+
+
+def scope(*headers):
+    return {"headers": [(name.encode(), value.encode()) for name, value in headers]}
+
+
+@pytest.mark.parametrize("flags, sampled", [("01", True), ("00", False)])
+def test_parent_based_sampling_keeps_upstream_flag(flags, sampled):
+    # sample_rate oposto ao flag: vale a decisão do cliente
+    tracer = Tracer(TracingConfig(exporter="memory", sample_rate=0.0 if sampled else 1.0))
+    trace, generated = tracer.start_trace(scope(("traceparent", f"00-{TRACE_ID}-{PARENT_ID}-{flags}")))
+    assert (trace.trace_id, trace.parent_id, trace.sampled) == (TRACE_ID, PARENT_ID, sampled)
+    assert generated
+    assert trace.request_id == TRACE_ID
+    # O flag é propagado para o upstream
+    assert trace.traceparent() == f"00-{TRACE_ID}-{trace.root_id}-{flags}"
+
+
+def test_sampling_ignores_parent_when_not_parent_based():
+    tracer = Tracer(TracingConfig(exporter="memory", sample_rate=0.0, parent_based=False))
+    trace, _ = tracer.start_trace(scope(("traceparent", f"00-{TRACE_ID}-{PARENT_ID}-01")))
+    assert trace.trace_id == TRACE_ID
+    assert not trace.sampled
+
+
+@pytest.mark.parametrize("sample_rate", [0.0, 1.0])
+def test_new_trace_uses_sample_rate(sample_rate):
+    tracer = Tracer(TracingConfig(exporter="memory", sample_rate=sample_rate))
+    # traceparent inválido é tratado como ausente: trace novo
+    trace, generated = tracer.start_trace(scope(
+        ("traceparent", f"00-{TRACE_ID.upper()}-{PARENT_ID}-01"), ("x-request-id", "req-1"),
+    ))
+    assert trace.trace_id != TRACE_ID.upper() and len(trace.trace_id) == 32
+    assert trace.parent_id is None
+    assert trace.sampled is bool(sample_rate)
+    assert (trace.request_id, generated) == ("req-1", False)